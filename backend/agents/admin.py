@@ -1,11 +1,58 @@
-from django.contrib import admin
-from agents.models import Agent
+from django.contrib import admin, messages
+from agents.deletion import request_account_deletion
+from agents.models import AccountDeletionJob, Agent
+from rivo_partner.admin import ScalableAdmin
 
 
 @admin.register(Agent)
-class AgentAdmin(admin.ModelAdmin):
+class AgentAdmin(ScalableAdmin):
     list_display = ['name', 'phone', 'agent_code', 'agent_type', 'is_profile_complete', 'is_active', 'created_at']
     list_filter = ['agent_type', 'is_profile_complete', 'is_active', 'created_at']
     search_fields = ['name', 'phone', 'agent_code', 'email']
+    phone_search_fields = ['phone']
+    agent_code_search_fields = ['agent_code']
+    date_hierarchy = 'created_at'
     readonly_fields = ['id', 'agent_code', 'device_token', 'created_at', 'updated_at']
     raw_id_fields = ['referred_by']
+    actions = ['erase_agents']
+
+    @admin.action(description='Erase selected agents (deactivate and unlink their data)', permissions=['delete'])
+    def erase_agents(self, request, queryset):
+        queued = 0
+        for agent in queryset.filter(is_active=True).iterator(chunk_size=500):
+            request_account_deletion(agent, requested_by=request.user.get_username())
+            queued += 1
+        self.message_user(
+            request, f'{queued} account deletions queued — follow them under Account deletion jobs.',
+            messages.SUCCESS,
+        )
+
+
+@admin.register(AccountDeletionJob)
+class AccountDeletionJobAdmin(ScalableAdmin):
+    list_display = ['agent', 'status', 'progress_display', 'step', 'requested_by', 'attempts', 'created_at',
+                    'finished_at']
+    list_filter = ['status']
+    list_select_related = ['agent']
+    search_fields = ['agent__name', 'requested_by']
+    phone_search_fields = ['agent__phone']
+    agent_code_search_fields = ['agent__agent_code']
+    date_hierarchy = 'created_at'
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Progress')
+    def progress_display(self, obj):
+        total = '?' if obj.total_rows is None else obj.total_rows
+        return f'{obj.progress}% ({obj.done_rows}/{total} rows)'
+
+    @admin.action(description='Retry selected failed jobs', permissions=['delete'])
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status='FAILED').exclude(
+            agent__deletion_jobs__status__in=['PENDING', 'RUNNING']).update(status='PENDING')
+        self.message_user(request, f'{retried} jobs queued again.', messages.SUCCESS)
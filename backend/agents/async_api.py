@@ -0,0 +1,66 @@
+"""Minimal async counterpart of DRF's @api_view for ASGI mode.
+
+DRF views are sync-only, so the I/O-bound endpoints have async versions
+built on plain Django async views. This decorator gives them the same
+contract as the DRF versions: JSON request body on `request.data`, device
+token authentication on `request.user`, and DRF-rendered JSON responses
+with the same error bodies and status codes."""
+import functools
+import json
+
+import httpx
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+
+from agents.authentication import DeviceTokenAuthentication
+from rivo_partner.renderers import FastJSONRenderer
+
+_http_client = None
+
+
+def http_client():
+    """Shared AsyncClient so outbound calls reuse pooled connections."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=10)
+    return _http_client
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+async def _authenticate(request):
+    result = await DeviceTokenAuthentication().aauthenticate(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    return result[0]
+
+
+def async_api_view(methods, authenticated=True):
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return render({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                request.data = json.loads(request.body or b'{}')
+            except ValueError as e:
+                return render({'detail': f'JSON parse error - {e}'}, status.HTTP_400_BAD_REQUEST)
+            if authenticated:
+                try:
+                    request.user = await _authenticate(request)
+                except exceptions.APIException as e:
+                    # DeviceTokenAuthentication has no WWW-Authenticate header,
+                    # so DRF answers these with 403 — match it.
+                    return render({'detail': e.detail}, status.HTTP_403_FORBIDDEN)
+            try:
+                return await view(request, *args, **kwargs)
+            except exceptions.ValidationError as e:
+                return render(e.detail, status.HTTP_400_BAD_REQUEST)
+        # Django 4.2's csrf_exempt wraps in a sync function; mark it directly
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
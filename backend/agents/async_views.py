@@ -0,0 +1,87 @@
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from agents.async_api import async_api_view, http_client, render
+from agents.oauth_keys import verify_google_id_token
+from agents.serializers import AgentSerializer
+from agents.views import MICROSOFT_PROFILE_URL, MICROSOFT_TOKEN_URL, microsoft_token_request
+
+logger = logging.getLogger(__name__)
+
+
+async def save_connected_email(agent, email, provider):
+    """Async version of agents.views.save_connected_email."""
+    agent.email = email
+    await agent.asave(update_fields=['email'])
+    logger.info('%s connected: agent=%s', provider, agent.phone)
+    # The payload's earnings and payout totals are several queries: one hop
+    return await sync_to_async(lambda: AgentSerializer(agent).data)()
+
+
+@async_api_view(['POST'])
+async def connect_google(request):
+    """Async version of agents.views.connect_google for ASGI mode."""
+    credential = request.data.get('credential', '')
+    if not credential:
+        return render({'error': 'Missing credential.'}, status.HTTP_400_BAD_REQUEST)
+
+    google_client_id = os.getenv('GOOGLE_CLIENT_ID', '')
+    if not google_client_id:
+        logger.error('GOOGLE_CLIENT_ID env var not set')
+        return render({'error': 'Google OAuth not configured.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    try:
+        # Off the event loop: an expired or rotated key set is fetched synchronously
+        idinfo = await sync_to_async(verify_google_id_token, thread_sensitive=False)(credential, google_client_id)
+        email = idinfo.get('email', '')
+        if not email:
+            return render({'error': 'No email in Google token.'}, status.HTTP_400_BAD_REQUEST)
+
+        return render(await save_connected_email(request.user, email, 'Google'))
+    except ValueError as e:
+        logger.warning('Invalid Google token for agent %s: %s', request.user.phone, e)
+        return render({'error': 'Invalid Google token.'}, status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view(['POST'])
+async def connect_outlook(request):
+    """Async version of agents.views.connect_outlook for ASGI mode."""
+    code = request.data.get('code', '')
+    redirect_uri = request.data.get('redirect_uri', '')
+    if not code:
+        return render({'error': 'Missing auth code.'}, status.HTTP_400_BAD_REQUEST)
+
+    client_id = os.getenv('MICROSOFT_CLIENT_ID', '')
+    client_secret = os.getenv('MICROSOFT_CLIENT_SECRET', '')
+    if not client_id or not client_secret:
+        logger.error('MICROSOFT_CLIENT_ID or MICROSOFT_CLIENT_SECRET env var not set')
+        return render({'error': 'Microsoft OAuth not configured.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    try:
+        token_response = await http_client().post(
+            MICROSOFT_TOKEN_URL,
+            data=microsoft_token_request(code, redirect_uri, client_id, client_secret),
+        )
+        token_data = token_response.json()
+        access_token = token_data.get('access_token')
+        if not access_token:
+            logger.warning('Microsoft token exchange failed: %s', token_data.get('error'))
+            return render({'error': 'Failed to get Microsoft token.'}, status.HTTP_400_BAD_REQUEST)
+
+        profile_response = await http_client().get(
+            MICROSOFT_PROFILE_URL,
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        profile = profile_response.json()
+        email = profile.get('mail') or profile.get('userPrincipalName', '')
+        if not email:
+            logger.warning('No email in Microsoft profile: id=%s', profile.get('id'))
+            return render({'error': 'No email from Microsoft.'}, status.HTTP_400_BAD_REQUEST)
+
+        return render(await save_connected_email(request.user, email, 'Outlook'))
+    except Exception as e:
+        logger.error('Microsoft auth failed for agent %s: %s', request.user.phone, e)
+        return render({'error': 'Microsoft auth failed.'}, status.HTTP_400_BAD_REQUEST)
@@ -6,12 +6,15 @@ from agents.models import Agent
 class DeviceTokenAuthentication(BaseAuthentication):
     """Authenticate agents via device token passed in Authorization header."""
 
-    def authenticate(self, request):
+    @staticmethod
+    def get_token(request):
         auth_header = request.headers.get('Authorization', '')
         if not auth_header.startswith('Bearer '):
             return None
+        return auth_header.split('Bearer ')[1].strip() or None
 
-        token = auth_header.split('Bearer ')[1].strip()
+    def authenticate(self, request):
+        token = self.get_token(request)
         if not token:
             return None
 
@@ -21,3 +24,16 @@ class DeviceTokenAuthentication(BaseAuthentication):
             raise AuthenticationFailed('Invalid or expired token.')
 
         return (agent, token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for the async views (agents.async_api)."""
+        token = self.get_token(request)
+        if not token:
+            return None
+
+        try:
+            agent = await Agent.objects.aget(device_token=token, is_active=True)
+        except Agent.DoesNotExist:
+            raise AuthenticationFailed('Invalid or expired token.')
+
+        return (agent, token)
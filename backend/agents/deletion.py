@@ -0,0 +1,176 @@
+"""Account deletion in the background.
+
+Deleting an account only deactivates the agent and queues an
+AccountDeletionJob, which unlinks their clients and referred agents and
+deletes their bonuses and sessions CHUNK_SIZE rows per transaction, so no
+transaction holds locks across a large book. A job of up to
+INLINE_MAX_ROWS rows is run as soon as the request that queued it
+commits; larger ones are left to `manage.py run_account_deletions`,
+scheduled every minute (see SCHEDULED_JOBS.md). Every step works on
+whatever rows are still linked, so a job interrupted at any point simply
+resumes. The agent can sign up again once their job is DONE."""
+import datetime
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from agents.models import AccountDeletionJob, Agent, WhatsAppSession
+from agents.services import invalidate_home_snapshot, invalidate_network_snapshot
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+OPEN = ['PENDING', 'RUNNING']
+# A RUNNING job not updated for this long lost its worker and is picked up again
+STALE_AFTER = datetime.timedelta(minutes=10)
+# Jobs this small run right after the request that queued them, for up to
+# INLINE_TIME_LIMIT seconds
+INLINE_MAX_ROWS = CHUNK_SIZE
+INLINE_TIME_LIMIT = 5
+
+
+def _steps(agent_id):
+    """(name, rows still to process, what to do with a chunk of them)."""
+    from clients.models import Client
+    from referrals.models import NewAgentBonus, ReferralBonus
+
+    def delete(queryset):
+        return queryset.delete()[1].get(queryset.model._meta.label, 0)
+
+    return [
+        ('clients', Client.objects.filter(source_agent_id=agent_id),
+         lambda rows: rows.update(source_agent=None)),
+        ('referred_agents', Agent.objects.filter(referred_by_id=agent_id),
+         lambda rows: rows.update(referred_by=None)),
+        ('new_agent_bonuses', NewAgentBonus.objects.filter(agent_id=agent_id), delete),
+        ('referral_bonuses', ReferralBonus.objects.filter(referrer_id=agent_id), delete),
+        ('sessions', WhatsAppSession.objects.filter(agent_id=agent_id), delete),
+    ]
+
+
+def request_account_deletion(agent, requested_by=''):
+    """Deactivate the agent (logging them out) and queue the cleanup.
+    Returns the agent's open job."""
+    with transaction.atomic():
+        job = AccountDeletionJob.objects.filter(agent=agent, status__in=OPEN).first()
+        if job is None:
+            job = AccountDeletionJob.objects.create(agent=agent, requested_by=requested_by)
+        referrer_id = agent.referred_by_id
+        agent.is_active = False
+        agent.device_token = ''
+        agent.referred_by = None
+        agent.save(update_fields=['is_active', 'device_token', 'referred_by'])
+    # Both this agent's network and the one they appear in change
+    invalidate_network_snapshot(agent.pk)
+    invalidate_network_snapshot(referrer_id)
+    kick_job(job)
+    logger.info('Account deletion queued: %s (by %s)', agent.phone, requested_by or 'agent',
+                extra={'audit': True})
+    return job
+
+
+def kick_job(job):
+    """Once the current transaction commits, run the PENDING job inline if
+    its book is small. Larger jobs, and anything that goes wrong here, are
+    left to run_account_deletions."""
+    def _run():
+        try:
+            total = sum(rows.count() for _, rows, _ in _steps(job.agent_id))
+            if total > INLINE_MAX_ROWS:
+                return
+            claimed = AccountDeletionJob.objects.filter(pk=job.pk, status='PENDING').update(
+                status='RUNNING', attempts=F('attempts') + 1, updated_at=timezone.now())
+            if claimed:
+                run_job(AccountDeletionJob.objects.get(pk=job.pk), deadline=time.monotonic() + INLINE_TIME_LIMIT)
+        except Exception:
+            logger.exception('Inline account deletion %s failed; left for run_account_deletions', job.pk)
+
+    transaction.on_commit(_run)
+
+
+def _claim_job():
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            AccountDeletionJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=now - STALE_AFTER))
+            .order_by('created_at').first()
+        )
+        if job is not None:
+            job.status = 'RUNNING'
+            job.attempts += 1
+            job.save(update_fields=['status', 'attempts', 'updated_at'])
+    return job
+
+
+def run_job(job, chunk_size=CHUNK_SIZE, deadline=None):
+    """Work through the job until it is done or `deadline` (a monotonic
+    time) passes, when it goes back to PENDING. Returns the job status."""
+    steps = _steps(job.agent_id)
+    if job.total_rows is None:
+        job.total_rows = sum(rows.count() for _, rows, _ in steps)
+        job.save(update_fields=['total_rows', 'updated_at'])
+    try:
+        for name, rows, process in steps:
+            while True:
+                if deadline is not None and time.monotonic() > deadline:
+                    AccountDeletionJob.objects.filter(pk=job.pk, status='RUNNING').update(
+                        status='PENDING', updated_at=timezone.now())
+                    return 'PENDING'
+                with transaction.atomic():
+                    job = AccountDeletionJob.objects.select_for_update().get(pk=job.pk)
+                    if job.status != 'RUNNING':
+                        return job.status
+                    pks = list(rows.order_by().values_list('pk', flat=True)[:chunk_size])
+                    if pks:
+                        job.done_rows += process(rows.model.objects.filter(pk__in=pks))
+                    job.step = name
+                    job.save(update_fields=['done_rows', 'step', 'updated_at'])
+                if len(pks) < chunk_size:
+                    break
+    except Exception as e:
+        logger.exception('Account deletion %s failed at %s', job.pk, job.step)
+        AccountDeletionJob.objects.filter(pk=job.pk).update(
+            status='FAILED', error_message=str(e)[:2000], updated_at=timezone.now())
+        return 'FAILED'
+
+    AccountDeletionJob.objects.filter(pk=job.pk).update(
+        status='DONE', step='', error_message='', finished_at=timezone.now(), updated_at=timezone.now())
+    invalidate_network_snapshot(job.agent_id)
+    invalidate_home_snapshot(job.agent_id)
+    logger.info('Account deletion done: %s, %d rows', job.agent_id, job.done_rows, extra={'audit': True})
+    return 'DONE'
+
+
+def run_pending_jobs(chunk_size=CHUNK_SIZE, time_limit=50):
+    """Run queued jobs, oldest first, for up to time_limit seconds.
+    Returns {status: jobs}."""
+    deadline = time.monotonic() + time_limit
+    outcome = {}
+    while time.monotonic() < deadline:
+        job = _claim_job()
+        if job is None:
+            break
+        status = run_job(job, chunk_size, deadline)
+        outcome[status] = outcome.get(status, 0) + 1
+    return outcome
+
+
+def unfinished_deletion(agent):
+    """The agent's deletion job that isn't DONE, or None. Signing up again is
+    refused while there is one: the job, or a retry of a FAILED one, would
+    unlink what they do after re-activating."""
+    return AccountDeletionJob.objects.filter(agent=agent).exclude(status='DONE').order_by('-created_at').first()
+
+
+def retry_job(job):
+    """Queue a FAILED job again (unless the agent has an open one) and kick
+    it. Returns whether it was queued."""
+    queued = AccountDeletionJob.objects.filter(pk=job.pk, status='FAILED').exclude(
+        agent__deletion_jobs__status__in=OPEN).update(status='PENDING', updated_at=timezone.now())
+    if queued:
+        kick_job(job)
+    return bool(queued)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from agents.deletion import CHUNK_SIZE, run_pending_jobs
+from agents.models import AccountDeletionJob
+
+
+class Command(BaseCommand):
+    help = 'Process queued account deletions in chunks (run every minute)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per transaction')
+        parser.add_argument('--time-limit', type=int, default=50,
+                            help='Stop taking new chunks after this many seconds; unfinished jobs resume next run')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue failed jobs again first')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = AccountDeletionJob.objects.filter(status='FAILED').exclude(
+                agent__deletion_jobs__status__in=['PENDING', 'RUNNING']).update(status='PENDING')
+            self.stdout.write(f'  {retried} failed jobs queued again')
+        outcome = run_pending_jobs(options['chunk_size'], options['time_limit'])
+        summary = ', '.join(f'{count} {status.lower()}' for status, count in sorted(outcome.items())) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Done. {summary}.'))
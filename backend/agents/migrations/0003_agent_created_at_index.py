@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0002_whatsappsession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['created_at'], name='agents_created_697d3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappsession',
+            index=models.Index(fields=['is_verified', '-created_at'], name='whatsapp_se_is_veri_8b5db6_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0003_agent_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('requested_by', models.CharField(blank=True, default='', max_length=150)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('step', models.CharField(blank=True, default='', max_length=30)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('done_rows', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deletion_jobs', to='agents.agent')),
+            ],
+            options={
+                'db_table': 'account_deletion_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='account_del_status_154c5b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountdeletionjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('agent',), name='one_open_deletion_per_agent'),
+        ),
+    ]
@@ -2,6 +2,7 @@ import uuid
 import random
 import string
 from django.db import models
+from django.utils.functional import cached_property
 
 
 def generate_agent_code():
@@ -39,6 +40,9 @@ class Agent(models.Model):
     class Meta:
         db_table = 'agents'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f'{self.name or self.phone} ({self.agent_code})'
@@ -73,6 +77,21 @@ class Agent(models.Model):
             status__in=['PREAPPROVED', 'FOL_RECEIVED']
         ).aggregate(total=Sum('estimated_commission'))['total'] or 0
 
+    @cached_property
+    def payout_totals(self):
+        from payouts.services import agent_payout_totals
+        return agent_payout_totals(self.pk)
+
+    @property
+    def paid_amount(self):
+        """Paid out through payout batches."""
+        return self.payout_totals['paid']
+
+    @property
+    def payout_pending_amount(self):
+        """In a payout batch that is not paid yet."""
+        return self.payout_totals['pending']
+
     @property
     def disbursed_count(self):
         return self.clients.filter(status='DISBURSED').count()
@@ -112,3 +131,50 @@ class WhatsAppSession(models.Model):
 
     def __str__(self):
         return f'Code {self.code} - verified={self.is_verified}'
+
+
+class AccountDeletionJob(models.Model):
+    """Unlinks a deleted agent's clients and referred agents and removes
+    their bonuses and sessions, a chunk at a time (see agents.deletion)."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='deletion_jobs')
+    # Empty when the agent deleted their own account, else the admin user
+    requested_by = models.CharField(max_length=150, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    step = models.CharField(max_length=30, blank=True, default='')
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    done_rows = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'account_deletion_jobs'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['agent'], condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                                    name='one_open_deletion_per_agent'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'Deletion of {self.agent_id} - {self.status}'
+
+    @property
+    def progress(self):
+        if self.status == 'DONE':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, 100 * self.done_rows // self.total_rows)
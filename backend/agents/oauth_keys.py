@@ -0,0 +1,139 @@
+"""Signing keys of OAuth providers, cached per process for local ID token checks.
+
+google-auth's verify_oauth2_token() downloads Google's certificates on every
+call. A KeySet keeps them for as long as the provider's Cache-Control allows,
+refreshes them in a background thread shortly before they expire, and
+refetches right away when a token names a key it doesn't know (rotation),
+at most once per MIN_REFETCH_SECONDS. Verification itself never leaves the
+process.
+
+Both certificate formats in use are supported: Google's kid -> PEM map and
+JWKS documents with x5c certificates (Microsoft identity platform). The
+fetcher and clock are injectable, so a KeySet can be exercised offline with
+locally generated keys."""
+import logging
+import re
+import textwrap
+import threading
+import time
+
+import requests
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+# Used when the response has no usable max-age
+DEFAULT_MAX_AGE = 60 * 60
+# Refresh in the background once the keys are this close to expiring
+REFRESH_AHEAD_SECONDS = 5 * 60
+# Floor between fetches triggered by an unknown key id
+MIN_REFETCH_SECONDS = 30
+
+
+def max_age(headers):
+    """Seconds the response may be cached for, from Cache-Control max-age less Age."""
+    match = re.search(r'max-age=(\d+)', headers.get('Cache-Control', ''))
+    if not match:
+        return DEFAULT_MAX_AGE
+    try:
+        age = int(headers.get('Age', 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+def fetch_keys(url):
+    """Default fetcher: returns (document, seconds it may be cached for)."""
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    return response.json(), max_age(response.headers)
+
+
+def pem_certs(document):
+    """Google's format: the document already maps key id -> PEM certificate."""
+    return dict(document)
+
+
+def jwks_certs(document):
+    """JWKS: key id -> PEM certificate built from each key's x5c chain."""
+    certs = {}
+    for key in document.get('keys', []):
+        if key.get('kid') and key.get('x5c'):
+            body = '\n'.join(textwrap.wrap(key['x5c'][0], 64))
+            certs[key['kid']] = f'-----BEGIN CERTIFICATE-----\n{body}\n-----END CERTIFICATE-----\n'
+    return certs
+
+
+class KeySet:
+
+    def __init__(self, url, parse, fetch=fetch_keys, clock=time.monotonic):
+        self.url = url
+        self.parse = parse
+        self.fetch = fetch
+        self.clock = clock
+        self._certs = {}
+        self._expires_at = 0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+
+    def _refresh(self):
+        document, seconds = self.fetch(self.url)
+        certs = self.parse(document)
+        with self._lock:
+            self._certs = certs
+            self._fetched_at = self.clock()
+            self._expires_at = self._fetched_at + seconds
+        logger.info('OAuth keys refreshed: %s (%s keys, cached %ss)', self.url, len(certs), seconds)
+
+    def _refresh_in_background(self):
+        try:
+            with self._fetch_lock:
+                self._refresh()
+        except Exception as e:
+            logger.warning('OAuth key refresh failed: %s: %s', self.url, e)
+        finally:
+            self._refreshing = False
+
+    def certs(self, kid=None):
+        """The current key id -> certificate map. Fetches synchronously only
+        when nothing valid is cached, or for an unknown `kid` (rate-limited)."""
+        now = self.clock()
+        with self._lock:
+            certs, expires_at, fetched_at = self._certs, self._expires_at, self._fetched_at
+        unknown_kid = kid is not None and kid not in certs and (
+            fetched_at is None or now - fetched_at >= MIN_REFETCH_SECONDS
+        )
+        if now >= expires_at or unknown_kid:
+            with self._fetch_lock:
+                # Another thread may have refreshed while this one waited
+                if self._fetched_at == fetched_at:
+                    self._refresh()
+            return self._certs
+        if now >= expires_at - REFRESH_AHEAD_SECONDS:
+            with self._lock:
+                start, self._refreshing = not self._refreshing, True
+            if start:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return certs
+
+    def verify(self, token, audience):
+        """Decoded claims of a token signed by one of these keys. Raises
+        ValueError for a bad signature, audience or expiry."""
+        kid = jwt.decode_header(token).get('kid')
+        return jwt.decode(token, certs=self.certs(kid), audience=audience)
+
+
+google_keys = KeySet(GOOGLE_CERTS_URL, pem_certs)
+
+
+def verify_google_id_token(credential, client_id, keys=google_keys):
+    """Local equivalent of google.oauth2.id_token.verify_oauth2_token()."""
+    claims = keys.verify(credential, client_id)
+    if claims.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f'Wrong issuer: {claims.get("iss")}')
+    return claims
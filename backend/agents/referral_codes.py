@@ -0,0 +1,151 @@
+"""Referral code resolution for the public landing page.
+
+Lookups go through a per-process Bloom filter of every agent code, so
+garbage codes (typos, bots) are rejected without a database round trip.
+Codes that pass the filter are resolved from a local positive/negative
+cache and only fall through to Postgres on a miss."""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AGENT_NAME = 'A Rivo Partner'
+POSITIVE_TTL = 300
+NEGATIVE_TTL = 60
+# How often a filter miss may trigger a top-up query for newly created codes
+SYNC_INTERVAL = 5
+# Full rebuild drops codes of hard-deleted agents and resizes the filter
+REBUILD_INTERVAL = 3600
+# Top-ups look back this far past the watermark to tolerate clock skew and
+# transactions that committed after a later created_at became visible
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def _cache():
+    return caches['local']
+
+
+def _cache_key(code):
+    return f'referral:{code}'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings. No false negatives; the false
+    positive rate stays near `error_rate` up to `capacity` items."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1000)
+        self.num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class AgentCodeIndex:
+    """Process-wide Bloom filter of agent codes, rebuilt hourly and topped up
+    incrementally from `agents.created_at` when a lookup misses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._watermark = None
+        self._built_at = 0
+        self._synced_at = 0
+
+    def _rebuild(self):
+        from agents.models import Agent
+        from django.db.models import Max
+        from django.utils import timezone
+
+        now = timezone.now()
+        count = Agent.objects.count()
+        bloom = BloomFilter(capacity=count * 2)
+        for code in Agent.objects.values_list('agent_code', flat=True).iterator(chunk_size=5000):
+            bloom.add(code)
+        self._filter = bloom
+        self._watermark = Agent.objects.aggregate(latest=Max('created_at'))['latest'] or now
+        self._built_at = self._synced_at = time.monotonic()
+        logger.info('Agent code filter built: %s codes, %s bits', count, bloom.num_bits)
+
+    def _top_up(self):
+        from agents.models import Agent
+
+        new_codes = Agent.objects.filter(
+            created_at__gte=self._watermark - SYNC_OVERLAP,
+        ).values_list('agent_code', 'created_at')
+        for code, created_at in new_codes:
+            self._filter.add(code)
+            self._watermark = max(self._watermark, created_at)
+        self._synced_at = time.monotonic()
+
+    def might_exist(self, code):
+        bloom = self._filter
+        if bloom is None or time.monotonic() - self._built_at > REBUILD_INTERVAL:
+            with self._lock:
+                if self._filter is bloom:
+                    self._rebuild()
+            bloom = self._filter
+        if code in bloom:
+            return True
+        # The code may have been created by another worker since the last sync
+        if time.monotonic() - self._synced_at < SYNC_INTERVAL:
+            return False
+        with self._lock:
+            if time.monotonic() - self._synced_at >= SYNC_INTERVAL:
+                self._top_up()
+        return code in self._filter
+
+    def add(self, code):
+        if self._filter is not None:
+            self._filter.add(code)
+
+
+code_index = AgentCodeIndex()
+
+
+def resolve_agent_name(code):
+    """Return the display name for a referral code, or None if invalid."""
+    if not code_index.might_exist(code):
+        return None
+
+    cached = _cache().get(_cache_key(code))
+    if cached is not None:
+        return cached or None
+
+    from agents.models import Agent
+    name = Agent.objects.filter(agent_code=code).values_list('name', flat=True).first()
+    if name is None:
+        _cache().set(_cache_key(code), '', NEGATIVE_TTL)
+        return None
+    name = name or DEFAULT_AGENT_NAME
+    _cache().set(_cache_key(code), name, POSITIVE_TTL)
+    return name
+
+
+def remember_agent_code(code, name):
+    """Record a created or renamed agent so the landing page resolves it at once."""
+    code_index.add(code)
+    _cache().set(_cache_key(code), name or DEFAULT_AGENT_NAME, POSITIVE_TTL)
+
+
+def forget_agent_code(code):
+    """Record a deleted agent code as invalid."""
+    _cache().set(_cache_key(code), '', NEGATIVE_TTL)
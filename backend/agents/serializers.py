@@ -1,12 +1,10 @@
 from rest_framework import serializers
 from agents.models import Agent
+from rivo_partner.serializers import RowSerializer
 
 
-class AgentSerializer(serializers.ModelSerializer):
-    total_earned = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
-    pending_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
-    disbursed_count = serializers.IntegerField(read_only=True)
-    this_month_earned = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+class AgentProfileSerializer(serializers.ModelSerializer):
+    """AgentSerializer without the earnings, which cost queries."""
 
     class Meta:
         model = Agent
@@ -14,10 +12,29 @@ class AgentSerializer(serializers.ModelSerializer):
             'id', 'name', 'phone', 'email', 'agent_type', 'agent_type_other',
             'rera_number', 'agent_code', 'is_whatsapp_business',
             'is_profile_complete', 'has_completed_first_action',
-            'total_earned', 'pending_amount', 'disbursed_count', 'this_month_earned',
             'created_at', 'updated_at',
         ]
-        read_only_fields = ['id', 'agent_code', 'is_profile_complete', 'created_at', 'updated_at']
+
+
+class AgentSerializer(AgentProfileSerializer):
+    """The profile plus EarningsSerializer data, read from the agent's cached
+    home snapshot: total_earned/pending_amount keep their meaning (from the
+    clients and bonus tables), paid_amount/payout_pending_amount come from
+    the payout batches, and none of them is aggregated per request."""
+
+    def to_representation(self, instance):
+        from agents.services import get_home_snapshot
+        return {**super().to_representation(instance), **get_home_snapshot(instance)['earnings']}
+
+
+class EarningsSerializer(serializers.Serializer):
+    """The earnings part of AgentSerializer."""
+    total_earned = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    pending_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    paid_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payout_pending_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    disbursed_count = serializers.IntegerField(read_only=True)
+    this_month_earned = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
 
 class AgentProfileUpdateSerializer(serializers.ModelSerializer):
@@ -38,3 +55,6 @@ class NetworkAgentSerializer(serializers.ModelSerializer):
     def get_bonus_earned(self, obj):
         bonus_map = self.context.get('bonus_by_agent', {})
         return bonus_map.get(obj.id, 0)
+
+
+network_agent_rows = RowSerializer(NetworkAgentSerializer)
@@ -2,43 +2,34 @@ import logging
 import requests
 import uuid
 from django.conf import settings
+from django.utils import timezone
 from config.models import AppConfig
+from rivo_partner.cache import get_agent_snapshot, invalidate_agent_snapshot
+from rivo_partner.metrics import outbound_call
 
 logger = logging.getLogger(__name__)
 
+NETWORK_SNAPSHOT = 'network'
+HOME_SNAPSHOT = 'home'
 
-def _send_whatsapp(phone, message):
-    """Send a WhatsApp message via YCloud (plain text — works within 24h window)."""
-    url = 'https://api.ycloud.com/v2/whatsapp/messages'
-    headers = {
+
+def _ycloud_headers():
+    return {
         'Content-Type': 'application/json',
         'X-API-Key': settings.YCLOUD_API_KEY,
     }
-    payload = {
+
+
+def _text_payload(phone, message):
+    return {
         'from': settings.YCLOUD_WHATSAPP_NUMBER,
         'to': phone,
         'type': 'text',
         'text': {'body': message},
     }
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.warning(f'WhatsApp send failed to {phone}: [{response.status_code}] {response.text}')
-        else:
-            logger.info(f'WhatsApp sent to {phone}: {message[:50]}...')
-        return response.status_code == 200
-    except requests.RequestException as e:
-        logger.error(f'WhatsApp request failed to {phone}: {e}')
-        return False
 
 
-def _send_whatsapp_template(phone, template_name, parameters=None):
-    """Send a WhatsApp template message via YCloud (works outside 24h window)."""
-    url = 'https://api.ycloud.com/v2/whatsapp/messages'
-    headers = {
-        'Content-Type': 'application/json',
-        'X-API-Key': settings.YCLOUD_API_KEY,
-    }
+def _template_payload(phone, template_name, parameters=None):
     template = {
         'name': template_name,
         'language': {'code': 'en'},
@@ -48,54 +39,155 @@ def _send_whatsapp_template(phone, template_name, parameters=None):
             'type': 'body',
             'parameters': [{'type': 'text', 'text': str(p)} for p in parameters],
         }]
-    payload = {
+    return {
         'from': settings.YCLOUD_WHATSAPP_NUMBER,
         'to': phone,
         'type': 'template',
         'template': template,
     }
+
+
+def _log_text_result(phone, message, status_code, body):
+    if status_code != 200:
+        logger.warning('WhatsApp send failed to %s: [%s] %.300s', phone, status_code, body)
+    else:
+        logger.info('WhatsApp sent to %s: %.50s...', phone, message)
+    return status_code == 200
+
+
+def _log_template_result(phone, template_name, status_code, body):
+    if status_code != 200:
+        logger.warning('WhatsApp template send failed to %s: template=%s [%s] %.300s', phone, template_name, status_code, body)
+    else:
+        logger.info('WhatsApp template sent to %s: template=%s', phone, template_name)
+    return status_code == 200
+
+
+def _send_whatsapp(phone, message):
+    """Send a WhatsApp message via YCloud (plain text — works within 24h window)."""
+    try:
+        with outbound_call('ycloud') as call:
+            response = requests.post(settings.YCLOUD_MESSAGES_URL, json=_text_payload(phone, message),
+                                     headers=_ycloud_headers(), timeout=10)
+            call['ok'] = response.status_code == 200
+        return _log_text_result(phone, message, response.status_code, response.text)
+    except requests.RequestException as e:
+        logger.error('WhatsApp request failed to %s: %s', phone, e)
+        return False
+
+
+def _send_whatsapp_template(phone, template_name, parameters=None):
+    """Send a WhatsApp template message via YCloud (works outside 24h window)."""
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.warning(f'WhatsApp template send failed to {phone}: template={template_name} [{response.status_code}] {response.text}')
-        else:
-            logger.info(f'WhatsApp template sent to {phone}: template={template_name}')
-        return response.status_code == 200
+        with outbound_call('ycloud') as call:
+            response = requests.post(settings.YCLOUD_MESSAGES_URL, json=_template_payload(phone, template_name, parameters),
+                                     headers=_ycloud_headers(), timeout=10)
+            call['ok'] = response.status_code == 200
+        return _log_template_result(phone, template_name, response.status_code, response.text)
     except requests.RequestException as e:
-        logger.error(f'WhatsApp template request failed to {phone}: {e}')
+        logger.error('WhatsApp template request failed to %s: %s', phone, e)
         return False
 
 
+async def _asend_whatsapp(phone, message):
+    """Async variant of _send_whatsapp for ASGI views."""
+    import httpx
+    from agents.async_api import http_client
+    try:
+        with outbound_call('ycloud') as call:
+            response = await http_client().post(settings.YCLOUD_MESSAGES_URL, json=_text_payload(phone, message),
+                                                headers=_ycloud_headers(), timeout=10)
+            call['ok'] = response.status_code == 200
+        return _log_text_result(phone, message, response.status_code, response.text)
+    except httpx.HTTPError as e:
+        logger.error('WhatsApp request failed to %s: %s', phone, e)
+        return False
+
+
+async def _asend_whatsapp_template(phone, template_name, parameters=None):
+    """Async variant of _send_whatsapp_template for ASGI views."""
+    import httpx
+    from agents.async_api import http_client
+    try:
+        with outbound_call('ycloud') as call:
+            response = await http_client().post(settings.YCLOUD_MESSAGES_URL, json=_template_payload(phone, template_name, parameters),
+                                                headers=_ycloud_headers(), timeout=10)
+            call['ok'] = response.status_code == 200
+        return _log_template_result(phone, template_name, response.status_code, response.text)
+    except httpx.HTTPError as e:
+        logger.error('WhatsApp template request failed to %s: %s', phone, e)
+        return False
+
+
+def send_outbox(outbox):
+    """Send WhatsApp messages queued by code that must not block on YCloud
+    itself (e.g. inside a transaction). Items are ('text', phone, message)
+    or ('template', phone, template_name, parameters)."""
+    for kind, *args in outbox:
+        try:
+            if kind == 'text':
+                _send_whatsapp(*args)
+            else:
+                _send_whatsapp_template(*args)
+        except Exception as e:
+            logger.warning('Failed to send queued WhatsApp %s to %s: %s', kind, args[0], e)
+
+
+async def asend_outbox(outbox):
+    """Async variant of send_outbox — all messages go out concurrently."""
+    import asyncio
+    sends = [
+        _asend_whatsapp(*args) if kind == 'text' else _asend_whatsapp_template(*args)
+        for kind, *args in outbox
+    ]
+    for (kind, phone, *_), result in zip(outbox, await asyncio.gather(*sends, return_exceptions=True)):
+        if isinstance(result, Exception):
+            logger.warning('Failed to send queued WhatsApp %s to %s: %s', kind, phone, result)
+
+
+def verification_reply_message(code, is_returning_user=False):
+    """Text of the WhatsApp reply after verification, with a link back to the app.
+    Uses welcome_back_msg for returning users, welcome_msg for new users."""
+    url = f'https://partners.rivo.ae/whatsapp-verify?code={code}'
+    config_key = 'welcome_back_msg' if is_returning_user else 'welcome_msg'
+    # Fall back to welcome_msg if welcome_back_msg doesn't exist yet
+    template = AppConfig.get_value(config_key, AppConfig.get_value('welcome_msg'))
+    if template is None:
+        logger.warning('welcome_msg not found in AppConfig, skipping verification reply')
+        return None
+    return template.replace('{url}', url)
+
+
 def send_verification_reply(phone, code, is_returning_user=False):
     """Send WhatsApp reply after verification with link back to the app.
-    Uses welcome_back_msg for returning users, welcome_msg for new users.
     Uses plain text (within 24h customer service window)."""
-    url = f'https://partners.rivo.ae/whatsapp-verify?code={code}'
-    config_key = 'welcome_back_msg' if is_returning_user else 'welcome_msg'
-    try:
-        template = AppConfig.objects.get(key=config_key).value
-    except AppConfig.DoesNotExist:
-        # Fall back to welcome_msg if welcome_back_msg doesn't exist yet
-        try:
-            template = AppConfig.objects.get(key='welcome_msg').value
-        except AppConfig.DoesNotExist:
-            logger.warning('welcome_msg not found in AppConfig, skipping verification reply')
-            return False
-    message = template.replace('{url}', url)
+    message = verification_reply_message(code, is_returning_user)
+    if message is None:
+        return False
     return _send_whatsapp(phone, message)
 
 
-def send_referral_signup_notification(referrer, new_agent):
-    """Notify referrer when their referred agent signs up.
-    Template: referral_signup_msg — {{1}} = agent_name"""
+def referral_signup_template(referrer, new_agent):
+    """Template: referral_signup_msg — {{1}} = agent_name"""
     agent_name = new_agent.name or new_agent.phone
-    return _send_whatsapp_template(referrer.phone, 'referral_signup_msg', [agent_name])
+    return ('template', referrer.phone, 'referral_signup_msg', [agent_name])
+
+
+def send_referral_signup_notification(referrer, new_agent):
+    """Notify referrer when their referred agent signs up."""
+    _, phone, template_name, parameters = referral_signup_template(referrer, new_agent)
+    return _send_whatsapp_template(phone, template_name, parameters)
+
+
+def client_whatsapp_template(client_phone, agent_name, client_name):
+    """Template: client_whatsapp_msg — {{1}} = agent_name"""
+    return ('template', client_phone, 'client_whatsapp_msg', [agent_name])
 
 
 def send_client_whatsapp_notification(client_phone, agent_name, client_name):
-    """Send WhatsApp notification to referred client via YCloud template.
-    Template: client_whatsapp_msg — {{1}} = agent_name"""
-    return _send_whatsapp_template(client_phone, 'client_whatsapp_msg', [agent_name])
+    """Send WhatsApp notification to referred client via YCloud template."""
+    _, phone, template_name, parameters = client_whatsapp_template(client_phone, agent_name, client_name)
+    return _send_whatsapp_template(phone, template_name, parameters)
 
 
 def send_referral_bonus_notification(referrer, agent, bonus_amount, deal_number):
@@ -133,3 +225,64 @@ def send_inactive_nudge(agent):
 def generate_device_token():
     """Generate a unique device token for session persistence."""
     return str(uuid.uuid4())
+
+
+def get_network_snapshot(agent):
+    """Cached referral network for an agent: referred agents with their
+    disbursed deal counts, plus referral bonus items and totals.
+    Changes only when a referred agent signs up, deletes their account or
+    gets a disbursal — those paths call invalidate_network_snapshot."""
+    return get_agent_snapshot(NETWORK_SNAPSHOT, agent.pk, lambda: _build_network_snapshot(agent))
+
+
+def invalidate_network_snapshot(agent_id):
+    invalidate_agent_snapshot(NETWORK_SNAPSHOT, agent_id)
+
+
+def home_namespace():
+    # this_month_earned rolls over with the month
+    return f'{HOME_SNAPSHOT}:{timezone.now():%Y%m}'
+
+
+def get_home_snapshot(agent):
+    """Cached home screen data for an agent: EarningsSerializer data and the
+    client summary. Invalidated when their clients, referral bonuses or
+    payout batches change."""
+    return get_agent_snapshot(home_namespace(), agent.pk, lambda: _build_home_snapshot(agent))
+
+
+def invalidate_home_snapshot(agent_id):
+    invalidate_agent_snapshot(home_namespace(), agent_id)
+
+
+def _build_home_snapshot(agent):
+    from agents.serializers import EarningsSerializer
+    from clients.services import client_summary
+    return {'earnings': dict(EarningsSerializer(agent).data), 'clients': client_summary(agent)}
+
+
+def _build_network_snapshot(agent):
+    from django.db.models import Count, Q
+    from agents.serializers import network_agent_rows
+    from referrals.models import ReferralBonus
+    from referrals.serializers import referral_bonus_rows
+
+    referred_agents = agent.referred_agents.annotate(
+        deals_count=Count('clients', filter=Q(clients__status='DISBURSED'))
+    )
+    bonuses = list(ReferralBonus.objects.filter(referrer=agent).values(
+        *referral_bonus_rows.columns, 'triggered_by_agent_id',
+    ))
+
+    bonus_by_agent = {}
+    for b in bonuses:
+        bonus_by_agent[b['triggered_by_agent_id']] = bonus_by_agent.get(b['triggered_by_agent_id'], 0) + b['amount']
+
+    return {
+        'referred_agents': network_agent_rows.many(
+            referred_agents, bonus_earned=lambda row: bonus_by_agent.get(row['id'], 0),
+        ),
+        'total_earned': sum(b['amount'] for b in bonuses),
+        'bonuses_count': len(bonuses),
+        'bonuses': referral_bonus_rows.many(bonuses),
+    }
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.models import Agent
+from agents.referral_codes import forget_agent_code, remember_agent_code
+
+
+@receiver(post_save, sender=Agent)
+def agent_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Token-only and flag-only saves don't affect the landing page
+    if created or update_fields is None or 'name' in update_fields or 'agent_code' in update_fields:
+        code, name = instance.agent_code, instance.name
+        transaction.on_commit(lambda: remember_agent_code(code, name))
+
+
+@receiver(post_delete, sender=Agent)
+def agent_deleted(sender, instance, **kwargs):
+    code = instance.agent_code
+    transaction.on_commit(lambda: forget_agent_code(code))
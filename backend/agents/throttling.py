@@ -0,0 +1,171 @@
+"""Token-bucket throttles for the public (AllowAny) endpoints.
+
+Buckets always live in process memory, so a client over its limit is
+rejected without any I/O. With THROTTLE_CACHE set to a cache alias, a
+request the local bucket allows is also charged to a bucket in that
+cache, which makes the limit hold across workers and instances. Unset,
+each worker enforces the rate on its own.
+
+When the DB slows down (query-time average over SHED_DB_LATENCY_MS) the
+throttles shed load: a request then needs a fuller bucket to get through,
+so clients that have been hammering an endpoint get 429 + Retry-After
+first while a fresh client, e.g. a real signup, still passes."""
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+from rivo_partner.metrics import db_latency
+
+logger = logging.getLogger(__name__)
+
+# Even at full pressure a full bucket lets a request through
+MAX_SHED_PRESSURE = 0.9
+
+
+def shed_pressure():
+    """0 while the DB is healthy, rising to MAX_SHED_PRESSURE as the
+    average query time reaches twice SHED_DB_LATENCY_MS."""
+    threshold = getattr(settings, 'SHED_DB_LATENCY_MS', 0) / 1000
+    if not threshold:
+        return 0.0
+    return min(max((db_latency.value - threshold) / threshold, 0.0), MAX_SHED_PRESSURE)
+
+
+class LocalBuckets:
+    """Buckets in this process's memory, least recently used evicted first."""
+    max_buckets = 50000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_per_second, now, need):
+        """Spend one token if the bucket holds at least `need`.
+        Returns (allowed, tokens left)."""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= need
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class CacheBuckets:
+    """Buckets in a shared Django cache. The read-modify-write isn't atomic,
+    so workers racing on one key can each spend the same token — the limit
+    is approximate, off by at most the number of concurrent requests."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, refill_per_second, now, need):
+        cache = caches[self.alias]
+        cache_key = f'tb:{key}'
+        tokens, updated = cache.get(cache_key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        allowed = tokens >= need
+        if allowed:
+            tokens -= 1
+        # Gone once it would have refilled anyway
+        cache.set(cache_key, (tokens, now), int((capacity - tokens) / refill_per_second) + 1)
+        return allowed, tokens
+
+
+_local_buckets = LocalBuckets()
+
+
+def _shared_buckets():
+    alias = getattr(settings, 'THROTTLE_CACHE', '')
+    return CacheBuckets(alias) if alias else None
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """The scope's rate (e.g. '60/min') is both the burst size and the refill
+    rate, so a client can burst up to `num_requests` and then sustain
+    `num_requests / duration` per second."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        capacity = self.num_requests
+        refill_per_second = capacity / self.duration
+        need = 1 + shed_pressure() * (capacity - 1)
+
+        allowed, tokens = _local_buckets.take(self.key, capacity, refill_per_second, now, need)
+        shared = _shared_buckets()
+        if allowed and shared is not None:
+            try:
+                allowed, tokens = shared.take(self.key, capacity, refill_per_second, now, need)
+            except Exception:
+                # Fail open — the local bucket still applies
+                logger.exception('Shared throttle cache %r unavailable', shared.alias)
+
+        self._wait = 0 if allowed else (need - tokens) / refill_per_second
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client IP, for public endpoints."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class CodeTokenBucketThrottle(TokenBucketThrottle):
+    """Per `code` URL argument, however many IPs it is requested from."""
+
+    def get_cache_key(self, request, view):
+        code = view.kwargs.get('code')
+        if not code:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': code[:64]}
+
+
+class GlobalTokenBucketThrottle(TokenBucketThrottle):
+    """One bucket for every client, capping the endpoint as a whole however
+    many IPs the requests come from."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+
+class WhatsAppInitThrottle(IPTokenBucketThrottle):
+    scope = 'whatsapp_init'
+
+
+class WhatsAppInitGlobalThrottle(GlobalTokenBucketThrottle):
+    """Caps the unverified sessions init_whatsapp creates."""
+    scope = 'whatsapp_init_global'
+
+
+class VerificationCheckThrottle(IPTokenBucketThrottle):
+    scope = 'verification_check'
+
+
+class VerificationCodeThrottle(CodeTokenBucketThrottle):
+    scope = 'verification_code'
+
+
+class ReferralResolveThrottle(IPTokenBucketThrottle):
+    scope = 'referral_resolve'
+
+
+class ReferralCodeThrottle(CodeTokenBucketThrottle):
+    scope = 'referral_code'
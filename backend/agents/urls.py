@@ -1,5 +1,9 @@
 from django.urls import path
-from agents import views
+from django.conf import settings
+from agents import async_views, views
+
+# ASGI mode serves the I/O-bound endpoints from async views
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('init-whatsapp/', views.init_whatsapp, name='init-whatsapp'),
@@ -10,6 +14,6 @@ urlpatterns = [
     path('referral/<str:code>/', views.resolve_referral_code, name='agent-resolve-referral'),
     path('logout/', views.logout, name='agent-logout'),
     path('delete/', views.delete_account, name='agent-delete'),
-    path('connect-google/', views.connect_google, name='agent-connect-google'),
-    path('connect-outlook/', views.connect_outlook, name='agent-connect-outlook'),
+    path('connect-google/', io_views.connect_google, name='agent-connect-google'),
+    path('connect-outlook/', io_views.connect_outlook, name='agent-connect-outlook'),
 ]
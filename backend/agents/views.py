@@ -4,22 +4,23 @@ import random
 from urllib.parse import quote
 import requests as http_requests
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-
-from agents.models import Agent, WhatsAppSession
-from agents.serializers import (
-    AgentSerializer,
-    AgentProfileUpdateSerializer,
-    NetworkAgentSerializer,
+
+from agents.deletion import request_account_deletion
+from agents.models import WhatsAppSession
+from agents.oauth_keys import verify_google_id_token
+from agents.referral_codes import resolve_agent_name
+from agents.serializers import AgentSerializer, AgentProfileUpdateSerializer
+from agents.services import get_network_snapshot, invalidate_network_snapshot
+from agents.throttling import (
+    ReferralCodeThrottle, ReferralResolveThrottle, VerificationCheckThrottle, VerificationCodeThrottle,
+    WhatsAppInitGlobalThrottle, WhatsAppInitThrottle,
 )
-from agents.services import generate_device_token
 from config.models import AppConfig
-from referrals.models import ReferralBonus
-from referrals.serializers import ReferralBonusSerializer
+from rivo_partner.compression import gzip_large
+from rivo_partner.db_router import replica_reads
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ def _generate_code():
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([WhatsAppInitThrottle, WhatsAppInitGlobalThrottle])
 def init_whatsapp(request):
     """Step 1: Frontend calls this before opening WhatsApp.
     Returns a verification code and WhatsApp deep link URL.
@@ -63,7 +65,7 @@ def init_whatsapp(request):
 
     whatsapp_url = f'{base_url}?text={quote(message)}'
 
-    logger.info(f'WhatsApp session created: code={code}, referral={referral_code or "none"}')
+    logger.info('WhatsApp session created: code=%s, referral=%s', code, referral_code or 'none')
 
     return Response({
         'code': code,
@@ -73,6 +75,7 @@ def init_whatsapp(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([VerificationCheckThrottle, VerificationCodeThrottle])
 def check_verification(request, code):
     """Step 2: Frontend polls this after user sends WhatsApp message.
     Returns verified=false until YCloud webhook processes the message.
@@ -108,56 +111,44 @@ def update_profile(request):
     serializer = AgentProfileUpdateSerializer(agent, data=request.data, partial=True)
     serializer.is_valid(raise_exception=True)
     serializer.save()
-    logger.info(f'Profile updated: agent={agent.phone}, fields={list(request.data.keys())}')
+    invalidate_network_snapshot(agent.referred_by_id)
+    logger.info('Profile updated: agent=%s, fields=%s', agent.phone, ','.join(request.data))
     return Response(AgentSerializer(agent).data)
 
 
+@gzip_large
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def network(request):
     """Get agent's referral network — referred agents and bonus status."""
-    from django.db.models import Count, Q, Sum
-
     agent = request.user
-    referred_agents = agent.referred_agents.annotate(
-        deals_count=Count('clients', filter=Q(clients__status='DISBURSED'))
-    )
-
-    bonuses = ReferralBonus.objects.filter(referrer=agent).select_related('triggered_by_agent')
-    total_bonuses_earned = bonuses.aggregate(total=Sum('amount'))['total'] or 0
-    bonuses_count = bonuses.count()
+    snapshot = get_network_snapshot(agent)
     bonus_config = AppConfig.get_value('referrer_bonuses', [500, 500, 1000])
     max_bonuses = len(bonus_config)
 
-    # Pre-compute bonus per agent to avoid N+1
-    bonus_by_agent = {}
-    for b in bonuses:
-        bonus_by_agent[b.triggered_by_agent_id] = bonus_by_agent.get(b.triggered_by_agent_id, 0) + b.amount
-
     return Response({
         'agent_code': agent.agent_code,
-        'referred_agents': NetworkAgentSerializer(
-            referred_agents, many=True, context={'bonus_by_agent': bonus_by_agent}
-        ).data,
+        'referred_agents': snapshot['referred_agents'],
         'bonus_summary': {
-            'total_earned': total_bonuses_earned,
-            'bonuses_count': bonuses_count,
+            'total_earned': snapshot['total_earned'],
+            'bonuses_count': snapshot['bonuses_count'],
             'max_bonuses': max_bonuses,
-            'completed': bonuses_count >= max_bonuses,
-            'bonuses': ReferralBonusSerializer(bonuses, many=True).data,
+            'completed': snapshot['bonuses_count'] >= max_bonuses,
+            'bonuses': snapshot['bonuses'],
         },
     })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([ReferralResolveThrottle, ReferralCodeThrottle])
+@replica_reads
 def resolve_referral_code(request, code):
     """Resolve a referral code to an agent name. Used on landing page."""
-    try:
-        agent = Agent.objects.get(agent_code=code)
-        return Response({'agent_name': agent.name or 'A Rivo Partner'})
-    except Agent.DoesNotExist:
+    agent_name = resolve_agent_name(code)
+    if agent_name is None:
         return Response({'error': 'Invalid referral code.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'agent_name': agent_name})
 
 
 @api_view(['POST'])
@@ -168,31 +159,43 @@ def logout(request):
     WhatsAppSession.objects.filter(agent=agent).delete()
     agent.device_token = ''
     agent.save(update_fields=['device_token'])
-    logger.info(f'Agent logged out: {agent.phone}')
+    logger.info('Agent logged out: %s', agent.phone)
     return Response({'message': 'Logged out successfully.'})
 
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_account(request):
-    """Soft-delete agent account."""
-    agent = request.user
-    # Unlink relationships for fresh start on re-signup (data stays in system)
-    agent.clients.update(source_agent=None)
-    agent.referred_agents.update(referred_by=None)
-    from referrals.models import ReferralBonus, NewAgentBonus
-    NewAgentBonus.objects.filter(agent=agent).delete()
-    ReferralBonus.objects.filter(referrer=agent).delete()
-
-    agent.is_active = False
-    agent.device_token = ''
-    agent.referred_by = None
-    agent.save(update_fields=['is_active', 'device_token', 'referred_by'])
-    WhatsAppSession.objects.filter(agent=agent).delete()
-    logger.info(f'Account deleted: {agent.phone}')
+    """Soft-delete agent account. The agent is deactivated now; their clients,
+    referred agents and bonuses are unlinked by a background job so they
+    start fresh on re-signup (the data stays in the system)."""
+    request_account_deletion(request.user)
     return Response({'message': 'Account deleted.'})
 
 
+MICROSOFT_TOKEN_URL = 'https://login.microsoftonline.com/common/oauth2/v2.0/token'
+MICROSOFT_PROFILE_URL = 'https://graph.microsoft.com/v1.0/me'
+
+
+def microsoft_token_request(code, redirect_uri, client_id, client_secret):
+    return {
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'code': code,
+        'redirect_uri': redirect_uri,
+        'grant_type': 'authorization_code',
+        'scope': 'openid email profile',
+    }
+
+
+def save_connected_email(agent, email, provider):
+    """Save an email verified by an OAuth provider and return the agent payload."""
+    agent.email = email
+    agent.save(update_fields=['email'])
+    logger.info('%s connected: agent=%s', provider, agent.phone)
+    return AgentSerializer(agent).data
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def connect_google(request):
@@ -207,18 +210,14 @@ def connect_google(request):
         return Response({'error': 'Google OAuth not configured.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     try:
-        idinfo = id_token.verify_oauth2_token(credential, google_requests.Request(), google_client_id)
+        idinfo = verify_google_id_token(credential, google_client_id)
         email = idinfo.get('email', '')
         if not email:
             return Response({'error': 'No email in Google token.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        agent = request.user
-        agent.email = email
-        agent.save(update_fields=['email'])
-        logger.info(f'Google connected: agent={agent.phone}, email={email}')
-        return Response(AgentSerializer(agent).data)
+        return Response(save_connected_email(request.user, email, 'Google'))
     except ValueError as e:
-        logger.warning(f'Invalid Google token for agent {request.user.phone}: {e}')
+        logger.warning('Invalid Google token for agent %s: %s', request.user.phone, e)
         return Response({'error': 'Invalid Google token.'}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -240,38 +239,27 @@ def connect_outlook(request):
     try:
         # Exchange auth code for token
         token_response = http_requests.post(
-            'https://login.microsoftonline.com/common/oauth2/v2.0/token',
-            data={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'code': code,
-                'redirect_uri': redirect_uri,
-                'grant_type': 'authorization_code',
-                'scope': 'openid email profile',
-            },
+            MICROSOFT_TOKEN_URL,
+            data=microsoft_token_request(code, redirect_uri, client_id, client_secret),
         )
         token_data = token_response.json()
         access_token = token_data.get('access_token')
         if not access_token:
-            logger.warning(f'Microsoft token exchange failed: {token_data}')
+            logger.warning('Microsoft token exchange failed: %s', token_data.get('error'))
             return Response({'error': 'Failed to get Microsoft token.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Get user profile
         profile_response = http_requests.get(
-            'https://graph.microsoft.com/v1.0/me',
+            MICROSOFT_PROFILE_URL,
             headers={'Authorization': f'Bearer {access_token}'},
         )
         profile = profile_response.json()
         email = profile.get('mail') or profile.get('userPrincipalName', '')
         if not email:
-            logger.warning(f'No email in Microsoft profile: {profile}')
+            logger.warning('No email in Microsoft profile: id=%s', profile.get('id'))
             return Response({'error': 'No email from Microsoft.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        agent = request.user
-        agent.email = email
-        agent.save(update_fields=['email'])
-        logger.info(f'Outlook connected: agent={agent.phone}, email={email}')
-        return Response(AgentSerializer(agent).data)
+        return Response(save_connected_email(request.user, email, 'Outlook'))
     except Exception as e:
-        logger.error(f'Microsoft auth failed for agent {request.user.phone}: {e}')
+        logger.error('Microsoft auth failed for agent %s: %s', request.user.phone, e)
         return Response({'error': 'Microsoft auth failed.'}, status=status.HTTP_400_BAD_REQUEST)
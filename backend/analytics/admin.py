@@ -0,0 +1,56 @@
+from django.contrib import admin, messages
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.timesince import timesince
+
+from agents.models import Agent
+from analytics.models import CohortDaily, RollupState, StageDaily
+from analytics.services import FUNNEL_ROLLUP, STALE_AFTER, funnel_report
+
+
+@admin.register(StageDaily)
+class FunnelDashboardAdmin(admin.ModelAdmin):
+    """Read-only funnel dashboard. Reads the daily rollups only — refreshed
+    by `manage.py refresh_funnel` — never the clients table, and warns when
+    they have never been refreshed or are stale."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        try:
+            weeks = min(max(int(request.GET.get('weeks', 12)), 1), 104)
+        except ValueError:
+            weeks = 12
+        # '' is a real value (agents without a type); absent or 'all' is no filter
+        agent_type = request.GET.get('agent_type', 'all')
+        channel = request.GET.get('channel', '')
+        refreshed_at = RollupState.objects.filter(name=FUNNEL_ROLLUP).values_list('refreshed_at', flat=True).first()
+        if refreshed_at is None:
+            messages.warning(request, 'The funnel rollups have never been refreshed, so this dashboard is empty. '
+                                      'Run "manage.py refresh_funnel --backfill" once and schedule '
+                                      '"manage.py refresh_funnel" (see SCHEDULED_JOBS.md).')
+        elif timezone.now() - refreshed_at > STALE_AFTER:
+            messages.warning(request, f'The funnel rollups were last refreshed {timesince(refreshed_at)} ago, so '
+                                      'recent events are missing. Check that the scheduled '
+                                      '"manage.py refresh_funnel" job is running.')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Client funnel',
+            'opts': self.opts,
+            'report': funnel_report(weeks, None if agent_type == 'all' else agent_type, channel),
+            'weeks': weeks,
+            'agent_type': agent_type,
+            'channel': channel,
+            'agent_types': [('', 'Unknown')] + Agent.AGENT_TYPE_CHOICES,
+            'channels': CohortDaily.objects.order_by('channel').values_list('channel', flat=True).distinct(),
+            'refreshed_at': refreshed_at,
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, 'admin/analytics/funnel.html', context)
@@ -0,0 +1,268 @@
+"""Streaming CSV / JSONL exports for finance.
+
+Rows are read in chunks — through a server-side cursor, or by primary-key
+pages when the pooler runs in transaction mode and server-side cursors are
+off — and encoded as they are read, optionally gzipped on the fly, so
+memory stays flat however many rows an export has. Exports read from the
+replica when one is configured and up to date.
+
+Used by the /internal/exports/ view and `manage.py export_data`."""
+import csv
+import datetime
+import io
+import json
+import re
+import zlib
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from rivo_partner.db_router import REPLICA, replica_configured, replica_lag
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+# A leading = + - @ makes spreadsheet apps evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+NUMBER_RE = re.compile(r'[+-]?[\d\s().]+')
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not NUMBER_RE.fullmatch(value):
+        return f"'{value}"
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat()
+    return str(value)  # Decimal, UUID, date
+
+
+class Dataset:
+    """An exportable queryset: `columns` are (header, values() lookup)."""
+
+    def __init__(self, name, model_path, columns, agent_field, permission,
+                 date_fields=('created_at',), status_field=None):
+        self.name = name
+        self.model_path = model_path
+        self.columns = columns
+        self.agent_field = agent_field
+        self.permission = permission
+        self.date_fields = date_fields
+        self.status_field = status_field
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def base_queryset(self):
+        return self.model.objects.all()
+
+    def queryset(self, since=None, until=None, date_field=None, statuses=None, agent_code=None):
+        """since / until are local dates, both inclusive."""
+        queryset = self.base_queryset()
+        date_field = date_field or self.date_fields[0]
+        if date_field not in self.date_fields:
+            raise ExportError(f'{self.name} can be filtered by {", ".join(self.date_fields)}')
+        tz = timezone.get_current_timezone()
+        if since:
+            queryset = queryset.filter(**{
+                f'{date_field}__gte': datetime.datetime.combine(since, datetime.time(), tzinfo=tz)})
+        if until:
+            queryset = queryset.filter(**{
+                f'{date_field}__lt': datetime.datetime.combine(until + datetime.timedelta(days=1),
+                                                              datetime.time(), tzinfo=tz)})
+        if statuses:
+            if not self.status_field:
+                raise ExportError(f'{self.name} has no status filter')
+            queryset = queryset.filter(**{f'{self.status_field}__in': statuses})
+        if agent_code:
+            queryset = queryset.filter(**{self.agent_field: agent_code.upper()})
+        return queryset
+
+    def rows(self, queryset):
+        """Value tuples in primary-key order, CHUNK_SIZE at a time."""
+        db = REPLICA if replica_configured() and replica_lag.healthy() else 'default'
+        queryset = queryset.using(db).order_by('pk').values_list('pk', *(lookup for _, lookup in self.columns))
+        if not connections[db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+            for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+                yield row[1:]
+            return
+        last_pk = None
+        while True:
+            chunk = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:CHUNK_SIZE])
+            if not chunk:
+                return
+            last_pk = chunk[-1][0]
+            for row in chunk:
+                yield row[1:]
+
+
+class EarningsDataset(Dataset):
+    """Per agent with any earnings: disbursed clients and their commission,
+    and bonuses. The date filter applies to bonus creation and to the client's
+    disbursal: its first DISBURSED status event (backfilled from updated_at
+    for clients disbursed before events were recorded). Later saves of a
+    disbursed client don't move it to another period."""
+
+    def queryset(self, since=None, until=None, date_field=None, statuses=None, agent_code=None):
+        from analytics.models import ClientStatusEvent
+        from clients.models import Client
+        from referrals.models import NewAgentBonus, ReferralBonus
+
+        if statuses:
+            raise ExportError(f'{self.name} has no status filter')
+        window = {}
+        tz = timezone.get_current_timezone()
+        if since:
+            window['gte'] = datetime.datetime.combine(since, datetime.time(), tzinfo=tz)
+        if until:
+            window['lt'] = datetime.datetime.combine(until + datetime.timedelta(days=1), datetime.time(), tzinfo=tz)
+
+        def total(model, agent_field, amount_field, date_field, **filters):
+            rows = model.objects.filter(
+                **{agent_field: OuterRef('pk')}, **filters,
+                **{f'{date_field}__{op}': bound for op, bound in window.items()},
+            ).order_by().values(agent_field).annotate(total=Sum(amount_field)).values('total')
+            return Coalesce(Subquery(rows), Value(Decimal(0)), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+        disbursed = Client.objects.filter(status='DISBURSED')
+        if window:
+            disbursed_at = ClientStatusEvent.objects.filter(
+                client=OuterRef('pk'), to_status='DISBURSED',
+            ).order_by('created_at').values('created_at')[:1]
+            disbursed = disbursed.annotate(disbursed_at=Subquery(disbursed_at)).filter(
+                **{f'disbursed_at__{op}': bound for op, bound in window.items()},
+            )
+        per_agent = disbursed.filter(source_agent=OuterRef('pk')).order_by().values('source_agent')
+
+        queryset = self.base_queryset().annotate(
+            disbursed_clients=Coalesce(Subquery(per_agent.annotate(n=Count('pk')).values('n')), Value(0)),
+            commission_total=Coalesce(
+                Subquery(per_agent.annotate(total=Sum('commission_amount')).values('total')),
+                Value(Decimal(0)), output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+            referral_bonus_total=total(ReferralBonus, 'referrer', 'amount', 'created_at'),
+            new_agent_bonus_total=total(NewAgentBonus, 'agent', 'amount', 'created_at'),
+        ).filter(Q(disbursed_clients__gt=0) | Q(referral_bonus_total__gt=0) | Q(new_agent_bonus_total__gt=0))
+        if agent_code:
+            queryset = queryset.filter(agent_code=agent_code.upper())
+        return queryset
+
+
+DATASETS = {
+    dataset.name: dataset for dataset in [
+        Dataset(
+            'clients', 'clients.Client', [
+                ('id', 'id'), ('client_name', 'client_name'), ('client_phone', 'client_phone'),
+                ('status', 'status'), ('channel', 'channel'),
+                ('expected_mortgage_amount', 'expected_mortgage_amount'),
+                ('estimated_commission', 'estimated_commission'), ('commission_amount', 'commission_amount'),
+                ('agent_code', 'source_agent__agent_code'), ('agent_name', 'source_agent__name'),
+                ('crm_lead_id', 'crm_lead_id'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+            ],
+            agent_field='source_agent__agent_code', permission='clients.view_client',
+            date_fields=('created_at', 'updated_at'), status_field='status',
+        ),
+        Dataset(
+            'referral_bonuses', 'referrals.ReferralBonus', [
+                ('id', 'id'), ('referrer_code', 'referrer__agent_code'), ('referrer_name', 'referrer__name'),
+                ('referrer_phone', 'referrer__phone'), ('triggered_by_agent_code', 'triggered_by_agent__agent_code'),
+                ('client_id', 'triggered_by_client_id'), ('deal_number', 'deal_number'), ('amount', 'amount'),
+                ('created_at', 'created_at'),
+            ],
+            agent_field='referrer__agent_code', permission='referrals.view_referralbonus',
+        ),
+        Dataset(
+            'new_agent_bonuses', 'referrals.NewAgentBonus', [
+                ('id', 'id'), ('agent_code', 'agent__agent_code'), ('agent_name', 'agent__name'),
+                ('agent_phone', 'agent__phone'), ('client_id', 'client_id'), ('deal_number', 'deal_number'),
+                ('amount', 'amount'), ('created_at', 'created_at'),
+            ],
+            agent_field='agent__agent_code', permission='referrals.view_newagentbonus',
+        ),
+        EarningsDataset(
+            'agent_earnings', 'agents.Agent', [
+                ('agent_code', 'agent_code'), ('agent_name', 'name'), ('agent_phone', 'phone'),
+                ('agent_type', 'agent_type'), ('disbursed_clients', 'disbursed_clients'),
+                ('commission_total', 'commission_total'), ('referral_bonus_total', 'referral_bonus_total'),
+                ('new_agent_bonus_total', 'new_agent_bonus_total'),
+            ],
+            agent_field='agent_code', permission='agents.view_agent',
+        ),
+    ]
+}
+
+
+def _csv_chunks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM: Excel otherwise reads UTF-8 as the local code page
+    writer.writerow(headers)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_cell(value) for value in row])
+        if i % CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _jsonl_chunks(headers, rows):
+    if orjson is not None:
+        def dumps(record):
+            return orjson.dumps(record, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    else:
+        def dumps(record):
+            return json.dumps(record, default=_json_default, ensure_ascii=False).encode()
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(headers, row))))
+        if len(lines) == CHUNK_SIZE:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(dataset, fmt, queryset, gzip=False):
+    """Encoded bytes of the export, one chunk per CHUNK_SIZE rows."""
+    if fmt not in FORMATS:
+        raise ExportError(f'Format must be one of {", ".join(FORMATS)}')
+    encode = _csv_chunks if fmt == 'csv' else _jsonl_chunks
+    chunks = encode(dataset.headers, dataset.rows(queryset))
+    return _gzipped(chunks) if gzip else chunks
+
+
+def filename(dataset, fmt, gzip=False):
+    return f'{dataset.name}-{timezone.localdate():%Y%m%d}.{fmt}{".gz" if gzip else ""}'
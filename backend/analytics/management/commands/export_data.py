@@ -0,0 +1,46 @@
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.exports import DATASETS, FORMATS, ExportError, export_chunks, filename
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV / JSONL export of clients, bonuses or agent earnings to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', help="File to write ('-' for stdout; default: <dataset>-<date>.<format>)")
+        parser.add_argument('--since', type=datetime.date.fromisoformat, help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--until', type=datetime.date.fromisoformat, help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--date-field', help='Field --since/--until apply to (default created_at)')
+        parser.add_argument('--status', default='', help='Comma-separated client statuses')
+        parser.add_argument('--agent', help='Agent code')
+
+    def handle(self, *args, **options):
+        export = DATASETS[options['dataset']]
+        fmt, gzip = options['format'], options['gzip']
+        try:
+            queryset = export.queryset(
+                since=options['since'], until=options['until'], date_field=options['date_field'],
+                statuses=[s.upper() for s in options['status'].split(',') if s], agent_code=options['agent'],
+            )
+            chunks = export_chunks(export, fmt, queryset, gzip=gzip)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        output = options['output'] or filename(export, fmt, gzip)
+        written = 0
+        out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(f'Done. {written / 1024:.0f} KiB written to {output}.'))
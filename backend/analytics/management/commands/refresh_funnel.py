@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from analytics.services import backfill_status_events, refresh_funnel_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily funnel rollups from client status events (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every day instead of the changed ones')
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='First create events for clients that have none (submitted before events were recorded); '
+                 'implies --full',
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        if options['backfill']:
+            backfilled = backfill_status_events()
+            self.stdout.write(f'  {backfilled} clients backfilled')
+            full = True
+        days, cohort_days = refresh_funnel_rollups(full=full)
+        self.stdout.write(self.style.SUCCESS(f'Done. {days} days and {cohort_days} cohort days refreshed.'))
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clients', '0004_client_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, default='', max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('agent_type', models.CharField(blank=True, default='', max_length=20)),
+                ('channel', models.CharField(max_length=50)),
+                ('cohort_date', models.DateField()),
+                ('seconds_in_previous', models.PositiveIntegerField(blank=True, help_text='Time spent in from_status', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'client_status_events',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CohortDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cohort_date', models.DateField()),
+                ('agent_type', models.CharField(blank=True, default='', max_length=20)),
+                ('channel', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('clients', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'funnel_cohort_daily',
+                'ordering': ['-cohort_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'rollup_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='StageDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('agent_type', models.CharField(blank=True, default='', max_length=20)),
+                ('channel', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('entered', models.PositiveIntegerField(default=0)),
+                ('exited', models.PositiveIntegerField(default=0)),
+                ('exited_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'funnel dashboard',
+                'verbose_name_plural': 'funnel dashboard',
+                'db_table': 'funnel_stage_daily',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stagedaily',
+            constraint=models.UniqueConstraint(fields=('day', 'agent_type', 'channel', 'status'), name='unique_stage_daily'),
+        ),
+        migrations.AddConstraint(
+            model_name='cohortdaily',
+            constraint=models.UniqueConstraint(fields=('cohort_date', 'agent_type', 'channel', 'status'), name='unique_cohort_daily'),
+        ),
+        migrations.AddField(
+            model_name='clientstatusevent',
+            name='client',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='clients.client'),
+        ),
+        migrations.AddIndex(
+            model_name='clientstatusevent',
+            index=models.Index(fields=['created_at'], name='client_stat_created_4734a6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientstatusevent',
+            index=models.Index(fields=['cohort_date'], name='client_stat_cohort__023666_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientstatusevent',
+            index=models.Index(fields=['client', '-created_at'], name='client_stat_client__b691a5_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ClientStatusEvent(models.Model):
+    """A client entering a pipeline status. Submission is the first event
+    (empty from_status); every CRM status change adds one more."""
+    client = models.ForeignKey('clients.Client', on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, blank=True, default='')
+    to_status = models.CharField(max_length=20)
+    # Source agent's type and the client's channel when the event happened
+    agent_type = models.CharField(max_length=20, blank=True, default='')
+    channel = models.CharField(max_length=50)
+    # Local date the client was submitted, for cohort conversion
+    cohort_date = models.DateField()
+    seconds_in_previous = models.PositiveIntegerField(null=True, blank=True, help_text='Time spent in from_status')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'client_status_events'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['cohort_date']),
+            models.Index(fields=['client', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.client_id}: {self.from_status or "—"} → {self.to_status}'
+
+
+class StageDaily(models.Model):
+    """Per local day: clients that entered each status, and clients that
+    left it with the total time they had spent in it."""
+    day = models.DateField()
+    agent_type = models.CharField(max_length=20, blank=True, default='')
+    channel = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    entered = models.PositiveIntegerField(default=0)
+    exited = models.PositiveIntegerField(default=0)
+    exited_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'funnel_stage_daily'
+        ordering = ['-day']
+        verbose_name = 'funnel dashboard'
+        verbose_name_plural = 'funnel dashboard'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'agent_type', 'channel', 'status'], name='unique_stage_daily'),
+        ]
+
+
+class CohortDaily(models.Model):
+    """Clients submitted on cohort_date that have reached each status so far."""
+    cohort_date = models.DateField()
+    agent_type = models.CharField(max_length=20, blank=True, default='')
+    channel = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    clients = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'funnel_cohort_daily'
+        ordering = ['-cohort_date']
+        constraints = [
+            models.UniqueConstraint(fields=['cohort_date', 'agent_type', 'channel', 'status'],
+                                    name='unique_cohort_daily'),
+        ]
+
+
+class RollupState(models.Model):
+    """When each rollup was last refreshed — events from then on are new."""
+    name = models.CharField(max_length=50, primary_key=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'rollup_state'
+
+    def __str__(self):
+        return f'{self.name} @ {self.refreshed_at}'
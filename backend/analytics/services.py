@@ -0,0 +1,220 @@
+"""Client pipeline events and the daily funnel rollups built from them.
+
+The rollups are recomputed per day from the events, so a refresh only has
+to find which days changed: those of events created since the previous
+refresh (less LATE_MARGIN, to catch transactions that committed late).
+Recomputing a day twice gives the same rows."""
+import datetime
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from analytics.models import ClientStatusEvent, CohortDaily, RollupState, StageDaily
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_ROLLUP = 'funnel'
+LATE_MARGIN = datetime.timedelta(minutes=10)
+# The dashboard warns when the rollups are older than this (refresh_funnel
+# is scheduled every 5 minutes)
+STALE_AFTER = datetime.timedelta(minutes=30)
+
+
+def _event(client, from_status, to_status, agent_type, created_at, seconds_in_previous=None):
+    return ClientStatusEvent(
+        client=client, from_status=from_status, to_status=to_status,
+        agent_type=agent_type or '', channel=client.channel,
+        cohort_date=timezone.localdate(client.created_at),
+        seconds_in_previous=seconds_in_previous, created_at=created_at,
+    )
+
+
+def record_submission(client, agent):
+    """The client entered the pipeline (as SUBMITTED)."""
+    _event(client, '', client.status, agent.agent_type if agent else '', client.created_at).save()
+
+
+def record_status_change(client, old_status, new_status):
+    """The CRM moved the client from old_status to new_status."""
+    entered_at = (
+        ClientStatusEvent.objects.filter(client=client)
+        .order_by('-created_at').values_list('created_at', flat=True).first()
+    ) or client.created_at
+    now = timezone.now()
+    agent_type = client.source_agent.agent_type if client.source_agent else ''
+    _event(client, old_status, new_status, agent_type, now,
+           max(int((now - entered_at).total_seconds()), 0)).save()
+
+
+def _day_bounds(days):
+    tz = timezone.get_current_timezone()
+    first = datetime.datetime.combine(min(days), datetime.time(), tzinfo=tz)
+    last = datetime.datetime.combine(max(days) + datetime.timedelta(days=1), datetime.time(), tzinfo=tz)
+    return first, last
+
+
+def _stage_rows(days):
+    start, end = _day_bounds(days)
+    events = (
+        ClientStatusEvent.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at')).filter(day__in=days).order_by()
+    )
+    rows = {}
+
+    def row(day, agent_type, channel, status):
+        key = (day, agent_type, channel, status)
+        if key not in rows:
+            rows[key] = StageDaily(day=day, agent_type=agent_type, channel=channel, status=status)
+        return rows[key]
+
+    for entry in events.values('day', 'agent_type', 'channel', 'to_status').annotate(n=Count('id')):
+        row(entry['day'], entry['agent_type'], entry['channel'], entry['to_status']).entered = entry['n']
+    exits = events.exclude(from_status='').values('day', 'agent_type', 'channel', 'from_status').annotate(
+        n=Count('id'), seconds=Sum('seconds_in_previous'),
+    )
+    for entry in exits:
+        stage = row(entry['day'], entry['agent_type'], entry['channel'], entry['from_status'])
+        stage.exited, stage.exited_seconds = entry['n'], entry['seconds'] or 0
+    return list(rows.values())
+
+
+def _cohort_rows(cohort_dates):
+    reached = (
+        ClientStatusEvent.objects.filter(cohort_date__in=cohort_dates).order_by()
+        .values('cohort_date', 'agent_type', 'channel', 'to_status')
+        .annotate(n=Count('client', distinct=True))
+    )
+    return [
+        CohortDaily(cohort_date=entry['cohort_date'], agent_type=entry['agent_type'],
+                    channel=entry['channel'], status=entry['to_status'], clients=entry['n'])
+        for entry in reached
+    ]
+
+
+def refresh_funnel_rollups(full=False):
+    """Recompute the StageDaily / CohortDaily rows for every day with new
+    events (all days with `full`). Returns (stage days, cohort days) redone."""
+    started = timezone.now()
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=FUNNEL_ROLLUP)
+        events = ClientStatusEvent.objects.order_by()
+        if not full and state.refreshed_at:
+            events = events.filter(created_at__gte=state.refreshed_at - LATE_MARGIN)
+
+        days = sorted(set(events.annotate(day=TruncDate('created_at')).values_list('day', flat=True)))
+        cohort_dates = sorted(set(events.values_list('cohort_date', flat=True)))
+
+        if full:
+            StageDaily.objects.all().delete()
+            CohortDaily.objects.all().delete()
+        if days:
+            StageDaily.objects.filter(day__in=days).delete()
+            StageDaily.objects.bulk_create(_stage_rows(days), batch_size=1000)
+        if cohort_dates:
+            CohortDaily.objects.filter(cohort_date__in=cohort_dates).delete()
+            CohortDaily.objects.bulk_create(_cohort_rows(cohort_dates), batch_size=1000)
+
+        state.refreshed_at = started
+        state.save(update_fields=['refreshed_at'])
+
+    logger.info('Funnel rollups refreshed: %d days, %d cohort days', len(days), len(cohort_dates))
+    return len(days), len(cohort_dates)
+
+
+def backfill_status_events(chunk_size=2000):
+    """Events for clients submitted before events were recorded: their
+    submission, and their current status (if past SUBMITTED) as of
+    updated_at. Intermediate statuses are unknown. Returns clients backfilled."""
+    from clients.models import Client
+
+    pending = Client.objects.filter(status_events__isnull=True).select_related('source_agent').order_by('pk')
+    done = 0
+    while True:
+        clients = list(pending[:chunk_size])
+        if not clients:
+            return done
+        events = []
+        for client in clients:
+            agent_type = client.source_agent.agent_type if client.source_agent else ''
+            events.append(_event(client, '', 'SUBMITTED', agent_type, client.created_at))
+            if client.status != 'SUBMITTED':
+                seconds = max(int((client.updated_at - client.created_at).total_seconds()), 0)
+                events.append(_event(client, 'SUBMITTED', client.status, agent_type, client.updated_at, seconds))
+        ClientStatusEvent.objects.bulk_create(events, batch_size=chunk_size)
+        done += len(clients)
+
+
+def _pct(part, whole):
+    return round(100 * part / whole, 1) if whole else None
+
+
+def funnel_report(weeks=12, agent_type=None, channel=None):
+    """Dashboard data from the rollups only: weekly cohort funnel, time in
+    each stage, and submitted → disbursed conversion by agent type and channel."""
+    from agents.models import Agent
+    from clients.models import Client
+
+    since = timezone.localdate() - datetime.timedelta(weeks=weeks)
+    since -= datetime.timedelta(days=since.weekday())
+    cohorts = CohortDaily.objects.filter(cohort_date__gte=since).order_by()
+    stages = StageDaily.objects.filter(day__gte=since).order_by()
+    if agent_type is not None:
+        cohorts, stages = cohorts.filter(agent_type=agent_type), stages.filter(agent_type=agent_type)
+    if channel:
+        cohorts, stages = cohorts.filter(channel=channel), stages.filter(channel=channel)
+    statuses = [(value, label) for value, label in Client.STATUS_CHOICES]
+
+    reached = {}
+    for entry in cohorts.annotate(week=TruncWeek('cohort_date')).values('week', 'status').annotate(n=Sum('clients')):
+        reached.setdefault(entry['week'], {})[entry['status']] = entry['n']
+    cohort_weeks = []
+    for week in sorted(reached, reverse=True):
+        submitted = reached[week].get('SUBMITTED', 0)
+        cohort_weeks.append({
+            'week': week,
+            'cells': [(reached[week].get(value, 0), _pct(reached[week].get(value, 0), submitted))
+                      for value, _ in statuses],
+        })
+
+    totals = {
+        entry['status']: entry
+        for entry in stages.values('status').annotate(
+            entered=Sum('entered'), exited=Sum('exited'), seconds=Sum('exited_seconds'))
+    }
+    time_in_stage = [
+        {
+            'status': label,
+            'entered': totals.get(value, {}).get('entered') or 0,
+            'exited': totals.get(value, {}).get('exited') or 0,
+            'avg_days': (round(totals[value]['seconds'] / totals[value]['exited'] / 86400, 1)
+                         if totals.get(value, {}).get('exited') else None),
+        }
+        for value, label in statuses if value not in ('DISBURSED', 'DECLINED')
+    ]
+
+    def conversion(dimension, labels=None):
+        groups = {}
+        for entry in cohorts.values(dimension, 'status').annotate(n=Sum('clients')):
+            groups.setdefault(entry[dimension], {})[entry['status']] = entry['n']
+        return [
+            {
+                'name': (labels or {}).get(name, name) or '—',
+                'submitted': counts.get('SUBMITTED', 0),
+                'disbursed': counts.get('DISBURSED', 0),
+                'declined': counts.get('DECLINED', 0),
+                'conversion': _pct(counts.get('DISBURSED', 0), counts.get('SUBMITTED', 0)),
+            }
+            for name, counts in sorted(groups.items())
+        ]
+
+    return {
+        'since': since,
+        'statuses': [label for _, label in statuses],
+        'cohort_weeks': cohort_weeks,
+        'time_in_stage': time_in_stage,
+        'by_agent_type': conversion('agent_type', dict(Agent.AGENT_TYPE_CHOICES)),
+        'by_channel': conversion('channel'),
+    }
@@ -0,0 +1,6 @@
+from django.urls import path
+from analytics import views
+
+urlpatterns = [
+    path('<str:dataset>.<str:fmt>', views.export_view, name='export'),
+]
@@ -0,0 +1,51 @@
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+
+from analytics.exports import DATASETS, ExportError, export_chunks, filename
+
+
+async def _aiter(chunks):
+    """Under ASGI, Django buffers a sync iterator completely before sending
+    it. Pull the chunks one at a time instead, on the thread that owns the
+    request's DB connection."""
+    sentinel = object()
+    while (chunk := await sync_to_async(next)(chunks, sentinel)) is not sentinel:
+        yield chunk
+
+
+def _date(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+
+@staff_member_required
+def export_view(request, dataset, fmt):
+    """GET /internal/exports/<dataset>.<csv|jsonl>[?gzip=1&since=&until=&date_field=&status=&agent=]
+    since / until are YYYY-MM-DD (inclusive); status is comma-separated."""
+    if dataset not in DATASETS:
+        raise Http404
+    export = DATASETS[dataset]
+    if not request.user.has_perm(export.permission):
+        raise Http404
+    gzip = request.GET.get('gzip') in ('1', 'true')
+    try:
+        queryset = export.queryset(
+            since=_date(request.GET.get('since')),
+            until=_date(request.GET.get('until')),
+            date_field=request.GET.get('date_field'),
+            statuses=[s.upper() for s in request.GET.get('status', '').split(',') if s],
+            agent_code=request.GET.get('agent'),
+        )
+        chunks = iter(export_chunks(export, fmt, queryset, gzip=gzip))
+    except ExportError as e:
+        return HttpResponseBadRequest(str(e))
+    except ValueError:
+        return HttpResponseBadRequest('Dates must be YYYY-MM-DD.')
+
+    content_type = 'application/gzip' if gzip else 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(_aiter(chunks) if settings.ASYNC_VIEWS else chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename(export, fmt, gzip)}"'
+    return response
@@ -0,0 +1,2 @@
+"""Performance benchmarks. Each module is runnable with `python -m benchmarks.<name>`
+from the backend directory, against the database configured in the environment."""
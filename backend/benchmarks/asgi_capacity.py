@@ -0,0 +1,170 @@
+"""Concurrent capacity of the gthread (WSGI) and uvicorn (ASGI) server modes.
+
+Starts a stand-in for the CRM and YCloud that answers after a fixed delay,
+then for each mode launches gunicorn exactly as entrypoint.sh does, fires
+concurrent POST /api/v1/clients/ingest/ requests (each one waits on both
+upstreams) and reports throughput and latency percentiles.
+
+    python -m benchmarks.asgi_capacity --requests 200 --concurrency 50 --upstream-delay 0.5
+
+Uses the database from the environment (DB_* variables or
+DJANGO_SETTINGS_MODULE); a benchmark agent and its clients are created and
+removed again."""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'gthread': ['rivo_partner.wsgi:application', '--workers', '2', '--threads', '2'],
+    'asgi': ['rivo_partner.asgi:application', '--workers', '2', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_upstream(delay):
+    """Slow stand-in for both the CRM lead ingest and YCloud message APIs."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(delay)
+            body = json.dumps({'lead_id': str(uuid.uuid4()), 'id': 'msg'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', _free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_server(mode, port, upstream_url):
+    env = dict(
+        os.environ,
+        SERVER_MODE='asgi' if mode == 'asgi' else 'wsgi',
+        CRM_LEAD_INGEST_URL=f'{upstream_url}/api/leads/ingest/',
+        YCLOUD_MESSAGES_URL=f'{upstream_url}/v2/whatsapp/messages',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *MODES[mode], '--bind', f'127.0.0.1:{port}', '--timeout', '120'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/v1/config/', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start on port {port}')
+
+
+def run_load(base_url, token, total, concurrency):
+    session_local = threading.local()
+
+    def submit(i):
+        session = getattr(session_local, 'session', None) or requests.Session()
+        session_local.session = session
+        started = time.perf_counter()
+        try:
+            response = session.post(
+                f'{base_url}/api/v1/clients/ingest/',
+                json={
+                    'client_name': f'Bench {i}',
+                    'client_phone': f'+9715{uuid.uuid4().int % 10**8:08d}',
+                    'expected_mortgage_amount': '1000000',
+                    'consent': True,
+                },
+                headers={'Authorization': f'Bearer {token}'},
+                timeout=120,
+            )
+            ok = response.status_code == 201
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(submit, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'throughput': total / wall,
+        'p50': quantiles[49],
+        'p95': quantiles[94],
+        'p99': quantiles[98],
+        'errors': sum(1 for _, ok in results if not ok),
+        'wall': wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--upstream-delay', type=float, default=0.5, help='Seconds each upstream call takes')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rivo_partner.settings')
+    import django
+    django.setup()
+    from agents.models import Agent
+    from clients.models import Client
+
+    token = f'bench-{uuid.uuid4()}'
+    agent = Agent.objects.create(phone=f'+9710{uuid.uuid4().int % 10**9:09d}', name='Benchmark', device_token=token)
+    upstream = start_upstream(args.upstream_delay)
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+
+    print(f'{args.requests} requests, concurrency {args.concurrency}, '
+          f'upstream delay {args.upstream_delay}s (CRM + YCloud per request)')
+    print(f'{"mode":<10}{"req/s":>10}{"p50":>10}{"p95":>10}{"p99":>10}{"errors":>8}')
+    try:
+        for mode in args.modes:
+            port = _free_port()
+            server = start_server(mode, port, upstream_url)
+            try:
+                result = run_load(f'http://127.0.0.1:{port}', token, args.requests, args.concurrency)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            print(f'{mode:<10}{result["throughput"]:>10.1f}{result["p50"]:>9.2f}s{result["p95"]:>9.2f}s'
+                  f'{result["p99"]:>9.2f}s{result["errors"]:>8}')
+    finally:
+        upstream.shutdown()
+        Client.objects.filter(source_agent=agent).delete()
+        agent.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Latency and query counts of the hot endpoints, with query budgets.
+
+Runs each endpoint in-process through the full middleware stack against the
+configured database, as a synthetic agent from benchmarks.seed (the one
+with the largest referral network, unless --agent is given). The first
+request after its caches are invalidated is "cold"; the rest are "warm".
+Each endpoint has a query budget for both. Exits non-zero when any budget
+is exceeded, so N+1 regressions in the serializers fail before deploy.
+
+    python -m benchmarks.seed --agents 100000 --clients 2000000
+    python -m benchmarks.endpoints --iterations 50
+
+WhatsApp sends from the webhooks go to a local stand-in for YCloud. The
+webhook rows and sessions a run creates are removed afterwards, and the
+client used for the CRM webhook gets its original status back."""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.asgi_capacity import start_upstream
+from benchmarks.seed import AGENT_CODE_PREFIX, setup_django
+
+# endpoint -> (cold budget, warm budget)
+# Snapshots are cached per process: a warm read costs one query for the versions.
+QUERY_BUDGETS = {
+    'me': (10, 2),  # earnings from the home snapshot; cold builds it
+    'bootstrap': (12, 2),  # warm: auth, then the snapshot versions
+    'list_clients': (2, 2),
+    'network': (4, 2),
+    'my_bonuses': (4, 2),
+    'get_config': (1, 0),
+    'check_verification': (10, 2),
+    'crm_status_webhook': (10, 10),  # incl. the status event and its previous-event lookup, home snapshot bump, agent event + NOTIFY
+    'ycloud_webhook': (10, 10),
+}
+
+
+class Bench:
+    def __init__(self, agent):
+        from django.test import Client as HttpClient
+        self.agent = agent
+        self.http = HttpClient()
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {agent.device_token}'}
+        self.cleanup = []
+        self.prepare()
+
+    def prepare(self):
+        from agents.models import WhatsAppSession
+        from clients.models import Client
+        self.session_code = WhatsAppSession.objects.filter(
+            agent=self.agent, is_verified=True,
+        ).values_list('code', flat=True).first()
+        self.crm_client = Client.objects.filter(
+            source_agent=self.agent, crm_lead_id__isnull=False,
+        ).exclude(status__in=['DISBURSED', 'DECLINED']).first()
+        if self.crm_client:
+            original = self.crm_client.status
+            self.cleanup.append(lambda: Client.objects.filter(pk=self.crm_client.pk).update(status=original))
+
+    def invalidate(self):
+        from config.snapshot import config_snapshot
+        from agents.services import invalidate_home_snapshot, invalidate_network_snapshot
+        from referrals.services import invalidate_bonus_snapshot
+        config_snapshot.expire()
+        invalidate_network_snapshot(self.agent.pk)
+        invalidate_bonus_snapshot(self.agent.pk)
+        invalidate_home_snapshot(self.agent.pk)
+
+    def me(self, i):
+        return self.http.get('/api/v1/agents/me/', **self.auth)
+
+    def bootstrap(self, i):
+        return self.http.get('/api/v1/bootstrap/', **self.auth)
+
+    def list_clients(self, i):
+        return self.http.get('/api/v1/clients/', **self.auth)
+
+    def network(self, i):
+        return self.http.get('/api/v1/agents/network/', **self.auth)
+
+    def my_bonuses(self, i):
+        return self.http.get('/api/v1/referrals/bonuses/', **self.auth)
+
+    def get_config(self, i):
+        return self.http.get('/api/v1/config/')
+
+    def check_verification(self, i):
+        return self.http.get(f'/api/v1/agents/check-verification/{self.session_code}/')
+
+    def crm_status_webhook(self, i):
+        return self.http.post('/api/v1/webhook/crm-status/', {
+            'lead_id': str(self.crm_client.crm_lead_id),
+            'pipeline_status': 'contacted' if i % 2 else 'qualified',
+            'synthetic': True,
+        }, content_type='application/json')
+
+    def ycloud_webhook(self, i):
+        """A returning agent signing in: a fresh pending session, then the
+        inbound WhatsApp message with its code."""
+        from agents.models import WhatsAppSession
+        code = f'{random.randrange(10**6):06d}'
+        while WhatsAppSession.objects.filter(code=code).exists():
+            code = f'{random.randrange(10**6):06d}'
+        session = WhatsAppSession.objects.create(code=code)
+        self.cleanup.append(lambda: WhatsAppSession.objects.filter(pk=session.pk).delete())
+        return self.http.post('/api/v1/webhook/ycloud/', {
+            'type': 'whatsapp.inbound_message.received',
+            'synthetic': True,
+            'whatsappInboundMessage': {
+                'from': self.agent.phone.lstrip('+'),
+                'type': 'text',
+                'text': {'body': f'RIVO {code}'},
+                'customerProfile': {'name': self.agent.name},
+            },
+        }, content_type='application/json')
+
+    def measure(self, name, iterations):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        call = getattr(self, name)
+        # Cold = first request after an invalidation. The unmeasured warm-up
+        # creates the agent's snapshot version rows, which exist in
+        # production for every agent who has used the app before.
+        call(iterations)
+        self.invalidate()
+        latencies, queries = [], []
+        for i in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = call(i)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name} returned {response.status_code}: {response.content[:200]!r}')
+            # The periodic AppConfig version check lands on whichever request
+            # comes due; it is constant-cost, so it is not charged to the endpoint.
+            queries.append(sum(1 for q in ctx.captured_queries if 'config_version' not in q['sql']))
+        return latencies, queries[0], max(queries[1:], default=queries[0])
+
+    def close(self):
+        from webhooks.models import WebhookLog
+        for undo in self.cleanup:
+            undo()
+        WebhookLog.objects.filter(payload__synthetic=True, created_at__gte=self.started_at).delete()
+
+
+def pick_agent(agent_code):
+    from django.db.models import Count
+    from agents.models import Agent
+    agents = Agent.objects.filter(agent_code__startswith=AGENT_CODE_PREFIX)
+    if agent_code:
+        return agents.get(agent_code=agent_code)
+    return agents.annotate(network=Count('referred_agents')).order_by('-network').first()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--agent', help='Agent code of a synthetic agent (default: largest network)')
+    parser.add_argument('--only', nargs='+', choices=list(QUERY_BUDGETS), default=list(QUERY_BUDGETS))
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+    from django.utils import timezone
+
+    agent = pick_agent(args.agent)
+    if agent is None:
+        sys.exit('No synthetic agents found — run python -m benchmarks.seed first.')
+    upstream = start_upstream(0)
+    ycloud_url = f'http://127.0.0.1:{upstream.server_address[1]}/v2/whatsapp/messages'
+
+    bench = Bench(agent)
+    bench.started_at = timezone.now()
+    print(f'agent {agent.agent_code}: {agent.referred_agents.count()} referred agents, '
+          f'{agent.clients.count()} clients; {args.iterations} iterations')
+    print(f'{"endpoint":<22}{"p50 ms":>9}{"p95 ms":>9}{"max ms":>9}{"cold q":>9}{"warm q":>9}  budget')
+    failures = []
+    try:
+        with override_settings(YCLOUD_MESSAGES_URL=ycloud_url, ALLOWED_HOSTS=['*']):
+            for name in args.only:
+                latencies, cold, warm = bench.measure(name, args.iterations)
+                cold_budget, warm_budget = QUERY_BUDGETS[name]
+                over = cold > cold_budget or warm > warm_budget
+                if over:
+                    failures.append(name)
+                p = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+                print(f'{name:<22}{p[49] * 1000:>9.1f}{p[94] * 1000:>9.1f}{max(latencies) * 1000:>9.1f}'
+                      f'{cold:>9}{warm:>9}  {cold_budget}/{warm_budget}{"  OVER BUDGET" if over else ""}')
+    finally:
+        bench.close()
+        upstream.shutdown()
+
+    if failures:
+        sys.exit(f'Query budget exceeded: {", ".join(failures)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""Synthetic dataset at production-like volume for the endpoint benchmarks.
+
+Creates agents with skewed referral chains (a few heavy referrers, a long
+tail), clients with a realistic status mix, the referrer and new-agent
+bonuses their disbursals would have earned, CRM/YCloud webhook logs and a
+verified WhatsApp session per agent.
+
+    python -m benchmarks.seed --agents 100000 --clients 2000000
+    python -m benchmarks.seed --purge
+
+Everything is written with bulk_create in batches of agents, so memory
+stays flat. Synthetic rows are recognisable and removed by --purge:
+agent codes start with SYN-, device tokens with syn-, session codes with
+S, and webhook payloads carry "synthetic": true. Synthetic agents
+authenticate with their device token, e.g. `Bearer syn-42`."""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+AGENT_CODE_PREFIX = 'SYN-'
+STATUS_WEIGHTS = {
+    'SUBMITTED': 30,
+    'CONTACTED': 20,
+    'QUALIFIED': 12,
+    'SUBMITTED_TO_BANK': 8,
+    'PREAPPROVED': 6,
+    'FOL_RECEIVED': 4,
+    'DISBURSED': 10,
+    'DECLINED': 10,
+}
+AGENT_TYPES = ['RE_BROKER', 'MORTGAGE_BROKER', 'OTHER', '']
+
+
+def setup_django():
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rivo_partner.settings')
+    import django
+    django.setup()
+
+
+def agent_token(index):
+    return f'syn-{index}'
+
+
+def session_code(index):
+    return f'S{index:07d}'
+
+
+def _agent_phone(index):
+    return f'+97170{index:08d}'
+
+
+def _client_phone(index):
+    return f'+9717{index:09d}'
+
+
+class Seeder:
+    def __init__(self, agents, clients, referred_share, batch_size, seed):
+        from config.models import AppConfig
+        self.total_agents = agents
+        self.mean_clients = clients / agents
+        self.referred_share = referred_share
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.agent_ids = []
+        self.referrer_deals = {}  # referrer id -> disbursals across their network so far
+        self.client_index = 0
+        self.referrer_schedule = [Decimal(str(a)) for a in AppConfig.get_value('referrer_bonuses', [500, 500, 1000])]
+        self.new_agent_schedule = [Decimal(str(a)) for a in AppConfig.get_value('new_agent_bonuses', [1000, 750, 500])]
+        self.counts = dict.fromkeys(['agents', 'clients', 'referral_bonuses', 'new_agent_bonuses', 'webhook_logs'], 0)
+
+    def _pick_referrer(self):
+        """Preferential attachment towards early agents, so the first few
+        hundred end up with large networks."""
+        if not self.agent_ids or self.random.random() > self.referred_share:
+            return None
+        return self.agent_ids[int(len(self.agent_ids) * self.random.random() ** 3)]
+
+    def run(self, report):
+        started = time.monotonic()
+        for start in range(0, self.total_agents, self.batch_size):
+            self._seed_batch(start, min(start + self.batch_size, self.total_agents))
+            report(f'{self.counts["agents"]:>9} agents  {self.counts["clients"]:>10} clients  '
+                   f'{time.monotonic() - started:7.1f}s')
+        return self.counts
+
+    def _seed_batch(self, start, stop):
+        from django.db import transaction
+        from django.utils import timezone
+        from agents.models import Agent, WhatsAppSession
+        from clients.commission import CommissionSchedule
+        from clients.models import Client
+        from referrals.models import NewAgentBonus, ReferralBonus
+        from webhooks.models import WebhookLog
+
+        rnd = self.random
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        schedule = CommissionSchedule.current()
+        today = timezone.localdate()
+
+        agents, sessions = [], []
+        for i in range(start, stop):
+            agent_type = rnd.choice(AGENT_TYPES)
+            agent = Agent(
+                id=uuid.uuid4(),
+                name=f'Synthetic Agent {i}',
+                phone=_agent_phone(i),
+                email=f'agent{i}@example.com' if agent_type else '',
+                agent_type=agent_type,
+                agent_code=f'{AGENT_CODE_PREFIX}{i:07d}',
+                referred_by_id=self._pick_referrer(),
+                device_token=agent_token(i),
+                is_whatsapp_business=rnd.random() < 0.3,
+                is_profile_complete=bool(agent_type),
+                has_completed_first_action=True,
+            )
+            agents.append(agent)
+            sessions.append(WhatsAppSession(
+                code=session_code(i), phone=agent.phone, agent_id=agent.id,
+                device_token=agent.device_token, is_verified=True,
+            ))
+            self.agent_ids.append(agent.id)
+
+        clients, client_agents = [], []
+        for agent in agents:
+            for _ in range(int(rnd.expovariate(1 / self.mean_clients))):
+                self.client_index += 1
+                clients.append(Client(
+                    id=uuid.uuid4(),
+                    client_name=f'Synthetic Client {self.client_index}',
+                    client_phone=_client_phone(self.client_index),
+                    expected_mortgage_amount=Decimal(rnd.randrange(300_000, 8_000_000, 10_000)),
+                    status=rnd.choices(statuses, weights)[0],
+                    source_agent_id=agent.id,
+                    crm_lead_id=uuid.uuid4(),
+                ))
+                client_agents.append(agent)
+
+        estimates = schedule.commissions(
+            [c.expected_mortgage_amount for c in clients], [a.agent_type for a in client_agents], today,
+        )
+        referral_bonuses, new_agent_bonuses, logs = [], [], []
+        agent_deals = {}
+        for client, agent, estimate in zip(clients, client_agents, estimates):
+            client.estimated_commission = estimate
+            logs.append(WebhookLog(
+                source='RIVO_CRM', event_type='CRM_STATUS_UPDATE', processed=True,
+                payload={'lead_id': str(client.crm_lead_id), 'pipeline_status': client.status.lower(),
+                         'mortgage_amount': str(client.expected_mortgage_amount), 'synthetic': True},
+            ))
+            if client.status != 'DISBURSED':
+                continue
+            client.commission_amount = estimate
+
+            deal_number = agent_deals[agent.id] = agent_deals.get(agent.id, 0) + 1
+            if deal_number <= len(self.new_agent_schedule):
+                new_agent_bonuses.append(NewAgentBonus(
+                    agent_id=agent.id, client_id=client.id, deal_number=deal_number,
+                    amount=self.new_agent_schedule[deal_number - 1],
+                ))
+            referrer_id = agent.referred_by_id
+            if referrer_id:
+                deal_number = self.referrer_deals[referrer_id] = self.referrer_deals.get(referrer_id, 0) + 1
+                if deal_number <= len(self.referrer_schedule):
+                    referral_bonuses.append(ReferralBonus(
+                        referrer_id=referrer_id, triggered_by_agent_id=agent.id, triggered_by_client_id=client.id,
+                        deal_number=deal_number, amount=self.referrer_schedule[deal_number - 1],
+                    ))
+        for agent in agents:
+            logs.append(WebhookLog(
+                source='YCLOUD', event_type='whatsapp.inbound_message.received', processed=True,
+                payload={'type': 'whatsapp.inbound_message.received', 'synthetic': True, 'whatsappInboundMessage': {
+                    'from': agent.phone.lstrip('+'), 'type': 'text', 'text': {'body': f'RIVO {rnd.randrange(10**6):06d}'},
+                    'customerProfile': {'name': agent.name},
+                }},
+            ))
+
+        with transaction.atomic():
+            Agent.objects.bulk_create(agents, batch_size=2000)
+            WhatsAppSession.objects.bulk_create(sessions, batch_size=2000)
+            Client.objects.bulk_create(clients, batch_size=2000)
+            NewAgentBonus.objects.bulk_create(new_agent_bonuses, batch_size=2000)
+            ReferralBonus.objects.bulk_create(referral_bonuses, batch_size=2000)
+            WebhookLog.objects.bulk_create(logs, batch_size=2000)
+
+        self.counts['agents'] += len(agents)
+        self.counts['clients'] += len(clients)
+        self.counts['new_agent_bonuses'] += len(new_agent_bonuses)
+        self.counts['referral_bonuses'] += len(referral_bonuses)
+        self.counts['webhook_logs'] += len(logs)
+
+
+def purge(report, chunk_size=1000):
+    """Delete all synthetic rows, a chunk of agents at a time."""
+    from agents.models import Agent, WhatsAppSession
+    from clients.models import Client
+    from config.models import SnapshotVersion
+    from payouts.models import PayoutBatch, PayoutItem
+    from referrals.models import NewAgentBonus, ReferralBonus
+    from sync.models import SyncTombstone
+    from webhooks.models import WebhookLog
+
+    WebhookLog.objects.filter(payload__synthetic=True).delete()
+    WhatsAppSession.objects.filter(device_token__startswith='syn-').delete()
+    agents = Agent.objects.filter(agent_code__startswith=AGENT_CODE_PREFIX)
+    deleted = 0
+    while True:
+        chunk = list(agents.values_list('id', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        PayoutItem.objects.filter(agent_id__in=chunk).delete()
+        PayoutBatch.objects.filter(agent_id__in=chunk).delete()
+        ReferralBonus.objects.filter(referrer_id__in=chunk).delete()
+        NewAgentBonus.objects.filter(agent_id__in=chunk).delete()
+        Client.objects.filter(source_agent_id__in=chunk).delete()
+        Agent.objects.filter(referred_by_id__in=chunk).update(referred_by=None)
+        Agent.objects.filter(id__in=chunk).delete()
+        SyncTombstone.objects.filter(agent_id__in=chunk).delete()
+        SnapshotVersion.objects.filter(agent_id__in=chunk).delete()
+        deleted += len(chunk)
+        report(f'{deleted:>9} agents removed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--agents', type=int, default=100_000)
+    parser.add_argument('--clients', type=int, default=2_000_000, help='Approximate total; per-agent counts are skewed')
+    parser.add_argument('--referred-share', type=float, default=0.7, help='Share of agents who were referred by another')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Agents per transaction')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--purge', action='store_true', help='Remove all synthetic data instead of creating it')
+    args = parser.parse_args()
+
+    setup_django()
+
+    def report(line):
+        print(line, flush=True)
+
+    if args.purge:
+        purge(report)
+        return
+    from agents.models import Agent
+    if Agent.objects.filter(agent_code__startswith=AGENT_CODE_PREFIX).exists():
+        sys.exit('Synthetic data already present — run with --purge first.')
+    counts = Seeder(args.agents, args.clients, args.referred_share, args.batch_size, args.seed).run(report)
+    print(', '.join(f'{n} {name.replace("_", " ")}' for name, n in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
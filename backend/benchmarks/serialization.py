@@ -0,0 +1,77 @@
+"""Per-row cost of the client list: DRF ModelSerializer + JSONRenderer
+against the values() + RowSerializer + orjson fast path.
+
+Creates a throwaway agent with --rows clients, times fetch+serialize and
+render separately for both paths (best of --repeat), checks that both
+produce byte-identical JSON, and removes the data again.
+
+    python -m benchmarks.serialization --rows 5000"""
+import argparse
+import gzip
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from benchmarks.seed import setup_django
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from agents.models import Agent
+    from clients.models import Client
+    from clients.serializers import ClientSerializer, client_rows
+    from rivo_partner.renderers import FastJSONRenderer, orjson
+
+    agent = Agent.objects.create(phone=f'+9710{uuid.uuid4().int % 10**9:09d}', name='Serialization bench')
+    Client.objects.bulk_create([
+        Client(
+            client_name=f'Client {i} — ünïcode', client_phone=f'+97155{i:07d}',
+            expected_mortgage_amount=Decimal(1_000_000 + i * 1000), estimated_commission=Decimal('4250.50'),
+            commission_amount=Decimal('4250.5') if i % 5 == 0 else None,
+            status='DISBURSED' if i % 5 == 0 else 'SUBMITTED', source_agent=agent,
+        )
+        for i in range(args.rows)
+    ], batch_size=2000)
+    clients = Client.objects.filter(source_agent=agent)
+
+    try:
+        drf_serialize, drf_data = best_of(args.repeat, lambda: ClientSerializer(clients.all(), many=True).data)
+        drf_render, drf_body = best_of(args.repeat, lambda: JSONRenderer().render(drf_data))
+        fast_serialize, fast_data = best_of(args.repeat, lambda: client_rows.many(clients.all()))
+        fast_render, fast_body = best_of(args.repeat, lambda: FastJSONRenderer().render(fast_data))
+    finally:
+        clients.delete()
+        agent.delete()
+
+    per_row = 1e6 / args.rows
+    print(f'{args.rows} clients, best of {args.repeat}; orjson {"available" if orjson else "NOT installed"}')
+    print(f'{"path":<8}{"fetch+serialize":>18}{"render":>12}{"total":>12}  (µs/row)')
+    for name, serialize, render in (('drf', drf_serialize, drf_render), ('fast', fast_serialize, fast_render)):
+        print(f'{name:<8}{serialize * per_row:>18.2f}{render * per_row:>12.2f}{(serialize + render) * per_row:>12.2f}')
+    print(f'speed-up {(drf_serialize + drf_render) / (fast_serialize + fast_render):.1f}x; '
+          f'payload {len(fast_body) / 1024:.0f} KiB, {len(gzip.compress(fast_body)) / 1024:.0f} KiB gzipped')
+
+    if drf_body != fast_body:
+        sys.exit('Fast path output differs from DRF output')
+    print('Output identical to DRF.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,16 @@
 from django.contrib import admin
 from clients.models import Client
+from rivo_partner.admin import ScalableAdmin
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(ScalableAdmin):
     list_display = ['client_name', 'client_phone', 'expected_mortgage_amount', 'status', 'source_agent', 'created_at']
     list_filter = ['status', 'channel', 'created_at']
+    list_select_related = ['source_agent']
     search_fields = ['client_name', 'client_phone']
+    phone_search_fields = ['client_phone']
+    agent_code_search_fields = ['source_agent__agent_code']
+    date_hierarchy = 'created_at'
     readonly_fields = ['id', 'estimated_commission', 'created_at', 'updated_at']
     raw_id_fields = ['source_agent']
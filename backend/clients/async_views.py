@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+
+from agents.async_api import async_api_view, http_client, render
+from agents.services import _asend_whatsapp_template, client_whatsapp_template
+from clients.serializers import ClientSerializer
+from clients.views import create_client, crm_lead_id, crm_payload
+from rivo_partner.metrics import outbound_call
+
+logger = logging.getLogger(__name__)
+
+
+async def _push_to_crm(client, agent):
+    payload = crm_payload(client, agent)
+    try:
+        logger.info('Pushing lead to CRM: client=%s, agent=%s', client.pk, agent.phone)
+        with outbound_call('crm') as call:
+            crm_response = await http_client().post(settings.CRM_LEAD_INGEST_URL, json=payload, timeout=10)
+            call['ok'] = crm_response.status_code < 400
+        lead_id = crm_lead_id(client, crm_response.status_code, crm_response.text, crm_response.json)
+        if lead_id:
+            client.crm_lead_id = lead_id
+            await client.asave(update_fields=['crm_lead_id'])
+            logger.info('CRM lead_id stored: %s', lead_id)
+    except Exception as e:
+        logger.error('Failed to push lead to Rivo CRM: client=%s: %s', client.pk, e)
+
+
+async def _mark_first_action(agent):
+    if not agent.has_completed_first_action:
+        agent.has_completed_first_action = True
+        await agent.asave(update_fields=['has_completed_first_action'])
+
+
+@async_api_view(['POST'])
+async def submit_client(request):
+    """Async version of clients.views.submit_client for ASGI mode.
+    The CRM push and the client's WhatsApp notification run concurrently."""
+    agent = request.user
+    # Validation, the insert and the submission event: one thread hop, not one per query
+    client = await sync_to_async(create_client)(agent, request.data)
+
+    _, phone, template_name, parameters = client_whatsapp_template(
+        client.client_phone, agent.name or agent.phone, client.client_name,
+    )
+    await asyncio.gather(
+        _push_to_crm(client, agent),
+        _mark_first_action(agent),
+        _asend_whatsapp_template(phone, template_name, parameters),
+    )
+
+    data = await sync_to_async(lambda: ClientSerializer(client).data)()
+    return render(data, status.HTTP_201_CREATED)
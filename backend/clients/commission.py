@@ -0,0 +1,131 @@
+"""Commission engine — the one place client commissions are computed.
+
+Rates come from AppConfig:
+- `commission_tiers`: list of tiers, each
+  {"percent": 0.5, "min_amount": 0, "max_amount": 5000000,
+   "agent_type": "RE_BROKER", "effective_from": "2026-01-01", "effective_to": null}.
+  Every key except `percent` is optional; amount and date ranges are
+  half-open [from, to). When several tiers match, one for the agent's type
+  beats a generic one, then the latest `effective_from` wins.
+- `commission_min_percent`: rate when no tier matches.
+- `commission_max_percent`: upper bound applied to every rate.
+
+Amounts are exact Decimals rounded to fils like the DB column."""
+import logging
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+FINAL_STATUSES = ('DISBURSED', 'DECLINED')
+
+
+def _to_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+class Tier:
+    __slots__ = ('percent', 'min_amount', 'max_amount', 'agent_type', 'effective_from', 'effective_to')
+
+    def __init__(self, spec):
+        self.percent = Decimal(str(spec['percent']))
+        self.min_amount = Decimal(str(spec.get('min_amount') or 0))
+        self.max_amount = Decimal(str(spec['max_amount'])) if spec.get('max_amount') is not None else None
+        self.agent_type = spec.get('agent_type') or None
+        self.effective_from = _to_date(spec.get('effective_from'))
+        self.effective_to = _to_date(spec.get('effective_to'))
+
+    def active_on(self, on_date):
+        return (self.effective_from is None or self.effective_from <= on_date) and \
+            (self.effective_to is None or on_date < self.effective_to)
+
+    def covers(self, amount):
+        return self.min_amount <= amount and (self.max_amount is None or amount < self.max_amount)
+
+
+class CommissionSchedule:
+    """Immutable view of the commission config. Use `current()`."""
+
+    def __init__(self, tiers, default_percent, max_percent):
+        self.tiers = [Tier(t) for t in tiers]
+        self.default_percent = Decimal(str(default_percent))
+        self.max_percent = Decimal(str(max_percent)) if max_percent is not None else None
+        self._bands = {}
+
+    @classmethod
+    def current(cls):
+        global _schedule
+        from config.models import AppConfig
+        from config.snapshot import config_snapshot
+        version = config_snapshot.version
+        if _schedule[0] != version:
+            _schedule = (version, cls(
+                AppConfig.get_value('commission_tiers', []) or [],
+                AppConfig.get_value('commission_min_percent', 0.45),
+                AppConfig.get_value('commission_max_percent', None),
+            ))
+        return _schedule[1]
+
+    def _cap(self, percent):
+        if self.max_percent is not None and percent > self.max_percent:
+            return self.max_percent
+        return percent
+
+    def _pick(self, amount, agent_type, on_date):
+        best = None
+        for tier in self.tiers:
+            if tier.agent_type not in (None, agent_type) or not tier.active_on(on_date) or not tier.covers(amount):
+                continue
+            rank = (tier.agent_type is not None, tier.effective_from or date.min)
+            if best is None or rank > best[0]:
+                best = (rank, tier)
+        return self._cap(best[1].percent) if best else self._cap(self.default_percent)
+
+    def _band(self, agent_type, on_date):
+        """Amount breakpoints and the rate for each band, for one
+        (agent type, date) pair. Rates are constant between breakpoints."""
+        key = (agent_type, on_date)
+        band = self._bands.get(key)
+        if band is None:
+            edges = sorted({Decimal(0)} | {
+                edge for t in self.tiers if t.agent_type in (None, agent_type) and t.active_on(on_date)
+                for edge in (t.min_amount, t.max_amount) if edge is not None
+            })
+            band = self._bands[key] = (edges, [self._pick(edge, agent_type, on_date) for edge in edges])
+        return band
+
+    def rate(self, amount, agent_type, on_date):
+        edges, rates = self._band(agent_type or None, on_date)
+        return rates[max(bisect_right(edges, amount) - 1, 0)]
+
+    def commission(self, amount, agent_type, on_date):
+        if not amount:
+            return None
+        return (amount * self.rate(amount, agent_type, on_date) / 100).quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+    def commissions(self, amounts, agent_types, on_date):
+        """Commissions for parallel lists of amounts and agent types in one
+        pass. Rate bands are resolved once per agent type, then each amount
+        is a bisect and a multiply."""
+        bands = {t: self._band(t or None, on_date) for t in set(agent_types)}
+        results = []
+        for amount, agent_type in zip(amounts, agent_types):
+            if not amount:
+                results.append(None)
+                continue
+            edges, rates = bands[agent_type]
+            rate = rates[max(bisect_right(edges, amount) - 1, 0)]
+            results.append((amount * rate / 100).quantize(CENT, rounding=ROUND_HALF_EVEN))
+        return results
+
+
+# (config version, schedule) — rebuilt when AppConfig changes
+_schedule = (None, None)
+
+
+def commission_for(amount, agent_type, on_date=None):
+    """Commission on `amount` for an agent of `agent_type` as of `on_date` (today by default)."""
+    from django.utils import timezone
+    return CommissionSchedule.current().commission(amount, agent_type, on_date or timezone.localdate())
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from agents.services import invalidate_home_snapshot
+from clients.commission import CommissionSchedule, FINAL_STATUSES
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = 'Recompute estimated_commission for all non-final clients from the current commission config'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        schedule = CommissionSchedule.current()
+        today = timezone.localdate()
+
+        pending = Client.objects.exclude(status__in=FINAL_STATUSES).order_by('pk')
+        last_pk = None
+        scanned = changed = 0
+
+        while True:
+            chunk = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            rows = list(chunk.values_list(
+                'pk', 'expected_mortgage_amount', 'source_agent__agent_type', 'estimated_commission', 'source_agent_id',
+            )[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+
+            pks, amounts, agent_types, current, agent_ids = zip(*rows)
+            estimates = schedule.commissions(amounts, [t or '' for t in agent_types], today)
+
+            now = timezone.now()
+            updates, agents = [], set()
+            for pk, old, new, agent_id in zip(pks, current, estimates, agent_ids):
+                if old != new:
+                    updates.append(Client(pk=pk, estimated_commission=new, updated_at=now))
+                    agents.add(agent_id)
+            changed += len(updates)
+            if updates and not dry_run:
+                with transaction.atomic():
+                    Client.objects.bulk_update(updates, ['estimated_commission', 'updated_at'], batch_size=chunk_size)
+                    # bulk_update sends no signals
+                    for agent_id in agents:
+                        invalidate_home_snapshot(agent_id)
+
+            self.stdout.write(f'  {scanned} scanned, {changed} changed')
+
+        verb = 'would change' if dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'Done. {scanned} non-final clients scanned, {changed} {verb}.'))
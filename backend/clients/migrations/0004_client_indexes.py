@@ -0,0 +1,35 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_make_source_agent_nullable'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='client_phone',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='crm_lead_id',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Lead ID from Rivo CRM', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['status'], name='clients_status_98ee60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_at'], name='clients_created_4c189f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['source_agent', 'status'], name='clients_source__c8e8e1_idx'),
+        ),
+    ]
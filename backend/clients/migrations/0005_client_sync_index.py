@@ -0,0 +1,17 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['source_agent', 'updated_at'], name='clients_source__b89a07_idx'),
+        ),
+    ]
@@ -1,6 +1,5 @@
 import uuid
 from django.db import models
-from decimal import Decimal
 
 
 class Client(models.Model):
@@ -17,7 +16,7 @@ class Client(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     client_name = models.CharField(max_length=255)
-    client_phone = models.CharField(max_length=20)
+    client_phone = models.CharField(max_length=20, db_index=True)
     expected_mortgage_amount = models.DecimalField(max_digits=15, decimal_places=2)
     estimated_commission = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     commission_amount = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
@@ -36,7 +35,9 @@ class Client(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status']),
+            models.Index(fields=['created_at']),
             models.Index(fields=['source_agent', 'status']),
+            models.Index(fields=['source_agent', 'updated_at']),
         ]
 
     def __str__(self):
@@ -44,7 +45,7 @@ class Client(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.estimated_commission and self.expected_mortgage_amount:
-            from config.models import AppConfig
-            min_rate = AppConfig.get_value('commission_min_percent', 0.45)
-            self.estimated_commission = self.expected_mortgage_amount * Decimal(str(min_rate)) / 100
+            from clients.commission import commission_for
+            agent_type = self.source_agent.agent_type if self.source_agent_id else ''
+            self.estimated_commission = commission_for(self.expected_mortgage_amount, agent_type)
         super().save(*args, **kwargs)
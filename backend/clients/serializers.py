@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from clients.models import Client
+from rivo_partner.serializers import RowSerializer
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -16,6 +17,9 @@ class ClientSerializer(serializers.ModelSerializer):
         ]
 
 
+client_rows = RowSerializer(ClientSerializer)
+
+
 class ClientSubmitSerializer(serializers.Serializer):
     client_name = serializers.CharField(max_length=255)
     client_phone = serializers.CharField(max_length=20)
@@ -0,0 +1,19 @@
+from django.db.models import Count
+
+from clients.models import Client
+
+RECENT_CLIENTS = 5
+
+
+def client_summary(agent):
+    """Per-status client counts and the most recent clients of an agent,
+    for the home screen (cached in the agent's home snapshot)."""
+    from clients.serializers import client_rows
+
+    clients = Client.objects.filter(source_agent=agent)
+    counts = dict(clients.order_by().values_list('status').annotate(n=Count('pk')))
+    return {
+        'counts': {value: counts.get(value, 0) for value, _ in Client.STATUS_CHOICES},
+        'total': sum(counts.values()),
+        'recent': client_rows.many(clients.order_by('-created_at')[:RECENT_CLIENTS]),
+    }
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.services import invalidate_home_snapshot
+from clients.models import Client
+
+
+@receiver([post_save, post_delete], sender=Client)
+def client_changed(sender, instance, **kwargs):
+    invalidate_home_snapshot(instance.source_agent_id)
@@ -1,7 +1,11 @@
 from django.urls import path
-from clients import views
+from django.conf import settings
+from clients import async_views, views
+
+# ASGI mode serves the I/O-bound endpoints from async views
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('ingest/', views.submit_client, name='client-submit'),
+    path('ingest/', io_views.submit_client, name='client-submit'),
     path('', views.list_clients, name='client-list'),
 ]
@@ -1,25 +1,26 @@
 import logging
 import requests as http_requests
+from django.conf import settings
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from analytics.services import record_submission
 from clients.models import Client
-from clients.serializers import ClientSerializer, ClientSubmitSerializer
+from clients.serializers import ClientSerializer, ClientSubmitSerializer, client_rows
 from agents.services import send_client_whatsapp_notification
+from rivo_partner.compression import gzip_large
+from rivo_partner.db_router import replica_reads
+from rivo_partner.metrics import outbound_call
 
 logger = logging.getLogger(__name__)
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def submit_client(request):
-    """Submit a new client referral.
-    POST /api/v1/clients/ingest"""
-    agent = request.user
-    serializer = ClientSubmitSerializer(data=request.data, context={'agent': agent})
+def create_client(agent, data):
+    """Validate a referral submission and create the client. Raises ValidationError."""
+    serializer = ClientSubmitSerializer(data=data, context={'agent': agent})
     serializer.is_valid(raise_exception=True)
 
     client = Client.objects.create(
@@ -29,9 +30,12 @@ def submit_client(request):
         source_agent=agent,
         channel='PARTNER_PWA',
     )
+    record_submission(client, agent)
+    return client
 
-    # Push lead to Rivo CRM
-    crm_payload = {
+
+def crm_payload(client, agent):
+    return {
         'name': client.client_name,
         'phone': client.client_phone,
         'mortgage_amount': float(client.expected_mortgage_amount) if client.expected_mortgage_amount else None,
@@ -39,33 +43,58 @@ def submit_client(request):
         'channel': 'Freelance Network',
         'referrer_phone': agent.phone,
     }
-    try:
-        logger.info(f'Pushing lead to CRM: {crm_payload}')
-        crm_response = http_requests.post(
-            'https://rivo-backend-331738587654.asia-southeast1.run.app/api/leads/ingest/',
-            json=crm_payload,
-            timeout=10,
-        )
-        logger.info(f'CRM response [{crm_response.status_code}]: {crm_response.text[:500]}')
-        if crm_response.status_code in (200, 201):
-            try:
-                crm_data = crm_response.json()
-                if crm_data.get('lead_id'):
-                    client.crm_lead_id = crm_data['lead_id']
-                    client.save(update_fields=['crm_lead_id'])
-                    logger.info(f'CRM lead_id stored: {crm_data["lead_id"]}')
-            except ValueError:
-                logger.warning(f'CRM returned 200 but non-JSON body: {crm_response.text[:200]}')
-        else:
-            logger.warning(f'CRM rejected lead: {crm_response.status_code} — {crm_response.text[:500]}')
-    except Exception as e:
-        logger.error(f'Failed to push lead to Rivo CRM: {e}')
 
-    # Mark agent's first action
+
+def crm_lead_id(client, status_code, text, parse_json):
+    """The CRM lead id from a lead ingest response, or None."""
+    logger.info('CRM response [%s] for client %s', status_code, client.pk)
+    if status_code in (200, 201):
+        try:
+            return parse_json().get('lead_id')
+        except ValueError:
+            logger.warning('CRM returned 200 but non-JSON body: %.200s', text)
+    else:
+        logger.warning('CRM rejected lead: %s — %.500s', status_code, text)
+    return None
+
+
+def store_crm_response(client, status_code, text, parse_json):
+    """Record the CRM lead id from a lead ingest response."""
+    lead_id = crm_lead_id(client, status_code, text, parse_json)
+    if lead_id:
+        client.crm_lead_id = lead_id
+        client.save(update_fields=['crm_lead_id'])
+        logger.info('CRM lead_id stored: %s', lead_id)
+
+
+def mark_first_action(agent):
     if not agent.has_completed_first_action:
         agent.has_completed_first_action = True
         agent.save(update_fields=['has_completed_first_action'])
 
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_client(request):
+    """Submit a new client referral.
+    POST /api/v1/clients/ingest"""
+    agent = request.user
+    client = create_client(agent, request.data)
+
+    # Push lead to Rivo CRM
+    payload = crm_payload(client, agent)
+    try:
+        logger.info('Pushing lead to CRM: client=%s, agent=%s', client.pk, agent.phone)
+        with outbound_call('crm') as call:
+            crm_response = http_requests.post(settings.CRM_LEAD_INGEST_URL, json=payload, timeout=10)
+            call['ok'] = crm_response.status_code < 400
+        store_crm_response(client, crm_response.status_code, crm_response.text, crm_response.json)
+    except Exception as e:
+        logger.error('Failed to push lead to Rivo CRM: client=%s: %s', client.pk, e)
+
+    # Mark agent's first action
+    mark_first_action(agent)
+
     # Send WhatsApp template notification to client
     send_client_whatsapp_notification(
         client.client_phone,
@@ -76,8 +105,10 @@ def submit_client(request):
     return Response(ClientSerializer(client).data, status=status.HTTP_201_CREATED)
 
 
+@gzip_large
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def list_clients(request):
     """Get all clients referred by the authenticated agent.
     Supports search by name and filter by status."""
@@ -94,5 +125,4 @@ def list_clients(request):
     if status_filter and status_filter != 'ALL':
         clients = clients.filter(status=status_filter)
 
-    serializer = ClientSerializer(clients, many=True)
-    return Response(serializer.data)
+    return Response(client_rows.many(clients))
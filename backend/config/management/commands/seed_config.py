@@ -6,6 +6,11 @@ from config.models import AppConfig
 SEED_DATA = {
     'commission_min_percent': ('0.45', 'Minimum commission percentage'),
     'commission_max_percent': ('0.60', 'Maximum commission percentage'),
+    'commission_tiers': (
+        '[]',
+        'Commission tiers by mortgage amount, agent type and date — see clients/commission.py. '
+        'Empty means commission_min_percent for everyone, capped at commission_max_percent.',
+    ),
     'avg_payout': ('9000', 'Average payout per referred deal in AED'),
     'referrer_bonuses': ('[500, 500, 1000]', 'Referrer bonus amounts for first 3 disbursals across entire network'),
     'new_agent_bonuses': ('[1000, 750, 500]', 'New agent bonus amounts for their first 3 disbursed deals'),
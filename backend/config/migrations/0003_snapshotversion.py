@@ -0,0 +1,29 @@
+# Generated by Django 4.2.28 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config', '0002_configversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=50)),
+                ('agent_id', models.UUIDField()),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'snapshot_versions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='snapshotversion',
+            constraint=models.UniqueConstraint(fields=('agent_id', 'namespace'), name='one_snapshot_version'),
+        ),
+    ]
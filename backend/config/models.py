@@ -18,35 +18,13 @@ class AppConfig(models.Model):
 
     @classmethod
     def get_value(cls, key, default=None):
-        from django.core.cache import cache
-        cache_key = f'appconfig:{key}'
-        value = cache.get(cache_key)
-        if value is not None:
-            return value
-        try:
-            config = cls.objects.get(key=key)
-            value = cls._parse_value(config.value)
-            cache.set(cache_key, value, 3600)
-            return value
-        except cls.DoesNotExist:
-            return default
+        from config.snapshot import config_snapshot
+        return config_snapshot.values().get(key, default)
 
     @classmethod
     def get_all_config(cls):
-        from django.core.cache import cache
-        cache_key = 'appconfig:all'
-        configs = cache.get(cache_key)
-        if configs is not None:
-            return configs
-        configs = {c.key: cls._parse_value(c.value) for c in cls.objects.all()}
-        cache.set(cache_key, configs, 3600)
-        return configs
-
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        from django.core.cache import cache
-        cache.delete(f'appconfig:{self.key}')
-        cache.delete('appconfig:all')
+        from config.snapshot import config_snapshot
+        return dict(config_snapshot.values())
 
     @staticmethod
     def _parse_value(value):
@@ -57,6 +35,32 @@ class AppConfig(models.Model):
             return value
 
 
+class ConfigVersion(models.Model):
+    """Single-row global version counter, bumped on every AppConfig or
+    HomeBanner change.
+    Each process compares it against the version of its in-memory snapshot
+    to pick up changes made through any other worker or instance."""
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'config_version'
+
+    def __str__(self):
+        return f'Config version {self.version}'
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        from django.db.models import F
+        from django.utils import timezone
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
 class HomeBanner(models.Model):
     """Configurable banner carousel items for home screen."""
     title = models.CharField(max_length=255)
@@ -76,3 +80,23 @@ class HomeBanner(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class SnapshotVersion(models.Model):
+    """Version counter of one agent's snapshot in one namespace (see
+    rivo_partner.cache). Snapshots are kept per process under their version,
+    so this row is the only thing workers and instances share: bumping it
+    retires every cached copy at once. Lives here so it is always read from
+    primary, like ConfigVersion."""
+    namespace = models.CharField(max_length=50)
+    agent_id = models.UUIDField()
+    version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'snapshot_versions'
+        constraints = [
+            models.UniqueConstraint(fields=['agent_id', 'namespace'], name='one_snapshot_version'),
+        ]
+
+    def __str__(self):
+        return f'{self.namespace} v{self.version} for {self.agent_id}'
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.models import AppConfig, ConfigVersion, HomeBanner
+from config.snapshot import config_snapshot
+
+
+@receiver([post_save, post_delete], sender=AppConfig)
+@receiver([post_save, post_delete], sender=HomeBanner)
+def app_config_changed(sender, instance, **kwargs):
+    ConfigVersion.bump()
+    transaction.on_commit(config_snapshot.expire)
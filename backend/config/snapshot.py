@@ -0,0 +1,80 @@
+"""In-process AppConfig snapshot kept consistent across workers.
+
+Every process holds all config values in memory. At most once per
+APP_CONFIG_CHECK_INTERVAL seconds a read checks the global version in
+`config_version` (one indexed single-row query) and reloads when it moved.
+Only one thread reloads at a time; the others keep serving the previous
+snapshot instead of piling onto the database."""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigSnapshot:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._version = None
+        self._checked_at = 0
+
+    @property
+    def version(self):
+        self.values()
+        return self._version
+
+    def _check_interval(self):
+        return getattr(settings, 'APP_CONFIG_CHECK_INTERVAL', 5)
+
+    def _load(self):
+        from config.models import AppConfig, ConfigVersion
+        # Read the version first: a change landing between the two queries
+        # leaves us with an older version number and triggers another reload.
+        version = ConfigVersion.current()
+        values = {c.key: AppConfig._parse_value(c.value) for c in AppConfig.objects.all()}
+        self._values, self._version = values, version
+        logger.info('AppConfig snapshot loaded: version=%s, keys=%s', version, len(values))
+
+    def _refresh(self):
+        from config.models import ConfigVersion
+        if self._values is None or ConfigVersion.current() != self._version:
+            self._load()
+        self._checked_at = time.monotonic()
+
+    def values(self):
+        if self._values is None:
+            # Cold start: everyone waits for the single loader
+            with self._lock:
+                if self._values is None:
+                    self._refresh()
+        elif time.monotonic() - self._checked_at >= self._check_interval():
+            if self._lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._checked_at >= self._check_interval():
+                        self._refresh()
+                except DatabaseError:
+                    logger.exception('AppConfig refresh failed, serving version %s', self._version)
+                    self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self._values
+
+    def expire(self):
+        """Force a version check on the next read in this process."""
+        self._checked_at = 0
+
+
+config_snapshot = ConfigSnapshot()
+
+
+def warm_up():
+    """Load the snapshot before the first request is served."""
+    try:
+        config_snapshot.values()
+    except DatabaseError:
+        logger.exception('AppConfig warm-up failed; will load on first request')
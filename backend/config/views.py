@@ -1,10 +1,16 @@
-import json
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 
 from config.models import AppConfig, HomeBanner
 from config.serializers import HomeBannerSerializer
+from config.snapshot import config_snapshot
 
 
 # Hardcoded initial defaults — admin overrides these via Django admin (AppConfig table)
@@ -19,12 +25,12 @@ DEFAULTS = {
     'whatsapp_business': 'https://wa.me/971545079577',
 }
 
+# (config version, rendered JSON body, ETag) — rebuilt once per version
+_payload = (None, b'', '')
+_payload_lock = threading.Lock()
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def get_config(request):
-    """Get all app configuration. Values come from DB (AppConfig).
-    Falls back to hardcoded defaults if not set in DB."""
+
+def _build_payload():
     config = AppConfig.get_all_config()
 
     for key, default in DEFAULTS.items():
@@ -35,4 +41,36 @@ def get_config(request):
     banners = HomeBanner.objects.filter(is_active=True)
     config['home_banners'] = HomeBannerSerializer(banners, many=True).data
 
-    return Response(config)
+    body = JSONRenderer().render(config)
+    return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def config_payload():
+    """Rendered config payload and its ETag for the current config version."""
+    global _payload
+    version = config_snapshot.version
+    if _payload[0] != version:
+        with _payload_lock:
+            if _payload[0] != version:
+                _payload = (version, *_build_payload())
+    return _payload[1], _payload[2]
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_config(request):
+    """Get all app configuration. Values come from DB (AppConfig).
+    Falls back to hardcoded defaults if not set in DB.
+    Served pre-rendered with a strong ETag; a matching If-None-Match gets a
+    304 without touching the database."""
+    body, etag = config_payload()
+    cache_control = f'public, max-age={settings.CONFIG_MAX_AGE}'
+
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
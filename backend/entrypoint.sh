@@ -3,9 +3,13 @@ set -e
 
 echo "Running migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 echo "Seeding config..."
 python manage.py seed_config
 
 echo "Starting server..."
+if [ "$SERVER_MODE" = "asgi" ]; then
+    exec gunicorn rivo_partner.asgi:application --bind 0.0.0.0:$PORT --workers ${WEB_CONCURRENCY:-2} --worker-class uvicorn.workers.UvicornWorker --timeout 120
+fi
 exec gunicorn rivo_partner.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --threads 2 --timeout 120
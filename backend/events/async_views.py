@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+
+from events.fanout import broker
+from events.services import (
+    HEARTBEAT_SECONDS, KEEP_ALIVE, RETRY_MS, agent_for_ticket, is_complete, last_event_id,
+    latest_event_id, missed_events, sse,
+)
+
+
+def _stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _events(agent_id, after_id, seconds):
+    loop = asyncio.get_running_loop()
+    inbox = asyncio.Queue()
+    unsubscribe = broker.subscribe(agent_id, lambda message: loop.call_soon_threadsafe(inbox.put_nowait, message))
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        if after_id is None:
+            after_id = await sync_to_async(latest_event_id)(agent_id)
+        else:
+            for message in await sync_to_async(missed_events)(agent_id, after_id):
+                after_id = message['id']
+                yield sse(message)
+        deadline = time.monotonic() + seconds
+        while (left := deadline - time.monotonic()) > 0:
+            try:
+                message = await asyncio.wait_for(inbox.get(), min(HEARTBEAT_SECONDS, left))
+            except asyncio.TimeoutError:
+                yield KEEP_ALIVE
+                continue
+            if not is_complete(message):
+                for message in await sync_to_async(missed_events)(agent_id, after_id):
+                    after_id = message['id']
+                    yield sse(message)
+            elif message['id'] > after_id:
+                after_id = message['id']
+                yield sse(message)
+    finally:
+        unsubscribe()
+
+
+async def stream(request):
+    """Server-sent events for the ticket's agent (ASGI mode only). An open
+    stream waits on the event loop without holding a thread; it closes after
+    EVENTS_STREAM_SECONDS and EventSource reconnects, resuming from
+    Last-Event-ID."""
+    agent = await sync_to_async(agent_for_ticket)(request.GET.get('ticket', ''))
+    if agent is None:
+        return JsonResponse({'detail': 'Invalid or expired ticket.'}, status=403)
+    return _stream_response(_events(agent.pk, last_event_id(request), settings.EVENTS_STREAM_SECONDS))
@@ -0,0 +1,149 @@
+"""Fan-out of agent events to the event streams open in this process.
+
+publish() stores the event and announces it. With EVENTS_FANOUT=postgres
+the announcement is a NOTIFY in the event's own transaction, delivered on
+commit to every process; otherwise (one process, development, SQLite) it
+goes straight to this process's broker on commit. Each process holds one
+LISTEN connection, opened with its first stream. A notification carries
+the whole event, so handing it to any number of open streams costs no
+query; only an event too large for a notification goes out as its id,
+and the streams of that agent read it from the table."""
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+
+from events.models import AgentEvent
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'agent_events'
+# Postgres caps a NOTIFY payload at 8000 bytes
+NOTIFY_MAX_BYTES = 7900
+# Sent to every stream after the listener reconnects: notifications may have been missed
+RESYNC = {'resync': True}
+
+
+def event_message(event):
+    return {
+        'id': event.id,
+        'agent': str(event.agent_id),
+        'kind': event.kind,
+        'data': event.data,
+        'created_at': event.created_at,
+    }
+
+
+def _notify_enabled(db=connection):
+    return settings.EVENTS_FANOUT == 'postgres' and db.vendor == 'postgresql'
+
+
+def publish(agent_id, kind, data):
+    """Record an event for the agent and push it to their open streams once
+    the current transaction commits. `data` must be JSON-serializable."""
+    if not agent_id:
+        return None
+    event = AgentEvent.objects.create(agent_id=agent_id, kind=kind, data=data)
+    message = event_message(event)
+    if _notify_enabled():
+        payload = json.dumps(message, cls=DjangoJSONEncoder)
+        if len(payload.encode()) > NOTIFY_MAX_BYTES:
+            payload = json.dumps({'id': event.id, 'agent': message['agent']})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+    else:
+        transaction.on_commit(lambda: broker.dispatch(message))
+    return event
+
+
+class Broker:
+    """Agent id -> the deliver callbacks of that agent's open streams.
+    Callbacks run on the listener thread (or the publishing thread) and
+    must not block."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._listener = None
+
+    def subscribe(self, agent_id, deliver):
+        """Returns the function that unsubscribes."""
+        key = str(agent_id)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(deliver)
+        self._ensure_listener()
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(key, set())
+                callbacks.discard(deliver)
+                if not callbacks:
+                    self._subscribers.pop(key, None)
+        return unsubscribe
+
+    def dispatch(self, message):
+        with self._lock:
+            if message is RESYNC:
+                targets = [deliver for callbacks in self._subscribers.values() for deliver in callbacks]
+            else:
+                targets = list(self._subscribers.get(message['agent'], ()))
+        for deliver in targets:
+            try:
+                deliver(message)
+            except Exception:
+                logger.exception('Event delivery failed')
+
+    def _ensure_listener(self):
+        if not _notify_enabled(connections['default']):
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='agent-events-listener', daemon=True)
+                self._listener.start()
+
+    def _connect(self):
+        db = connections['default']
+        params = db.get_connection_params()
+        # LISTEN needs a session of its own — not a transaction-mode pooler
+        if settings.EVENTS_LISTEN_PORT:
+            params['port'] = settings.EVENTS_LISTEN_PORT
+        params['application_name'] = 'rivo-partners-events'
+        conn = db.Database.connect(**params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    def _listen(self):
+        backoff, connected_before = 1, False
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                if connected_before:
+                    self.dispatch(RESYNC)
+                connected_before, backoff = True, 1
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.dispatch(json.loads(conn.notifies.pop(0).payload))
+            except Exception as e:
+                logger.warning('Agent event listener disconnected: %s; retrying in %ss', e, backoff)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+broker = Broker()
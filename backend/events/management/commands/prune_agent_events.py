@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from events.services import EVENT_RETENTION, prune_events
+
+
+class Command(BaseCommand):
+    help = f'Delete agent events older than {EVENT_RETENTION.days} days (run daily)'
+
+    def handle(self, *args, **options):
+        deleted = prune_events()
+        self.stdout.write(self.style.SUCCESS(f'Done. {deleted} events deleted.'))
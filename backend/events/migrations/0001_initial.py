@@ -0,0 +1,32 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('agents', '0004_accountdeletionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('client_status', 'Client status changed'), ('bonus_awarded', 'Bonus awarded'), ('network_signup', 'Referred agent signed up')], max_length=30)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='agents.agent')),
+            ],
+            options={
+                'db_table': 'agent_events',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['agent', 'id'], name='agent_event_agent_i_e55e06_idx'), models.Index(fields=['created_at'], name='agent_event_created_d16115_idx')],
+            },
+        ),
+    ]
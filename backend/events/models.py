@@ -0,0 +1,29 @@
+from django.db import models
+from django.utils import timezone
+
+
+class AgentEvent(models.Model):
+    """Something an agent's open app should hear about right away. The id is
+    the SSE event id a reconnecting stream resumes from."""
+    KIND_CHOICES = [
+        ('client_status', 'Client status changed'),
+        ('bonus_awarded', 'Bonus awarded'),
+        ('network_signup', 'Referred agent signed up'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    agent = models.ForeignKey('agents.Agent', on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'agent_events'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['agent', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} for {self.agent_id}'
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from events.fanout import event_message
+from events.models import AgentEvent
+
+TICKET_SALT = 'rivo.events'
+# A stream resuming from an older event gets what is left
+EVENT_RETENTION = timedelta(days=7)
+# Replayed per query when a stream resumes from Last-Event-ID
+REPLAY_BATCH = 200
+# Tells EventSource how long to wait before reconnecting (ms)
+RETRY_MS = 3000
+# Comment line sent when nothing else was, so proxies keep the stream open
+HEARTBEAT_SECONDS = 15
+KEEP_ALIVE = ': keep-alive\n\n'
+
+
+def _token_fingerprint(agent):
+    return hashlib.sha256(agent.device_token.encode()).hexdigest()[:16]
+
+
+def issue_ticket(agent):
+    """EventSource can't send an Authorization header, so the stream URL
+    carries a signed ticket instead. It names the device token it was issued
+    for: logging out (a new token) revokes it."""
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(f'{agent.pk}:{_token_fingerprint(agent)}')
+
+
+def agent_for_ticket(ticket):
+    """The active agent the ticket was issued to, or None."""
+    from agents.models import Agent
+
+    try:
+        value = signing.TimestampSigner(salt=TICKET_SALT).unsign(ticket, max_age=settings.EVENTS_TICKET_MAX_AGE)
+        agent_id, fingerprint = value.split(':')
+        agent = Agent.objects.get(pk=agent_id, is_active=True)
+    except (signing.BadSignature, ValueError, Agent.DoesNotExist):
+        return None
+    if not agent.device_token or _token_fingerprint(agent) != fingerprint:
+        return None
+    return agent
+
+
+def last_event_id(request):
+    """Where a stream resumes: the Last-Event-ID header EventSource sends on
+    reconnect, or ?last_event_id= for the first connection of a page."""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', '')
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+
+def latest_event_id(agent_id):
+    return AgentEvent.objects.filter(agent_id=agent_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def missed_events(agent_id, after_id):
+    """The agent's events after `after_id`, oldest first."""
+    messages = []
+    while True:
+        batch = list(AgentEvent.objects.filter(agent_id=agent_id, id__gt=after_id).order_by('id')[:REPLAY_BATCH])
+        messages += [event_message(event) for event in batch]
+        if len(batch) < REPLAY_BATCH:
+            return messages
+        after_id = batch[-1].id
+
+
+def sse(message):
+    data = json.dumps({**message['data'], 'created_at': message['created_at']}, cls=DjangoJSONEncoder)
+    return f'id: {message["id"]}\nevent: {message["kind"]}\ndata: {data}\n\n'
+
+
+def is_complete(message):
+    """False for the listener's RESYNC marker and for notifications too large
+    to carry the event: the stream reads what it missed from the table."""
+    return 'kind' in message
+
+
+def prune_events():
+    """Delete events past EVENT_RETENTION. Returns the count."""
+    return AgentEvent.objects.filter(created_at__lt=timezone.now() - EVENT_RETENTION).delete()[0]
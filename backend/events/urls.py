@@ -0,0 +1,11 @@
+from django.urls import path
+from django.conf import settings
+from events import async_views, views
+
+# Only ASGI mode streams; under WSGI stream/ answers 204 (see events.views.stream)
+io_views = async_views if settings.ASYNC_VIEWS else views
+
+urlpatterns = [
+    path('ticket/', views.ticket, name='events-ticket'),
+    path('stream/', io_views.stream, name='events-stream'),
+]
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from events.services import issue_ticket
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ticket(request):
+    """A ticket for GET /events/stream/?ticket=…"""
+    return Response({'ticket': issue_ticket(request.user)})
+
+
+def stream(request):
+    """Streams are served only in ASGI mode (events.async_views.stream):
+    under WSGI each open stream would hold one of the few worker threads.
+    204 tells EventSource not to reconnect; the app keeps polling."""
+    return HttpResponse(status=204)
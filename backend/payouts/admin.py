@@ -0,0 +1,35 @@
+from django.contrib import admin
+from payouts.models import PayoutBatch, PayoutRun
+from rivo_partner.admin import ScalableAdmin
+
+
+class ReadOnlyAdmin(ScalableAdmin):
+    """Runs and batches change only through the payout commands."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PayoutRun)
+class PayoutRunAdmin(ReadOnlyAdmin):
+    list_display = ['created_at', 'period_end', 'status', 'batch_count', 'total_amount', 'exported_at', 'paid_at',
+                    'settled_outside']
+    list_filter = ['status', 'settled_outside']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(ReadOnlyAdmin):
+    list_display = ['agent', 'amount', 'item_count', 'status', 'run', 'paid_at']
+    list_filter = ['status']
+    list_select_related = ['agent', 'run']
+    search_fields = ['agent__name']
+    phone_search_fields = ['agent__phone']
+    agent_code_search_fields = ['agent__agent_code']
+    date_hierarchy = 'created_at'
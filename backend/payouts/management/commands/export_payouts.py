@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payouts.models import PayoutRun
+from payouts.services import PayoutError, write_bank_file
+
+
+class Command(BaseCommand):
+    help = "Write a payout run's bank-upload CSV and mark the run exported"
+
+    def add_arguments(self, parser):
+        parser.add_argument('run', help='Payout run id')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            run = PayoutRun.objects.get(pk=options['run'])
+        except (PayoutRun.DoesNotExist, ValueError):
+            raise CommandError(f'No payout run {options["run"]}')
+        try:
+            if options['output']:
+                with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                    write_bank_file(run, out)
+                self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+            else:
+                write_bank_file(run, sys.stdout)
+        except PayoutError as e:
+            raise CommandError(str(e))
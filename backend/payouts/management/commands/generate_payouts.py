@@ -0,0 +1,38 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payouts.services import generate_payout_run
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+class Command(BaseCommand):
+    help = 'Gather unpaid earnings into a new payout run, one batch per agent'
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group()
+        cutoff.add_argument('--until', type=datetime.date.fromisoformat,
+                            help='YYYY-MM-DD, inclusive: only earnings up to the end of this day (default: now)')
+        cutoff.add_argument(
+            '--settled-before', type=datetime.date.fromisoformat,
+            help='YYYY-MM-DD: record earnings before this day as already paid outside the app (a settled run '
+                 'that is never exported). Run once, before the first real run.',
+        )
+
+    def handle(self, *args, **options):
+        if options['settled_before']:
+            run = generate_payout_run(until=_start_of(options['settled_before']), settled=True)
+        elif options['until']:
+            run = generate_payout_run(until=_start_of(options['until'] + datetime.timedelta(days=1)))
+        else:
+            run = generate_payout_run()
+        if run is None:
+            self.stdout.write('Nothing to pay.')
+            return
+        settled = ' (settled, not exported)' if run.settled_outside else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'Run {run.pk}{settled}: {run.batch_count} agents, AED {run.total_amount}.'))
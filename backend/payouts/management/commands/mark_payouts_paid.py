@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payouts.models import PayoutRun
+from payouts.services import PayoutError, mark_run_paid
+
+
+class Command(BaseCommand):
+    help = 'Mark an exported payout run paid once the bank has processed it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('run', help='Payout run id')
+        parser.add_argument(
+            '--failed', nargs='+', default=[], metavar='AGENT_CODE',
+            help='Agents whose transfer was rejected; their earnings go into the next run',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            run = PayoutRun.objects.get(pk=options['run'])
+        except (PayoutRun.DoesNotExist, ValueError):
+            raise CommandError(f'No payout run {options["run"]}')
+        try:
+            paid, failed = mark_run_paid(run, options['failed'])
+        except PayoutError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Done. {paid} batches paid, {failed} failed.'))
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('agents', '0003_agent_created_at_index'),
+        ('clients', '0004_client_indexes'),
+        ('referrals', '0002_bonus_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('item_count', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payout_batches', to='agents.agent')),
+            ],
+            options={
+                'db_table': 'payout_batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PayoutRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('DRAFT', 'Draft'), ('EXPORTED', 'Exported'), ('PAID', 'Paid')], default='DRAFT', max_length=20)),
+                ('batch_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exported_at', models.DateTimeField(blank=True, null=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'payout_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PayoutItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('COMMISSION', 'Commission'), ('REFERRAL_BONUS', 'Referral bonus'), ('NEW_AGENT_BONUS', 'New agent bonus')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='agents.agent')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='payouts.payoutbatch')),
+                ('client', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payout_item', to='clients.client')),
+                ('new_agent_bonus', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payout_item', to='referrals.newagentbonus')),
+                ('referral_bonus', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payout_item', to='referrals.referralbonus')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='payouts.payoutrun')),
+            ],
+            options={
+                'db_table': 'payout_items',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='payoutbatch',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='payouts.payoutrun'),
+        ),
+        migrations.AddIndex(
+            model_name='payoutbatch',
+            index=models.Index(fields=['agent', 'status'], name='payout_batc_agent_i_4c2c51_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payoutbatch',
+            constraint=models.UniqueConstraint(fields=('run', 'agent'), name='unique_run_agent'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payoutrun',
+            name='period_end',
+            field=models.DateTimeField(blank=True, help_text='Earnings dated before this are included', null=True),
+        ),
+        migrations.AddField(
+            model_name='payoutrun',
+            name='settled_outside',
+            field=models.BooleanField(default=False, help_text='Earnings paid before payout runs existed; recorded as paid, never exported'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+import uuid
+from django.db import models
+
+
+class PayoutRun(models.Model):
+    """One payout cycle: every earning up to period_end not yet in a payout,
+    grouped into a batch per agent, exported as one bank-upload file and
+    paid together."""
+    STATUS_CHOICES = [
+        ('DRAFT', 'Draft'),
+        ('EXPORTED', 'Exported'),
+        ('PAID', 'Paid'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
+    batch_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    period_end = models.DateTimeField(null=True, blank=True, help_text='Earnings dated before this are included')
+    settled_outside = models.BooleanField(
+        default=False, help_text='Earnings paid before payout runs existed; recorded as paid, never exported')
+    created_at = models.DateTimeField(auto_now_add=True)
+    exported_at = models.DateTimeField(null=True, blank=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'payout_runs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Payout {self.created_at:%Y-%m-%d %H:%M} - {self.status} - AED {self.total_amount}'
+
+
+class PayoutBatch(models.Model):
+    """What one agent is paid in a run."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PAID', 'Paid'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run = models.ForeignKey(PayoutRun, on_delete=models.CASCADE, related_name='batches')
+    agent = models.ForeignKey('agents.Agent', on_delete=models.PROTECT, related_name='payout_batches')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    paid_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'payout_batches'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'agent'], name='unique_run_agent'),
+        ]
+        indexes = [
+            models.Index(fields=['agent', 'status']),
+        ]
+
+    def __str__(self):
+        return f'{self.agent} - AED {self.amount} - {self.status}'
+
+
+class PayoutItem(models.Model):
+    """One earning in a batch: a disbursed client's commission or a bonus.
+    The unique source columns make sure an earning is paid out once; they
+    are cleared, not cascaded, if the bonus is deleted with its account."""
+    KIND_CHOICES = [
+        ('COMMISSION', 'Commission'),
+        ('REFERRAL_BONUS', 'Referral bonus'),
+        ('NEW_AGENT_BONUS', 'New agent bonus'),
+    ]
+
+    run = models.ForeignKey(PayoutRun, on_delete=models.CASCADE, related_name='items')
+    batch = models.ForeignKey(PayoutBatch, null=True, blank=True, on_delete=models.CASCADE, related_name='items')
+    agent = models.ForeignKey('agents.Agent', on_delete=models.PROTECT, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    client = models.OneToOneField(
+        'clients.Client', null=True, blank=True, on_delete=models.SET_NULL, related_name='payout_item')
+    referral_bonus = models.OneToOneField(
+        'referrals.ReferralBonus', null=True, blank=True, on_delete=models.SET_NULL, related_name='payout_item')
+    new_agent_bonus = models.OneToOneField(
+        'referrals.NewAgentBonus', null=True, blank=True, on_delete=models.SET_NULL, related_name='payout_item')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'payout_items'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} - AED {self.amount}'
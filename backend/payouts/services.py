@@ -0,0 +1,177 @@
+"""Payout runs: gather unpaid earnings, export the bank file, mark paid.
+
+An earning — a disbursed client's commission_amount, a ReferralBonus or a
+NewAgentBonus — belongs to at most one PayoutItem (unique source columns).
+generate_payout_run() claims every unclaimed earning dated before the run's
+cutoff with one INSERT ... SELECT per kind; ON CONFLICT DO NOTHING makes a
+concurrent run skip what another has just claimed, so nothing is paid
+twice. Items of a FAILED batch are released and picked up by the next run.
+
+A commission is dated by its client's first DISBURSED status event (the
+client's updated_at when it has none), a bonus by its created_at.
+Earnings paid before payout runs existed are recorded once, on the first
+deploy, as a settled run: `generate_payouts --settled-before DATE` claims
+them into a run that is PAID at once and never exported."""
+import csv
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from payouts.models import PayoutBatch, PayoutItem, PayoutRun
+
+logger = logging.getLogger(__name__)
+
+BANK_FILE_HEADERS = ['reference', 'beneficiary_code', 'beneficiary_name', 'phone', 'email', 'amount', 'currency',
+                     'items']
+
+
+class PayoutError(Exception):
+    pass
+
+
+def _claim_sql():
+    from analytics.models import ClientStatusEvent
+    from clients.models import Client
+    from referrals.models import NewAgentBonus, ReferralBonus
+
+    items = PayoutItem._meta.db_table
+    columns = 'run_id, agent_id, kind, client_id, referral_bonus_id, new_agent_bonus_id, amount, created_at'
+    return [
+        f'''INSERT INTO {items} ({columns})
+            SELECT %s, c.source_agent_id, 'COMMISSION', c.id, NULL, NULL, c.commission_amount, %s
+            FROM {Client._meta.db_table} c
+            WHERE c.status = 'DISBURSED' AND c.commission_amount > 0 AND c.source_agent_id IS NOT NULL
+              AND COALESCE((SELECT MIN(e.created_at) FROM {ClientStatusEvent._meta.db_table} e
+                            WHERE e.client_id = c.id AND e.to_status = 'DISBURSED'), c.updated_at) < %s
+              AND NOT EXISTS (SELECT 1 FROM {items} i WHERE i.client_id = c.id)
+            ON CONFLICT DO NOTHING''',
+        f'''INSERT INTO {items} ({columns})
+            SELECT %s, b.referrer_id, 'REFERRAL_BONUS', NULL, b.id, NULL, b.amount, %s
+            FROM {ReferralBonus._meta.db_table} b
+            WHERE b.amount > 0 AND b.created_at < %s
+              AND NOT EXISTS (SELECT 1 FROM {items} i WHERE i.referral_bonus_id = b.id)
+            ON CONFLICT DO NOTHING''',
+        f'''INSERT INTO {items} ({columns})
+            SELECT %s, b.agent_id, 'NEW_AGENT_BONUS', NULL, NULL, b.id, b.amount, %s
+            FROM {NewAgentBonus._meta.db_table} b
+            WHERE b.amount > 0 AND b.created_at < %s
+              AND NOT EXISTS (SELECT 1 FROM {items} i WHERE i.new_agent_bonus_id = b.id)
+            ON CONFLICT DO NOTHING''',
+    ]
+
+
+def _invalidate_home(run):
+    from agents.services import invalidate_home_snapshot
+    for agent_id in run.batches.values_list('agent_id', flat=True).iterator(chunk_size=2000):
+        invalidate_home_snapshot(agent_id)
+
+
+def generate_payout_run(until=None, settled=False):
+    """Claim every unpaid earning dated before `until` (default: now) into a
+    new run, one batch per agent. A `settled` run records earnings already
+    paid outside the app: it is PAID at once and can't be exported.
+    Returns the run, or None when there is nothing to pay."""
+    now = timezone.now()
+    until = min(until or now, now)
+    with transaction.atomic():
+        run = PayoutRun.objects.create(period_end=until, settled_outside=settled)
+        created_at = PayoutItem._meta.get_field('created_at')
+        params = [
+            PayoutRun._meta.pk.get_db_prep_value(run.pk, connection),
+            created_at.get_db_prep_value(now, connection),
+            created_at.get_db_prep_value(until, connection),
+        ]
+        claimed = 0
+        with connection.cursor() as cursor:
+            for sql in _claim_sql():
+                cursor.execute(sql, params)
+                claimed += cursor.rowcount
+        if not claimed:
+            transaction.set_rollback(True)
+            return None
+
+        per_agent = PayoutItem.objects.filter(run=run).order_by().values('agent').annotate(
+            amount=Sum('amount'), items=Count('pk'))
+        PayoutBatch.objects.bulk_create([
+            PayoutBatch(run=run, agent_id=row['agent'], amount=row['amount'], item_count=row['items'])
+            for row in per_agent
+        ], batch_size=1000)
+        PayoutItem.objects.filter(run=run).update(batch=Subquery(
+            PayoutBatch.objects.filter(run=run, agent=OuterRef('agent')).values('pk')[:1]))
+
+        totals = run.batches.aggregate(count=Count('pk'), amount=Sum('amount'))
+        run.batch_count, run.total_amount = totals['count'], totals['amount']
+        if settled:
+            run.batches.update(status='PAID', paid_at=now)
+            run.status, run.paid_at = 'PAID', now
+        run.save(update_fields=['batch_count', 'total_amount', 'status', 'paid_at'])
+
+    _invalidate_home(run)
+    logger.info('Payout run %s%s: %d items before %s, %d agents, AED %s', run.pk, ' (settled)' if settled else '',
+                claimed, until.isoformat(), run.batch_count, run.total_amount, extra={'audit': True})
+    return run
+
+
+def write_bank_file(run, out):
+    """Write the run's bank-upload CSV (one transfer per agent) to the text
+    stream `out` and mark the run EXPORTED."""
+    if run.status == 'PAID':
+        raise PayoutError('Run is already paid.')
+    writer = csv.writer(out)
+    writer.writerow(BANK_FILE_HEADERS)
+    batches = (
+        run.batches.filter(status='PENDING').order_by('agent__agent_code')
+        .values_list('pk', 'agent__agent_code', 'agent__name', 'agent__phone', 'agent__email', 'amount', 'item_count')
+    )
+    for pk, code, name, phone, email, amount, items in batches.iterator(chunk_size=2000):
+        writer.writerow([f'PAY-{pk.hex[:12].upper()}', code, name, phone, email, amount, 'AED', items])
+
+    PayoutRun.objects.filter(pk=run.pk, status='DRAFT').update(status='EXPORTED', exported_at=timezone.now())
+
+
+def mark_run_paid(run, failed_agent_codes=()):
+    """The bank processed the file: batches of failed_agent_codes are FAILED
+    (their items released for the next run), all other pending batches PAID.
+    A code with no batch to fail raises PayoutError and changes nothing, so a
+    typo can't mark a rejected transfer paid. Running it again for a paid run
+    with the same codes changes nothing. Returns (paid, failed)."""
+    codes = {code.upper() for code in failed_agent_codes}
+    with transaction.atomic():
+        run = PayoutRun.objects.select_for_update().get(pk=run.pk)
+        if run.status not in ('EXPORTED', 'PAID'):
+            raise PayoutError('Export the bank file before marking the run paid.')
+        failed = run.batches.filter(
+            status='FAILED' if run.status == 'PAID' else 'PENDING', agent__agent_code__in=codes,
+        )
+        unmatched = codes - set(failed.values_list('agent__agent_code', flat=True))
+        if unmatched:
+            raise PayoutError(f'No {"failed" if run.status == "PAID" else "pending"} batch in this run for: '
+                              f'{", ".join(sorted(unmatched))}')
+        if run.status == 'PAID':
+            return 0, 0
+        now = timezone.now()
+        PayoutItem.objects.filter(batch__in=failed).delete()
+        failed_count = failed.update(status='FAILED')
+        paid_count = run.batches.filter(status='PENDING').update(status='PAID', paid_at=now)
+        run.status, run.paid_at = 'PAID', now
+        run.save(update_fields=['status', 'paid_at'])
+
+    _invalidate_home(run)
+    logger.info('Payout run %s paid: %d batches paid, %d failed', run.pk, paid_count, failed_count,
+                extra={'audit': True})
+    return paid_count, failed_count
+
+
+def agent_payout_totals(agent_id):
+    """{'paid': ..., 'pending': ...} from the agent's batches — pending is
+    batched but not yet paid."""
+    totals = {'paid': 0, 'pending': 0}
+    rows = (
+        PayoutBatch.objects.filter(agent_id=agent_id, status__in=['PENDING', 'PAID'])
+        .order_by().values('status').annotate(total=Sum('amount'))
+    )
+    for row in rows:
+        totals[row['status'].lower()] = row['total']
+    return totals
@@ -1,20 +1,29 @@
 from django.contrib import admin
 from referrals.models import ReferralBonus, NewAgentBonus
+from rivo_partner.admin import ScalableAdmin
 
 
 @admin.register(ReferralBonus)
-class ReferralBonusAdmin(admin.ModelAdmin):
+class ReferralBonusAdmin(ScalableAdmin):
     list_display = ['referrer', 'triggered_by_agent', 'deal_number', 'amount', 'created_at']
     list_filter = ['deal_number', 'created_at']
+    list_select_related = ['referrer', 'triggered_by_agent']
     search_fields = ['referrer__name', 'referrer__phone', 'triggered_by_agent__name']
+    phone_search_fields = ['referrer__phone', 'triggered_by_agent__phone']
+    agent_code_search_fields = ['referrer__agent_code', 'triggered_by_agent__agent_code']
+    date_hierarchy = 'created_at'
     readonly_fields = ['id', 'created_at']
     raw_id_fields = ['referrer', 'triggered_by_agent', 'triggered_by_client']
 
 
 @admin.register(NewAgentBonus)
-class NewAgentBonusAdmin(admin.ModelAdmin):
+class NewAgentBonusAdmin(ScalableAdmin):
     list_display = ['agent', 'deal_number', 'amount', 'created_at']
     list_filter = ['deal_number', 'created_at']
+    list_select_related = ['agent']
     search_fields = ['agent__name', 'agent__phone']
+    phone_search_fields = ['agent__phone']
+    agent_code_search_fields = ['agent__agent_code']
+    date_hierarchy = 'created_at'
     readonly_fields = ['id', 'created_at']
     raw_id_fields = ['agent', 'client']
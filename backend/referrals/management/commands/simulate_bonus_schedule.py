@@ -0,0 +1,135 @@
+import json
+from array import array
+from collections import defaultdict
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from agents.models import Agent
+from clients.models import Client
+from config.models import AppConfig
+from referrals.models import ReferralBonus, NewAgentBonus
+
+
+def _parse_schedule(raw, name):
+    try:
+        schedule = json.loads(raw)
+        return [Decimal(str(amount)) for amount in schedule]
+    except (TypeError, ValueError, ArithmeticError):
+        raise CommandError(f'--{name} must be a JSON list of amounts, e.g. [500, 500, 1000]')
+
+
+def _fmt(schedule):
+    return '[' + ', '.join(f'{amount:g}' for amount in schedule) + ']'
+
+
+def _prefix(schedule):
+    """prefix[n] = total paid for an agent's first n deals."""
+    return [Decimal(0)] + list(accumulate(schedule))
+
+
+class Command(BaseCommand):
+    help = ('Replay every historical DISBURSED client through the disbursal bonus rules '
+            '(referrals.services.process_disbursal_bonuses) under a proposed schedule and '
+            'report total cost and per-agent deltas against the current schedule')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--referrer-bonuses', help='Proposed referrer schedule, JSON list. Defaults to current.')
+        parser.add_argument('--new-agent-bonuses', help='Proposed new agent schedule, JSON list. Defaults to current.')
+        parser.add_argument('--top', type=int, default=20, help='Number of largest per-agent deltas to list')
+
+    def handle(self, *args, **options):
+        current_referrer = [Decimal(str(a)) for a in AppConfig.get_value('referrer_bonuses', [500, 500, 1000])]
+        current_new_agent = [Decimal(str(a)) for a in AppConfig.get_value('new_agent_bonuses', [1000, 750, 500])]
+        proposed_referrer = _parse_schedule(options['referrer_bonuses'], 'referrer-bonuses') \
+            if options['referrer_bonuses'] else current_referrer
+        proposed_new_agent = _parse_schedule(options['new_agent_bonuses'], 'new-agent-bonuses') \
+            if options['new_agent_bonuses'] else current_new_agent
+
+        # 1. Stream the disbursal history once, in disbursal order, into
+        #    per-deal sequence numbers. No ORM access per row.
+        deals = defaultdict(int)           # agent -> own disbursed deals so far
+        network_deals = defaultdict(int)   # referrer -> network disbursals so far
+        months = []
+        deal_numbers = array('I')
+        network_deal_numbers = array('I')  # 0 when the agent has no referrer
+
+        history = Client.objects.filter(
+            status='DISBURSED', source_agent__isnull=False,
+        ).order_by('updated_at', 'pk').values_list(
+            'source_agent_id', 'source_agent__referred_by_id', 'updated_at',
+        )
+        for agent_id, referrer_id, disbursed_at in history.iterator(chunk_size=5000):
+            deals[agent_id] += 1
+            deal_numbers.append(deals[agent_id])
+            if referrer_id:
+                network_deals[referrer_id] += 1
+                network_deal_numbers.append(network_deals[referrer_id])
+            else:
+                network_deal_numbers.append(0)
+            months.append(disbursed_at.strftime('%Y-%m'))
+
+        if not months:
+            self.stdout.write('No disbursed clients to replay.')
+            return
+
+        # 2. Per-agent totals are prefix sums of the schedule at the agent's
+        #    (capped) deal count — one lookup per agent per schedule.
+        def per_agent(new_agent_schedule, referrer_schedule):
+            new_prefix, ref_prefix = _prefix(new_agent_schedule), _prefix(referrer_schedule)
+            totals = defaultdict(Decimal)
+            for agent_id, n in deals.items():
+                totals[agent_id] += new_prefix[min(n, len(new_agent_schedule))]
+            for referrer_id, n in network_deals.items():
+                totals[referrer_id] += ref_prefix[min(n, len(referrer_schedule))]
+            return totals
+
+        # 3. Cost per month walks the precomputed sequence numbers.
+        def per_month(new_agent_schedule, referrer_schedule):
+            padded_new = [Decimal(0)] + new_agent_schedule
+            padded_ref = [Decimal(0)] + referrer_schedule
+            totals = defaultdict(Decimal)
+            for month, n, m in zip(months, deal_numbers, network_deal_numbers):
+                if n < len(padded_new):
+                    totals[month] += padded_new[n]
+                if m < len(padded_ref):
+                    totals[month] += padded_ref[m]
+            return totals
+
+        baseline = per_agent(current_new_agent, current_referrer)
+        proposed = per_agent(proposed_new_agent, proposed_referrer)
+        baseline_months = per_month(current_new_agent, current_referrer)
+        proposed_months = per_month(proposed_new_agent, proposed_referrer)
+
+        baseline_total = sum(baseline.values(), Decimal(0))
+        proposed_total = sum(proposed.values(), Decimal(0))
+        recorded_total = (ReferralBonus.objects.aggregate(total=Sum('amount'))['total'] or 0) + \
+            (NewAgentBonus.objects.aggregate(total=Sum('amount'))['total'] or 0)
+
+        self.stdout.write(f'Replayed {len(months)} disbursals across {len(deals)} agents '
+                          f'({len(network_deals)} referrers)')
+        self.stdout.write(f'  Current schedule:  new agent {_fmt(current_new_agent)}, referrer {_fmt(current_referrer)}')
+        self.stdout.write(f'  Proposed schedule: new agent {_fmt(proposed_new_agent)}, referrer {_fmt(proposed_referrer)}')
+        self.stdout.write(f'  Recorded bonuses (tables):  AED {recorded_total:,.2f}')
+        self.stdout.write(f'  Current schedule replay:    AED {baseline_total:,.2f}')
+        self.stdout.write(f'  Proposed schedule replay:   AED {proposed_total:,.2f}')
+        self.stdout.write(f'  Delta:                      AED {proposed_total - baseline_total:+,.2f}')
+
+        self.stdout.write('\nBy month (current → proposed):')
+        for month in sorted(set(baseline_months) | set(proposed_months)):
+            before, after = baseline_months.get(month, Decimal(0)), proposed_months.get(month, Decimal(0))
+            self.stdout.write(f'  {month}  {before:>12,.2f} → {after:>12,.2f}  ({after - before:+,.2f})')
+
+        deltas = {
+            agent_id: proposed.get(agent_id, Decimal(0)) - baseline.get(agent_id, Decimal(0))
+            for agent_id in set(baseline) | set(proposed)
+        }
+        changed = sorted((d for d in deltas.items() if d[1]), key=lambda d: abs(d[1]), reverse=True)
+        self.stdout.write(f'\n{len(changed)} agents affected. Largest deltas:')
+        top = changed[:options['top']]
+        names = dict(Agent.objects.filter(pk__in=[agent_id for agent_id, _ in top]).values_list('pk', 'phone'))
+        for agent_id, delta in top:
+            self.stdout.write(f'  {names.get(agent_id, agent_id)}  {baseline.get(agent_id, 0):>10,.2f} → '
+                              f'{proposed.get(agent_id, 0):>10,.2f}  ({delta:+,.2f})')
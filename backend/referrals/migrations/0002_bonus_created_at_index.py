@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('referrals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newagentbonus',
+            index=models.Index(fields=['created_at'], name='new_agent_b_created_02244d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='referralbonus',
+            index=models.Index(fields=['created_at'], name='referral_bo_created_b77302_idx'),
+        ),
+    ]
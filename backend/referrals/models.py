@@ -21,6 +21,9 @@ class ReferralBonus(models.Model):
     class Meta:
         db_table = 'referral_bonuses'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['referrer', 'deal_number'],
@@ -48,6 +51,9 @@ class NewAgentBonus(models.Model):
     class Meta:
         db_table = 'new_agent_bonuses'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['agent', 'deal_number'],
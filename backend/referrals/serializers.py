@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from referrals.models import ReferralBonus, NewAgentBonus
+from rivo_partner.serializers import RowSerializer
 
 
 class ReferralBonusSerializer(serializers.ModelSerializer):
@@ -16,3 +17,7 @@ class NewAgentBonusSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewAgentBonus
         fields = ['id', 'deal_number', 'amount', 'client_name', 'created_at']
+
+
+referral_bonus_rows = RowSerializer(ReferralBonusSerializer)
+new_agent_bonus_rows = RowSerializer(NewAgentBonusSerializer)
@@ -2,18 +2,22 @@ import logging
 from decimal import Decimal
 from django.db import transaction
 from config.models import AppConfig
+from events.fanout import publish
 from agents.services import send_referral_bonus_notification
 from referrals.models import ReferralBonus, NewAgentBonus
+from rivo_partner.cache import get_agent_snapshot, invalidate_agent_snapshot
 
 logger = logging.getLogger(__name__)
 
+BONUS_SNAPSHOT = 'bonuses'
+
 
 def process_disbursal_bonuses(client):
     """Called when a client status changes to DISBURSED.
     Handles both referrer bonuses and new agent bonuses."""
 
     agent = client.source_agent
-    logger.info(f'Processing disbursal bonuses: client={client.client_name}, agent={agent.phone}')
+    logger.info('Processing disbursal bonuses: client=%s, agent=%s', client.pk, agent.phone)
 
     # 1. New Agent Bonus — agent's first N deals
     _process_new_agent_bonus(agent, client)
@@ -30,19 +34,24 @@ def _process_new_agent_bonus(agent, client):
     # Lock existing rows to prevent race condition
     existing_count = NewAgentBonus.objects.select_for_update().filter(agent=agent).count()
     if existing_count >= len(bonus_config):
-        logger.info(f'New agent bonus skipped: agent={agent.phone} already has {existing_count}/{len(bonus_config)} bonuses')
+        logger.info('New agent bonus skipped: agent=%s already has %s/%s bonuses', agent.phone, existing_count, len(bonus_config))
         return
     deal_number = existing_count + 1
 
     if deal_number <= len(bonus_config):
         amount = Decimal(str(bonus_config[deal_number - 1]))
-        NewAgentBonus.objects.create(
+        bonus = NewAgentBonus.objects.create(
             agent=agent,
             client=client,
             deal_number=deal_number,
             amount=amount,
         )
-        logger.info(f'New agent bonus awarded: agent={agent.phone}, deal #{deal_number}, amount={amount}')
+        publish(agent.pk, 'bonus_awarded', {
+            'bonus': 'deal', 'id': str(bonus.pk), 'deal_number': deal_number, 'amount': str(amount),
+            'client_name': client.client_name,
+        })
+        logger.info('New agent bonus awarded: agent=%s, deal #%s, amount=%s', agent.phone, deal_number, amount,
+                    extra={'audit': True})
 
 
 @transaction.atomic
@@ -52,18 +61,77 @@ def _process_referrer_bonus(referrer, triggered_by_agent, client):
     # Lock existing rows to prevent race condition
     existing_count = ReferralBonus.objects.select_for_update().filter(referrer=referrer).count()
     if existing_count >= len(bonus_config):
-        logger.info(f'Referrer bonus skipped: referrer={referrer.phone} already has {existing_count}/{len(bonus_config)} bonuses')
+        logger.info('Referrer bonus skipped: referrer=%s already has %s/%s bonuses', referrer.phone, existing_count, len(bonus_config))
         return
     deal_number = existing_count + 1
 
     if deal_number <= len(bonus_config):
         amount = Decimal(str(bonus_config[deal_number - 1]))
-        ReferralBonus.objects.create(
+        bonus = ReferralBonus.objects.create(
             referrer=referrer,
             triggered_by_agent=triggered_by_agent,
             triggered_by_client=client,
             deal_number=deal_number,
             amount=amount,
         )
-        logger.info(f'Referrer bonus awarded: referrer={referrer.phone}, triggered_by={triggered_by_agent.phone}, deal #{deal_number}, amount={amount}')
+        publish(referrer.pk, 'bonus_awarded', {
+            'bonus': 'referral', 'id': str(bonus.pk), 'deal_number': deal_number, 'amount': str(amount),
+            'agent_name': triggered_by_agent.name,
+        })
+        logger.info('Referrer bonus awarded: referrer=%s, triggered_by=%s, deal #%s, amount=%s',
+                    referrer.phone, triggered_by_agent.phone, deal_number, amount, extra={'audit': True})
         send_referral_bonus_notification(referrer, triggered_by_agent, amount, deal_number)
+
+
+def get_bonus_snapshot(agent):
+    """Cached bonus items, counts and totals for an agent.
+    Config-derived fields (max, completed) are left to the caller so a
+    schedule change in AppConfig doesn't need to invalidate every agent."""
+    return get_agent_snapshot(BONUS_SNAPSHOT, agent.pk, lambda: _build_bonus_snapshot(agent))
+
+
+def bonus_progress(agent, items=True):
+    """The agent's bonuses with progress against the current bonus schedules
+    (the my_bonuses payload; `items=False` leaves out the bonus rows)."""
+    snapshot = get_bonus_snapshot(agent)
+    referrer_config = AppConfig.get_value('referrer_bonuses', [500, 500, 1000])
+    deal_config = AppConfig.get_value('new_agent_bonuses', [1000, 750, 500])
+
+    def progress(summary, max_bonuses):
+        return {
+            **({'items': summary['items']} if items else {}),
+            'total': summary['total'],
+            'count': summary['count'],
+            'max': max_bonuses,
+            'completed': summary['count'] >= max_bonuses,
+        }
+
+    return {
+        'referral_bonuses': progress(snapshot['referral_bonuses'], len(referrer_config)),
+        'deal_bonuses': progress(snapshot['deal_bonuses'], len(deal_config)),
+    }
+
+
+def invalidate_bonus_snapshot(agent_id):
+    invalidate_agent_snapshot(BONUS_SNAPSHOT, agent_id)
+
+
+def _build_bonus_snapshot(agent):
+    """Two queries regardless of bonus count — related names come from joins,
+    counts and totals from the rows already fetched."""
+    from referrals.serializers import referral_bonus_rows, new_agent_bonus_rows
+
+    referral_bonuses = list(ReferralBonus.objects.filter(referrer=agent).values(*referral_bonus_rows.columns))
+    deal_bonuses = list(NewAgentBonus.objects.filter(agent=agent).values(*new_agent_bonus_rows.columns))
+    return {
+        'referral_bonuses': {
+            'items': referral_bonus_rows.many(referral_bonuses),
+            'total': sum(b['amount'] for b in referral_bonuses),
+            'count': len(referral_bonuses),
+        },
+        'deal_bonuses': {
+            'items': new_agent_bonus_rows.many(deal_bonuses),
+            'total': sum(b['amount'] for b in deal_bonuses),
+            'count': len(deal_bonuses),
+        },
+    }
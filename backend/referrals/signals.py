@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agents.services import invalidate_home_snapshot, invalidate_network_snapshot
+from referrals.models import ReferralBonus, NewAgentBonus
+from referrals.services import invalidate_bonus_snapshot
+
+
+@receiver([post_save, post_delete], sender=ReferralBonus)
+def referral_bonus_changed(sender, instance, **kwargs):
+    invalidate_bonus_snapshot(instance.referrer_id)
+    invalidate_network_snapshot(instance.referrer_id)
+    invalidate_home_snapshot(instance.referrer_id)
+
+
+@receiver([post_save, post_delete], sender=NewAgentBonus)
+def new_agent_bonus_changed(sender, instance, **kwargs):
+    invalidate_bonus_snapshot(instance.agent_id)
@@ -0,0 +1,126 @@
+"""ModelAdmin base for the large tables (agents, clients, bonuses, webhook logs).
+
+- No exact COUNT(*): an unfiltered changelist takes the row count from
+  Postgres' planner statistics, and a filtered one counts at most
+  COUNT_CAP rows.
+- Phone and agent-code searches become prefix lookups (LIKE 'x%'), which
+  Postgres serves from the varchar_pattern_ops index Django creates for
+  indexed CharFields. Other terms fall back to the normal admin search.
+- date_hierarchy drill-down probes each year/month/day with an indexed
+  EXISTS instead of a DISTINCT over every row in range."""
+import datetime
+import re
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# Unfiltered tables smaller than this are counted exactly
+ESTIMATE_FROM = 100_000
+COUNT_CAP = 10_000
+
+PHONE_TERM_RE = re.compile(r'\+?[\d\s()-]{4,}')
+AGENT_CODE_TERM_RE = re.compile(r'RIVO-[A-Z0-9]{0,4}', re.IGNORECASE)
+
+
+def phone_prefixes(term):
+    """How a phone search term may be stored: with or without '+', and a
+    UAE number in both international (971...) and local (0...) form."""
+    if not PHONE_TERM_RE.fullmatch(term):
+        return []
+    digits = re.sub(r'\D', '', term)
+    if digits.startswith('00'):
+        digits = digits[2:]
+    prefixes = {digits, f'+{digits}'}
+    if digits.startswith('0'):
+        prefixes |= {f'971{digits[1:]}', f'+971{digits[1:]}'}
+    elif digits.startswith('971'):
+        prefixes.add(f'0{digits[3:]}')
+    return sorted(prefixes)
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+        if not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            # -1 / 0 until the table has been vacuumed or analyzed
+            if row and row[0] >= ESTIMATE_FROM:
+                return row[0]
+        return queryset.order_by()[:COUNT_CAP].count()
+
+
+class PeriodProbeQuerySet(QuerySet):
+    """datetimes() for date_hierarchy, one EXISTS per candidate period."""
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, **kwargs):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo, **kwargs)
+        tz = tzinfo or timezone.get_current_timezone()
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = bounds['first'].astimezone(tz), bounds['last'].astimezone(tz)
+
+        start = datetime.datetime(first.year, first.month if kind != 'year' else 1,
+                                  first.day if kind == 'day' else 1, tzinfo=tz)
+        periods = []
+        while start <= last:
+            if kind == 'year':
+                end = start.replace(year=start.year + 1)
+            elif kind == 'month':
+                end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+            else:
+                end = start + datetime.timedelta(days=1)
+            if self.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists():
+                periods.append(start)
+            start = end
+        return periods if order == 'ASC' else periods[::-1]
+
+
+class ScalableChangeList(ChangeList):
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        return PeriodProbeQuerySet(model=queryset.model, query=queryset.query,
+                                   using=queryset._db, hints=queryset._hints)
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Set phone_search_fields / agent_code_search_fields to the lookups
+    (e.g. 'referrer__phone') a phone or RIVO-XXXX search should match."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    phone_search_fields = ()
+    agent_code_search_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if self.agent_code_search_fields and AGENT_CODE_TERM_RE.fullmatch(term):
+            lookups = [f'{field}__startswith' for field in self.agent_code_search_fields]
+            values = [term.upper()]
+        else:
+            values = phone_prefixes(term) if self.phone_search_fields else []
+            lookups = [f'{field}__startswith' for field in self.phone_search_fields]
+        if not values:
+            return super().get_search_results(request, queryset, search_term)
+        query = Q()
+        for lookup in lookups:
+            for value in values:
+                query |= Q(**{lookup: value})
+        return queryset.filter(query), False
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rivo_partner.settings')
 
 application = get_asgi_application()
+
+# Load AppConfig into memory before the first request
+from config.snapshot import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,76 @@
+"""GET /api/v1/bootstrap/ — everything the home screen needs in one request.
+
+Sections are the same cached pieces the single endpoints use (agent
+snapshots, the pre-rendered config), so a warm request costs only the auth
+lookup. Each section has its own ETag, listed under "etags". Clients send
+the ETags they hold in If-None-Match: sections that still match are left
+out of the body, and when none changed the response is a 304.
+
+    profile    the agent (as /agents/me/, without earnings)
+    earnings   earnings totals (as in /agents/me/)
+    config     {"etag"} of /config/ — refetch it when this changes
+    clients    per-status counts and the most recent clients
+    bonuses    bonus progress (as /referrals/bonuses/, without the items)"""
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.views.decorators.vary import vary_on_headers
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+from rivo_partner.cache import prefetched_agent_snapshots
+from rivo_partner.compression import gzip_large
+from rivo_partner.renderers import FastJSONRenderer
+
+
+def _sections(agent):
+    from agents.serializers import AgentProfileSerializer
+    from agents.services import get_home_snapshot
+    from config.views import config_payload
+    from referrals.services import bonus_progress
+
+    return {
+        'profile': lambda: AgentProfileSerializer(agent).data,
+        'earnings': lambda: get_home_snapshot(agent)['earnings'],
+        'config': lambda: {'etag': config_payload()[1]},
+        'clients': lambda: get_home_snapshot(agent)['clients'],
+        'bonuses': lambda: bonus_progress(agent, items=False),
+    }
+
+
+def _snapshot_namespaces():
+    from agents.services import home_namespace
+    from referrals.services import BONUS_SNAPSHOT
+    return [home_namespace(), BONUS_SNAPSHOT]
+
+
+def _etag(name, body):
+    return '"%s-%s"' % (name, hashlib.sha256(body).hexdigest()[:20])
+
+
+@gzip_large
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@vary_on_headers('Authorization')
+def bootstrap(request):
+    agent = request.user
+    render = FastJSONRenderer().render
+    bodies, etags = {}, {}
+    with prefetched_agent_snapshots(agent.pk, _snapshot_namespaces()):
+        for name, build in _sections(agent).items():
+            bodies[name] = render(build())
+            etags[name] = _etag(name, bodies[name])
+    etag = _etag('bootstrap', ''.join(etags.values()).encode())
+
+    held = set(parse_etags(request.headers.get('If-None-Match', '')))
+    changed = [name for name in bodies if etags[name] not in held]
+    if etag in held or not changed:
+        response = HttpResponseNotModified()
+    else:
+        parts = [b'"etags":' + render(etags)]
+        parts += [b'"%s":%s' % (name.encode(), bodies[name]) for name in changed]
+        response = HttpResponse(b'{' + b','.join(parts) + b'}', content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
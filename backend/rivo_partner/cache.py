@@ -0,0 +1,83 @@
+"""Per-agent cache snapshots with versioned keys.
+
+Every snapshot namespace keeps a version per agent in the snapshot_versions
+table (config.SnapshotVersion). The snapshots themselves are kept in each
+process's 'snapshots' LocMem cache under the version they were built for.
+A version only ever goes up, so a cached copy is never stale: a warm read is
+one primary query for the version, and invalidating is one atomic UPDATE
+that retires the copies held by every worker and instance."""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from rivo_partner.db_router import primary_reads
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 6
+
+# Versions read ahead by prefetched_agent_snapshots(): (agent id, {namespace: version})
+_prefetched = contextvars.ContextVar('prefetched_agent_snapshots', default=None)
+
+
+def _versions(agent_id, namespaces):
+    """The agent's current version in each namespace, creating missing rows.
+    New rows start from the current time in ms, so a version never repeats
+    while a process may still hold a copy built for it."""
+    from config.models import SnapshotVersion
+
+    rows = SnapshotVersion.objects.filter(agent_id=agent_id, namespace__in=namespaces)
+    versions = dict(rows.values_list('namespace', 'version'))
+    missing = [namespace for namespace in namespaces if namespace not in versions]
+    if missing:
+        start = time.time_ns() // 1_000_000
+        SnapshotVersion.objects.bulk_create(
+            [SnapshotVersion(namespace=namespace, agent_id=agent_id, version=start) for namespace in missing],
+            ignore_conflicts=True,
+        )
+        versions.update(rows.filter(namespace__in=missing).values_list('namespace', 'version'))
+    return versions
+
+
+def get_agent_snapshot(namespace, agent_id, build, timeout=SNAPSHOT_TIMEOUT):
+    """Return the cached snapshot for an agent, building it on a miss."""
+    prefetched_agent, versions = _prefetched.get() or (None, {})
+    if prefetched_agent != agent_id or namespace not in versions:
+        versions = _versions(agent_id, [namespace])
+    key = f'{namespace}:{agent_id}:v{versions[namespace]}'
+    snapshots = caches['snapshots']
+    snapshot = snapshots.get(key)
+    if snapshot is None:
+        # Built from primary: a snapshot read from a lagging replica would be
+        # cached under the new version and outlive the lag.
+        with primary_reads():
+            snapshot = build()
+        snapshots.set(key, snapshot, timeout)
+    return snapshot
+
+
+@contextmanager
+def prefetched_agent_snapshots(agent_id, namespaces):
+    """Read an agent's versions in several namespaces with one query instead
+    of one each; get_agent_snapshot calls inside the block use them."""
+    token = _prefetched.set((agent_id, _versions(agent_id, namespaces)))
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
+
+
+def invalidate_agent_snapshot(namespace, agent_id):
+    """Bump the agent's snapshot version once the current transaction commits,
+    so a concurrent reader can't re-cache rows from before the write."""
+    if not agent_id:
+        return
+
+    def _bump():
+        from config.models import SnapshotVersion
+        # No row yet: nothing was cached for this agent
+        SnapshotVersion.objects.filter(agent_id=agent_id, namespace=namespace).update(version=F('version') + 1)
+
+    transaction.on_commit(_bump)
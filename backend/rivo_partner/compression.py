@@ -0,0 +1,17 @@
+"""Gzip for large JSON responses only — small payloads aren't worth the CPU."""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.decorators import decorator_from_middleware
+
+
+class LargeResponseGZipMiddleware(GZipMiddleware):
+    """Django's GZipMiddleware, but leaves responses under GZIP_MIN_BYTES alone."""
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
+
+
+# Per-view: put it above @api_view so it sees the rendered response
+gzip_large = decorator_from_middleware(LargeResponseGZipMiddleware)
@@ -0,0 +1,58 @@
+"""PostgreSQL backend that records connection metrics.
+
+Identical to django.db.backends.postgresql apart from counting new
+connections, the time spent opening them (TCP + TLS + auth) and
+connections dropped by the CONN_HEALTH_CHECKS usability check, and
+counting each request's queries for rivo_partner.metrics. With
+persistent connections these should stay near zero after warm-up; a rising
+count means connection setup is back on the request path."""
+import logging
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+from rivo_partner.metrics import count_query
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stats = {
+    'connections_opened': 0,
+    'connect_seconds_total': 0.0,
+    'connections_unusable': 0,
+}
+
+
+def connection_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def _record(**increments):
+    with _lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Once per wrapper: it outlives reconnects, and connection_created
+        # fires on every one of them
+        self.execute_wrappers.append(count_query)
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        elapsed = time.perf_counter() - started
+        _record(connections_opened=1, connect_seconds_total=elapsed)
+        logger.info('DB connection opened: alias=%s, %.1f ms', self.alias, elapsed * 1000)
+        return connection
+
+    def is_usable(self):
+        usable = super().is_usable()
+        if not usable:
+            _record(connections_unusable=1)
+        return usable
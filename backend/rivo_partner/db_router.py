@@ -0,0 +1,190 @@
+"""Read-replica routing for the read-only agent endpoints.
+
+Only views decorated with @replica_reads read from the `replica` alias;
+everything else, and every write, uses `default`. Reads stay on primary
+when:
+
+- no replica is configured (DB_REPLICA_HOST unset),
+- the agent wrote something in the last REPLICA_PIN_SECONDS, so they
+  always see their own profile update or client submission (pinned by
+  ReplicaPinMiddleware with a signed cookie, so every worker and instance
+  sees the pin without a query), or
+- the replica is more than REPLICA_MAX_LAG seconds behind, or its lag
+  could not be checked.
+
+AppConfig/ConfigVersion and the cache table are always read from primary:
+config versions must never go backwards and cache invalidations must be
+seen immediately."""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+PRIMARY_ONLY_APPS = {'config', 'django_cache'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaLag:
+    """Replica lag in seconds, checked at most every REPLICA_LAG_CHECK_INTERVAL.
+    One thread checks while the others use the last result."""
+
+    # 0 when the replica has replayed everything it received — an idle
+    # primary would otherwise look like growing lag.
+    QUERY = '''
+        SELECT CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lag = None
+        self._checked_at = 0
+
+    def _check(self):
+        try:
+            with connections[REPLICA].cursor() as cursor:
+                cursor.execute(self.QUERY)
+                self._lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.exception('Replica lag check failed; reading from primary')
+            self._lag = None
+        self._checked_at = time.monotonic()
+
+    def healthy(self):
+        interval = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+        if time.monotonic() - self._checked_at >= interval and self._lock.acquire(blocking=False):
+            try:
+                if time.monotonic() - self._checked_at >= interval:
+                    was_healthy = self._lag is not None and self._lag <= settings.REPLICA_MAX_LAG
+                    self._check()
+                    if self._lag is not None and self._lag > settings.REPLICA_MAX_LAG and was_healthy:
+                        logger.warning('Replica lag %.1fs over %ss; reading from primary',
+                                       self._lag, settings.REPLICA_MAX_LAG)
+            finally:
+                self._lock.release()
+        return self._lag is not None and self._lag <= settings.REPLICA_MAX_LAG
+
+
+replica_lag = ReplicaLag()
+
+
+@contextmanager
+def primary_reads():
+    """Read from primary inside a @replica_reads view — for anything that
+    gets cached, which must not be built from a lagging replica."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+PIN_COOKIE = 'rivo_primary_pin'
+PIN_SALT = 'rivo.replica-pin'
+
+
+def pin_to_primary(response, agent_id):
+    response.set_signed_cookie(
+        PIN_COOKIE, str(agent_id), salt=PIN_SALT, max_age=settings.REPLICA_PIN_SECONDS,
+        secure=not settings.DEBUG, httponly=True, samesite='Lax',
+    )
+
+
+def _pinned(request, agent):
+    pinned_agent = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_SALT, max_age=settings.REPLICA_PIN_SECONDS,
+    )
+    return pinned_agent == str(agent.pk)
+
+
+def _agent(request):
+    user = getattr(request, 'user', None)
+    return user if user is not None and hasattr(user, 'agent_code') else None
+
+
+def replica_reads(view):
+    """Serve this (read-only) view's queries from the replica when it is
+    safe to. Put it below @api_view/@permission_classes so authentication
+    has already run."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_configured():
+            return view(request, *args, **kwargs)
+        agent = _agent(request)
+        if agent is not None and _pinned(request, agent):
+            return view(request, *args, **kwargs)
+        if not replica_lag.healthy():
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """After an agent's successful write request, keep their reads on
+    primary for REPLICA_PIN_SECONDS (read-your-writes)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _should_pin(request, response):
+        return (replica_configured() and request.method not in SAFE_METHODS
+                and response.status_code < 400 and _agent(request) is not None)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._should_pin(request, response):
+            pin_to_primary(response, _agent(request).pk)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._should_pin(request, response):
+            pin_to_primary(response, _agent(request).pk)
+        return response
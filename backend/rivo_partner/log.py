@@ -0,0 +1,145 @@
+"""Logging off the request path.
+
+Request threads only put records on an in-memory queue (QueueLogHandler);
+a listener thread per process does the formatting, phone masking and
+writing. Records carry the request id set by RequestIdMiddleware, and
+INFO records can be sampled with LOG_INFO_SAMPLE_RATE — pass
+extra={'audit': True} for lines that must always be kept."""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+request_id = contextvars.ContextVar('request_id', default='-')
+
+PHONE_RE = re.compile(r'(?<![\w-])\+?\d{5,11}(\d{4})(?![\w-])')
+# Arguments that can safely be formatted later, on the listener thread.
+IMMUTABLE_ARGS = (str, int, float, bool, Decimal, uuid.UUID, date, datetime, type(None))
+
+
+def mask_phones(text):
+    """'+971501234567' -> '+*******4567'"""
+    return PHONE_RE.sub(lambda m: ('+' if m.group(0).startswith('+') else '') + '*' * 7 + m.group(1), text)
+
+
+class RequestIdMiddleware:
+    """Tags every log line of a request with a request id — the incoming
+    X-Request-ID or Cloud Run trace id if present — and echoes it back."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _request_id(request):
+        incoming = request.headers.get('X-Request-ID') or request.headers.get('X-Cloud-Trace-Context', '').split('/')[0]
+        return incoming[:64] if incoming else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = request_id.set(self._request_id(request))
+        try:
+            response = self.get_response(request)
+            response['X-Request-ID'] = request_id.get()
+            return response
+        finally:
+            request_id.reset(token)
+
+    async def __acall__(self, request):
+        token = request_id.set(self._request_id(request))
+        try:
+            response = await self.get_response(request)
+            response['X-Request-ID'] = request_id.get()
+            return response
+        finally:
+            request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keeps a `rate` share of INFO-and-below records; never drops warnings,
+    errors or records logged with extra={'audit': True}."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno > logging.INFO or getattr(record, 'audit', False):
+            return True
+        return random.random() < self.rate
+
+
+class PhoneMaskFilter(logging.Filter):
+    def filter(self, record):
+        record.msg = mask_phones(record.getMessage())
+        record.args = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, in the shape Cloud Logging parses
+    (severity/message plus our own fields)."""
+
+    def format(self, record):
+        entry = {
+            'severity': record.levelname,
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        if record.exc_info:
+            entry['exception'] = mask_phones(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueueLogHandler(QueueHandler):
+    """QueueHandler that owns its listener: records are enqueued on the
+    caller's thread and written to stdout by a background thread."""
+
+    def __init__(self, fmt='json'):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(
+            '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+        target.addFilter(PhoneMaskFilter())
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+        # A forked worker inherits the queue but not the listener thread
+        os.register_at_fork(after_in_child=self._restart)
+
+    def _restart(self):
+        self.queue = self.listener.queue = queue.SimpleQueue()
+        self.listener._thread = None
+        self.listener.start()
+
+    def prepare(self, record):
+        """Unlike the stdlib, leave formatting to the listener unless an
+        argument could change before it gets there."""
+        if record.args and not all(isinstance(arg, IMMUTABLE_ARGS) for arg in (
+                record.args.values() if isinstance(record.args, dict) else record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
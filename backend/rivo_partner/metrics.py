@@ -0,0 +1,257 @@
+"""Per-endpoint request metrics, exported in Prometheus text format.
+
+MetricsMiddleware records, for every named URL: request latency
+(histogram), status codes, DB query count and DB time. Queries are
+attributed through a context variable, so they count even when they run
+in sync_to_async threads under ASGI; the wrapper that counts them is
+installed by the database backend (rivo_partner.db_backend). Outbound calls to YCloud and the CRM
+are recorded with `outbound_call`.
+
+Every gunicorn worker keeps its own counters in memory and writes them to
+METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL seconds. The
+/internal/metrics/ endpoint adds up the files of all workers on the
+instance."""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+def _observe(histogram, buckets, value):
+    counts = histogram.setdefault('buckets', [0] * len(buckets))
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+    histogram['count'] = histogram.get('count', 0) + 1
+    histogram['sum'] = histogram.get('sum', 0.0) + value
+
+
+class Registry:
+    """This process's counters. JSON-serialisable so workers can share them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = self._empty()
+        self._flushed_at = 0
+
+    @staticmethod
+    def _empty():
+        return {
+            'requests': defaultdict(int),       # "view|method|status" -> count
+            'latency': defaultdict(dict),       # "view|method" -> histogram
+            'queries': defaultdict(dict),       # "view" -> histogram of queries per request
+            'db_seconds': defaultdict(float),   # "view" -> seconds
+            'outbound': defaultdict(int),       # "service|outcome" -> count
+            'outbound_seconds': defaultdict(float),
+        }
+
+    def record_request(self, view, method, status, seconds, stats):
+        with self._lock:
+            data = self._data
+            data['requests'][f'{view}|{method}|{status}'] += 1
+            _observe(data['latency'][f'{view}|{method}'], LATENCY_BUCKETS, seconds)
+            _observe(data['queries'][view], QUERY_COUNT_BUCKETS, stats.queries)
+            data['db_seconds'][view] += stats.db_seconds
+        self.maybe_flush()
+
+    def record_outbound(self, service, seconds, ok):
+        with self._lock:
+            self._data['outbound'][f'{service}|{"ok" if ok else "error"}'] += 1
+            self._data['outbound_seconds'][service] += seconds
+
+    def snapshot(self):
+        from rivo_partner.db_backend.base import connection_stats
+        with self._lock:
+            data = json.loads(json.dumps(self._data))
+        data['connections'] = connection_stats()
+        return data
+
+    def maybe_flush(self, force=False):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        now = time.monotonic()
+        if not force and now - self._flushed_at < interval:
+            return
+        self._flushed_at = now
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f'.{os.getpid()}.json.tmp'
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, directory / f'{os.getpid()}.json')
+
+
+registry = Registry()
+
+
+class LatencyEWMA:
+    """Moving average of this process's DB query time, the load-shedding
+    signal for the public endpoints (agents.throttling). Updates race
+    between threads; a lost sample doesn't matter for an average."""
+
+    def __init__(self, alpha=0.05):
+        self.alpha = alpha
+        self.value = 0.0
+
+    def observe(self, seconds):
+        self.value += self.alpha * (seconds - self.value)
+
+
+db_latency = LatencyEWMA()
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper installed once per connection by
+    rivo_partner.db_backend; counts and times queries run inside a request."""
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        db_latency.observe(elapsed)
+
+
+@contextmanager
+def outbound_call(service):
+    """Time an outbound HTTP call. Set call['ok'] = False for a bad response;
+    exceptions count as errors automatically."""
+    call = {'ok': True}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call['ok'] = False
+        raise
+    finally:
+        registry.record_outbound(service, time.perf_counter() - started, call['ok'])
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _record(self, request, response, started, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name or match.view_name if match else 'unmatched'
+        status = response.status_code if response is not None else 500
+        registry.record_request(view, request.method, status, time.perf_counter() - started, stats)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, started, response = RequestStats(), time.perf_counter(), None
+        token = _request_stats.set(stats)
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            _request_stats.reset(token)
+            self._record(request, response, started, stats)
+
+    async def __acall__(self, request):
+        stats, started, response = RequestStats(), time.perf_counter(), None
+        token = _request_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            _request_stats.reset(token)
+            self._record(request, response, started, stats)
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            existing = target.setdefault(key, [0] * len(value))
+            target[key] = [a + b for a, b in zip(existing, value)]
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+def _histogram(lines, name, buckets, histogram, **labels):
+    for bound, count in zip(buckets, histogram['buckets']):
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram["count"]}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram["sum"]}')
+    lines.append(f'{name}_count{_labels(**labels)} {histogram["count"]}')
+
+
+def render_prometheus():
+    registry.maybe_flush(force=True)
+    merged = {}
+    for path in Path(settings.METRICS_DIR).glob('*.json'):
+        try:
+            _merge(merged, json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # worker mid-write or gone
+
+    lines = [
+        '# TYPE rivo_http_requests_total counter',
+        *(f'rivo_http_requests_total{_labels(view=v, method=m, status=s)} {n}'
+          for (v, m, s), n in ((k.split('|'), n) for k, n in sorted(merged.get('requests', {}).items()))),
+        '# TYPE rivo_http_request_duration_seconds histogram',
+    ]
+    for key, histogram in sorted(merged.get('latency', {}).items()):
+        view, method = key.split('|')
+        _histogram(lines, 'rivo_http_request_duration_seconds', LATENCY_BUCKETS, histogram, view=view, method=method)
+    lines.append('# TYPE rivo_db_queries_per_request histogram')
+    for view, histogram in sorted(merged.get('queries', {}).items()):
+        _histogram(lines, 'rivo_db_queries_per_request', QUERY_COUNT_BUCKETS, histogram, view=view)
+    lines.append('# TYPE rivo_db_query_seconds_total counter')
+    lines.extend(f'rivo_db_query_seconds_total{_labels(view=v)} {s}'
+                 for v, s in sorted(merged.get('db_seconds', {}).items()))
+    lines.append('# TYPE rivo_outbound_requests_total counter')
+    for key, n in sorted(merged.get('outbound', {}).items()):
+        service, outcome = key.split('|')
+        lines.append(f'rivo_outbound_requests_total{_labels(service=service, outcome=outcome)} {n}')
+    lines.append('# TYPE rivo_outbound_request_seconds_total counter')
+    lines.extend(f'rivo_outbound_request_seconds_total{_labels(service=s)} {v}'
+                 for s, v in sorted(merged.get('outbound_seconds', {}).items()))
+    for name, value in sorted(merged.get('connections', {}).items()):
+        lines.append(f'# TYPE rivo_db_{name} counter')
+        lines.append(f'rivo_db_{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """GET /internal/metrics/ — requires `Authorization: Bearer $METRICS_TOKEN`.
+    Disabled (404) when METRICS_TOKEN is not set."""
+    token = settings.METRICS_TOKEN
+    if not token or request.headers.get('Authorization', '') != f'Bearer {token}':
+        raise Http404
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,133 @@
+"""Fast read path for list endpoints.
+
+RowSerializer turns `.values()` rows into exactly the dicts a DRF
+ModelSerializer would produce for the same objects, without building model
+instances or calling field objects per row. On first use it reads the
+serializer's fields, picks a converter per field (the DRF field's own
+to_representation for anything it has no shortcut for) and compiles one
+function that builds a row's dict in a single expression."""
+import decimal
+import threading
+
+from django.db.models import QuerySet
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Field types whose to_representation is the identity for the values the
+# database returns.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.BooleanField, serializers.ReadOnlyField,
+)
+
+
+def _decimal_converter(field):
+    if field.localize or field.normalize_output:
+        return field.to_representation
+    coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    exponent = decimal.Decimal('.1') ** field.decimal_places if field.decimal_places is not None else None
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        if exponent is not None:
+            value = value.quantize(exponent, rounding=rounding, context=context)
+        return f'{value:f}' if coerce else value
+    return convert
+
+
+def _datetime_converter(field):
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if tz is None:
+        return field.to_representation
+
+    def convert(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _converter(field):
+    """None means the raw value is already the representation."""
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    if isinstance(field, serializers.ModelField):
+        return field.to_representation
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, PASSTHROUGH_FIELDS) and type(field).to_representation in (
+            serializers.CharField.to_representation, serializers.ChoiceField.to_representation,
+            serializers.IntegerField.to_representation, serializers.BooleanField.to_representation,
+            serializers.ReadOnlyField.to_representation):
+        return None
+    return field.to_representation
+
+
+class RowSerializer:
+    """`RowSerializer(ClientSerializer).many(queryset)` == `ClientSerializer(queryset, many=True).data`.
+
+    `columns` are the `.values()` names to fetch (dotted sources become
+    `__` lookups). SerializerMethodFields must be passed to many()/one() as
+    functions of the row dict, e.g. `bonus_earned=lambda row: ...`."""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._lock = threading.Lock()
+        self._compiled = None
+
+    @property
+    def columns(self):
+        return self._compile()[0]
+
+    def _compile(self):
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = self._build()
+        return self._compiled
+
+    def _build(self):
+        columns, computed, parts, namespace = [], [], [], {}
+        for i, (name, field) in enumerate(self.serializer_class().fields.items()):
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                computed.append(name)
+                parts.append(f'{name!r}: computed[{name!r}](row)')
+                continue
+            if isinstance(field, serializers.BaseSerializer) or field.source == '*':
+                raise TypeError(f'{self.serializer_class.__name__}.{name}: nested fields are not supported')
+            column = field.source.replace('.', '__')
+            columns.append(column)
+            convert = _converter(field)
+            if convert is None:
+                parts.append(f'{name!r}: row[{column!r}]')
+            else:
+                namespace[f'c{i}'] = convert
+                parts.append(f'{name!r}: None if row[{column!r}] is None else c{i}(row[{column!r}])')
+        source = 'def to_dict(row, computed):\n    return {' + ', '.join(parts) + '}\n'
+        exec(compile(source, f'<RowSerializer {self.serializer_class.__name__}>', 'exec'), namespace)
+        return columns, frozenset(computed), namespace['to_dict']
+
+    def _check(self, computed):
+        expected = self._compile()[1]
+        if set(computed) != expected:
+            raise TypeError(f'{self.serializer_class.__name__} needs computed fields {sorted(expected)}')
+
+    def many(self, rows, **computed):
+        """Serialize `.values()` rows. A queryset is fetched with exactly
+        `columns` (plus any extra values already selected)."""
+        self._check(computed)
+        columns, _, to_dict = self._compile()
+        if isinstance(rows, QuerySet) and rows._fields is None:
+            rows = rows.values(*columns)
+        return [to_dict(row, computed) for row in rows]
+
@@ -10,6 +10,11 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-change-me')
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(',')
 
+# Server mode — 'asgi' runs uvicorn workers and routes the I/O-bound
+# endpoints (client submit, OAuth connects, YCloud webhook) to async views.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -26,16 +31,23 @@ INSTALLED_APPS = [
     'referrals',
     'config',
     'webhooks',
+    'analytics',
+    'payouts',
+    'sync',
+    'events',
 ]
 
 MIDDLEWARE = [
+    'rivo_partner.metrics.MetricsMiddleware',
+    'rivo_partner.log.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'rivo_partner.staticfiles.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rivo_partner.db_router.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,20 +73,91 @@ TEMPLATES = [
 WSGI_APPLICATION = 'rivo_partner.wsgi.application'
 
 # Database — Supabase PostgreSQL
+# Connections are kept open across requests (CONN_MAX_AGE) and checked with a
+# cheap ping before reuse (CONN_HEALTH_CHECKS), so the TLS handshake to
+# Supabase happens once per worker thread instead of once per request.
+#
+# DB_POOL_MODE=transaction is for pgbouncer / Supavisor transaction pooling
+# (Supabase port 6543): a backend is only ours for one transaction, so
+# server-side cursors (named cursors from QuerySet.iterator()) are disabled.
+# psycopg2 never issues server-side prepared statements, so nothing else has
+# to change; session-level SETs must not be relied on in that mode.
+# Under ASGI, Django can't reuse connections across async contexts, so
+# persistence is off by default there — point it at the pooler instead.
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'session')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'rivo_partner.db_backend',
         'NAME': os.getenv('DB_NAME', 'postgres'),
         'USER': os.getenv('DB_USER', 'postgres'),
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0' if ASYNC_VIEWS else '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'transaction',
         'OPTIONS': {
             'sslmode': 'require',
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            'application_name': 'rivo-partners',
+            # Detect connections silently dropped by NAT / the pooler
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 3,
         },
     }
 }
 
+# Read replica — when DB_REPLICA_HOST is set, views marked @replica_reads
+# read from it (see rivo_partner/db_router.py). An agent's reads stay on
+# primary for REPLICA_PIN_SECONDS after they write, and all reads go to
+# primary while the replica is more than REPLICA_MAX_LAG seconds behind.
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'application_name': 'rivo-partners-replica'},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['rivo_partner.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '15'))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+
+# Cache — shared table in Postgres, for state every gunicorn worker / Cloud
+# Run instance must see. Created by `manage.py createcachetable` in entrypoint.sh.
+# Per-agent snapshots are kept per process ('snapshots'): only their versions
+# are shared, in the snapshot_versions table (see rivo_partner/cache.py).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '100000')),
+        },
+    },
+    # Per-process, for hot public lookups that must not touch Postgres
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rivo-local',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+    'snapshots': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rivo-snapshots',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SNAPSHOT_CACHE_MAX_ENTRIES', '20000')),
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -129,6 +212,7 @@ if '*' in ALLOWED_HOSTS:
     ]
 
 # DRF
+NUM_PROXIES = os.getenv('NUM_PROXIES', '1')
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'agents.authentication.DeviceTokenAuthentication',
@@ -136,10 +220,100 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed, same bytes as DRF's JSONRenderer (falls back without orjson)
+    'DEFAULT_RENDERER_CLASSES': [
+        'rivo_partner.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Proxies in front of Django — the client IP for throttling is the
+    # NUM_PROXIES-th X-Forwarded-For entry from the right. Cloud Run's front
+    # end appends one, so 1; 0 uses REMOTE_ADDR. 'none' keeps the whole
+    # client-supplied header as the ident, which lets clients pick their own
+    # bucket: only for setups where nothing untrusted can reach Django.
+    'NUM_PROXIES': None if NUM_PROXIES.lower() == 'none' else int(NUM_PROXIES),
+    # Per IP, except *_code which is per verification / referral code. The
+    # frontend polls check-verification every 2 s (30/min per code).
+    'DEFAULT_THROTTLE_RATES': {
+        'whatsapp_init': os.getenv('WHATSAPP_INIT_RATE', '20/min'),
+        # All clients together (per worker unless THROTTLE_CACHE is set)
+        'whatsapp_init_global': os.getenv('WHATSAPP_INIT_GLOBAL_RATE', '300/min'),
+        'verification_check': os.getenv('VERIFICATION_CHECK_RATE', '120/min'),
+        'verification_code': os.getenv('VERIFICATION_CODE_RATE', '45/min'),
+        'referral_resolve': os.getenv('REFERRAL_RESOLVE_RATE', '60/min'),
+        'referral_code': os.getenv('REFERRAL_CODE_RATE', '120/min'),
+    },
+}
+
+# Cache alias for throttle buckets shared across workers ('' = per process)
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', '')
+# Public endpoints shed load (429 + Retry-After) once the average DB query
+# takes longer than this; 0 disables
+SHED_DB_LATENCY_MS = float(os.getenv('SHED_DB_LATENCY_MS', '100'))
+
+# Responses from @gzip_large views are compressed from this size up
+GZIP_MIN_BYTES = int(os.getenv('GZIP_MIN_BYTES', '8192'))
+
+# AppConfig — seconds between checks of the global config version
+APP_CONFIG_CHECK_INTERVAL = float(os.getenv('APP_CONFIG_CHECK_INTERVAL', '5'))
+# Browser/CDN max-age for GET /api/v1/config/ (revalidated via ETag after)
+CONFIG_MAX_AGE = int(os.getenv('CONFIG_MAX_AGE', '60'))
+
+# Logging — records are queued by request threads and written as JSON to
+# stdout by a listener thread (rivo_partner/log.py). LOG_FORMAT=text for
+# local development; LOG_INFO_SAMPLE_RATE < 1 keeps that share of INFO lines.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'rivo_partner.log.RequestIdFilter'},
+        'sample': {
+            '()': 'rivo_partner.log.SampleFilter',
+            'rate': float(os.getenv('LOG_INFO_SAMPLE_RATE', '1')),
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'rivo_partner.log.QueueLogHandler',
+            'fmt': os.getenv('LOG_FORMAT', 'json'),
+            'filters': ['sample', 'request_id'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django': {'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO')},
+    },
 }
 
+# Metrics — per-worker counters are merged from METRICS_DIR; the
+# /internal/metrics/ endpoint is disabled unless METRICS_TOKEN is set
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_DIR = os.getenv('METRICS_DIR', '/tmp/rivo-metrics')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+# Live agent events (/api/v1/events/stream/). 'postgres' fans events out to
+# every worker with LISTEN/NOTIFY over one connection per process; 'local'
+# delivers only within the publishing process (single worker, development).
+# LISTEN needs a session, so with DB_POOL_MODE=transaction point
+# EVENTS_LISTEN_PORT at the session port (Supabase 5432). Streams are served
+# only under SERVER_MODE=asgi (under WSGI each would hold a worker thread);
+# they close after EVENTS_STREAM_SECONDS and the browser reconnects.
+EVENTS_FANOUT = os.getenv('EVENTS_FANOUT', 'postgres')
+EVENTS_LISTEN_PORT = os.getenv('EVENTS_LISTEN_PORT', '')
+EVENTS_STREAM_SECONDS = int(os.getenv('EVENTS_STREAM_SECONDS', '300'))
+EVENTS_TICKET_MAX_AGE = int(os.getenv('EVENTS_TICKET_MAX_AGE', str(60 * 60 * 12)))
+
 # YCloud
 YCLOUD_API_KEY = os.getenv('YCLOUD_API_KEY', '')
-YCLOUD_WHATSAPP_NUMBER = os.getenv('YCLOUD_WHATSAPP_NUMBER', '')
\ No newline at end of file
+YCLOUD_WHATSAPP_NUMBER = os.getenv('YCLOUD_WHATSAPP_NUMBER', '')
+YCLOUD_MESSAGES_URL = os.getenv('YCLOUD_MESSAGES_URL', 'https://api.ycloud.com/v2/whatsapp/messages')
+
+# Rivo CRM
+CRM_LEAD_INGEST_URL = os.getenv(
+    'CRM_LEAD_INGEST_URL',
+    'https://rivo-backend-331738587654.asia-southeast1.run.app/api/leads/ingest/',
+)
@@ -1,11 +1,19 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from rivo_partner.bootstrap import bootstrap
+from rivo_partner.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/bootstrap/', bootstrap, name='bootstrap'),
     path('api/v1/agents/', include('agents.urls')),
     path('api/v1/clients/', include('clients.urls')),
+    path('api/v1/events/', include('events.urls')),
     path('api/v1/config/', include('config.urls')),
     path('api/v1/referrals/', include('referrals.urls')),
+    path('api/v1/sync/', include('sync.urls')),
     path('api/v1/webhook/', include('webhooks.urls')),
+    path('internal/metrics/', metrics_view, name='metrics'),
+    path('internal/exports/', include('analytics.urls')),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rivo_partner.settings')
 
 application = get_wsgi_application()
+
+# Load AppConfig into memory before the first request
+from config.snapshot import warm_up  # noqa: E402
+
+warm_up()
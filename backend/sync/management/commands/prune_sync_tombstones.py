@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sync.services import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = f'Delete sync tombstones older than {TOMBSTONE_RETENTION.days} days (run daily)'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Done. {deleted} tombstones deleted.'))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('agent_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('clients', 'Client'), ('referral_bonuses', 'Referral bonus'), ('deal_bonuses', 'Deal bonus')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+                'ordering': ['-removed_at'],
+                'indexes': [models.Index(fields=['agent_id', 'removed_at'], name='sync_tombst_agent_i_f6b1cd_idx'), models.Index(fields=['removed_at'], name='sync_tombst_removed_f0558c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SyncTombstone(models.Model):
+    """A client or bonus that left an agent's book (deleted, or the client
+    moved to another agent), for delta sync to report as removed."""
+    KIND_CHOICES = [
+        ('clients', 'Client'),
+        ('referral_bonuses', 'Referral bonus'),
+        ('deal_bonuses', 'Deal bonus'),
+    ]
+
+    # Not a foreign key: tombstones are written while the agent's rows are
+    # being deleted, possibly with the agent itself
+    agent_id = models.UUIDField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        ordering = ['-removed_at']
+        indexes = [
+            models.Index(fields=['agent_id', 'removed_at']),
+            models.Index(fields=['removed_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} removed from {self.agent_id}'
@@ -0,0 +1,98 @@
+"""Delta sync of an agent's clients and bonuses.
+
+A sync token marks when the previous sync read the agent's book. The next
+sync returns clients updated since then — an index range scan on
+(source_agent, updated_at) — bonuses created since then, and the
+tombstones of rows that left the book. Without a valid token, or after
+more than MAX_CHANGES changes, the whole book is returned with "reset".
+
+updated_at is set before the writing transaction commits, so every delta
+reads LATE_MARGIN further back than the token; rows in that overlap come
+back twice, which clients apply as idempotent upserts. Tokens are signed
+per agent and device token: signing in again (and any account deletion,
+which clears the token) starts from a full sync."""
+import datetime
+
+from django.core import signing
+from django.utils import timezone
+
+from clients.models import Client
+from referrals.models import NewAgentBonus, ReferralBonus
+from sync.models import SyncTombstone
+
+LATE_MARGIN = datetime.timedelta(minutes=2)
+# Tombstones are pruned after this long; older tokens get a full sync
+TOMBSTONE_RETENTION = datetime.timedelta(days=30)
+MAX_CHANGES = 1000
+
+
+def _signer(agent):
+    return signing.Signer(salt=f'rivo.sync:{agent.pk}:{agent.device_token}')
+
+
+def issue_token(agent, at):
+    return _signer(agent).sign(str(int(at.timestamp() * 1_000_000)))
+
+
+def read_token(agent, token):
+    """When the token was issued, or None if it isn't a valid token of this
+    agent's current session."""
+    try:
+        micros = int(_signer(agent).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+    return datetime.datetime.fromtimestamp(micros / 1_000_000, tz=datetime.timezone.utc)
+
+
+def _books(agent):
+    """kind -> (the agent's rows, their change timestamp)."""
+    return {
+        'clients': (Client.objects.filter(source_agent=agent), 'updated_at'),
+        'referral_bonuses': (ReferralBonus.objects.filter(referrer=agent), 'created_at'),
+        'deal_bonuses': (NewAgentBonus.objects.filter(agent=agent), 'created_at'),
+    }
+
+
+def sync_changes(agent, token=''):
+    """The payload of GET /sync/: changed rows and removed ids per kind, the
+    next sync_token, and whether this is a full reset (replace, don't merge)."""
+    from clients.serializers import client_rows
+    from referrals.serializers import new_agent_bonus_rows, referral_bonus_rows
+
+    serializers = {'clients': client_rows, 'referral_bonuses': referral_bonus_rows,
+                   'deal_bonuses': new_agent_bonus_rows}
+    books = _books(agent)
+    now = timezone.now()
+    payload = {'sync_token': issue_token(agent, now), 'reset': False}
+    removed = {kind: [] for kind in books}
+
+    since = read_token(agent, token) if token else None
+    if since is not None and since > now - TOMBSTONE_RETENTION:
+        since -= LATE_MARGIN
+        changed = {
+            kind: list(queryset.filter(**{f'{stamp}__gte': since}).order_by(stamp)
+                       .values(*serializers[kind].columns)[:MAX_CHANGES + 1])
+            for kind, (queryset, stamp) in books.items()
+        }
+        if all(len(found) <= MAX_CHANGES for found in changed.values()):
+            tombstones = SyncTombstone.objects.filter(agent_id=agent.pk, removed_at__gte=since).order_by()
+            for kind, object_id in tombstones.values_list('kind', 'object_id'):
+                removed[kind].append(object_id)
+            for kind, found in changed.items():
+                # Removed and back again (a client moved away and returned)
+                present = {row['id'] for row in found}
+                removed[kind] = [str(object_id) for object_id in removed[kind] if object_id not in present]
+                payload[kind] = serializers[kind].many(found)
+            payload['removed'] = removed
+            return payload
+
+    payload['reset'] = True
+    for kind, (queryset, _) in books.items():
+        payload[kind] = serializers[kind].many(queryset)
+    payload['removed'] = removed
+    return payload
+
+
+def prune_tombstones():
+    """Delete tombstones no valid token can still need. Returns the count."""
+    return SyncTombstone.objects.filter(removed_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()[0]
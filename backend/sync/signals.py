@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from clients.models import Client
+from referrals.models import NewAgentBonus, ReferralBonus
+from sync.models import SyncTombstone
+
+
+def _tombstone(agent_id, kind, object_id):
+    if agent_id:
+        SyncTombstone.objects.create(agent_id=agent_id, kind=kind, object_id=object_id)
+
+
+@receiver(post_init, sender=Client)
+def client_loaded(sender, instance, **kwargs):
+    # The agent the client belonged to when loaded, to notice a move on save
+    instance._synced_agent_id = instance.__dict__.get('source_agent_id')
+
+
+@receiver(post_save, sender=Client)
+def client_saved(sender, instance, created, **kwargs):
+    moved_from = instance._synced_agent_id
+    instance._synced_agent_id = instance.__dict__.get('source_agent_id')
+    if not created and moved_from and moved_from != instance._synced_agent_id:
+        _tombstone(moved_from, 'clients', instance.pk)
+
+
+@receiver(post_delete, sender=Client)
+def client_deleted(sender, instance, **kwargs):
+    _tombstone(instance.source_agent_id, 'clients', instance.pk)
+
+
+@receiver(post_delete, sender=ReferralBonus)
+def referral_bonus_deleted(sender, instance, **kwargs):
+    _tombstone(instance.referrer_id, 'referral_bonuses', instance.pk)
+
+
+@receiver(post_delete, sender=NewAgentBonus)
+def deal_bonus_deleted(sender, instance, **kwargs):
+    _tombstone(instance.agent_id, 'deal_bonuses', instance.pk)
@@ -0,0 +1,6 @@
+from django.urls import path
+from sync import views
+
+urlpatterns = [
+    path('', views.sync, name='sync'),
+]
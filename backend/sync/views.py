@@ -0,0 +1,16 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from rivo_partner.compression import gzip_large
+from sync.services import sync_changes
+
+
+@gzip_large
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """Clients and bonuses changed since `?token=` (the sync_token of the
+    previous response). Read from the primary: a lagging replica could
+    return a token past rows it hasn't replayed yet."""
+    return Response(sync_changes(request.user, request.query_params.get('token', '')))
@@ -1,13 +1,37 @@
 from django.contrib import admin
 from webhooks.models import WebhookLog
+from rivo_partner.admin import ScalableAdmin
+
+
+class SourceFilter(admin.SimpleListFilter):
+    """Fixed choices — the default filter runs SELECT DISTINCT over the whole table."""
+    title = 'source'
+    parameter_name = 'source'
+
+    def lookups(self, request, model_admin):
+        return [('RIVO_CRM', 'Rivo CRM'), ('YCLOUD', 'YCloud')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(source=self.value())
+        return queryset
 
 
 @admin.register(WebhookLog)
-class WebhookLogAdmin(admin.ModelAdmin):
+class WebhookLogAdmin(ScalableAdmin):
     list_display = ['source', 'event_type', 'processed', 'created_at']
-    list_filter = ['source', 'event_type', 'processed', 'created_at']
+    list_filter = [SourceFilter, 'processed', 'created_at']
+    search_fields = ['=event_type']
+    date_hierarchy = 'created_at'
     readonly_fields = ['id', 'source', 'event_type', 'payload', 'processed', 'error_message', 'created_at']
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        changelist = f'{self.opts.app_label}_{self.opts.model_name}_changelist'
+        if request.resolver_match and request.resolver_match.url_name == changelist:
+            queryset = queryset.defer('payload', 'error_message')
+        return queryset
+
     def has_add_permission(self, request):
         return False
 
@@ -0,0 +1,15 @@
+from asgiref.sync import sync_to_async
+
+from agents.async_api import async_api_view, render
+from agents.services import asend_outbox
+from webhooks.services import process_ycloud_event
+
+
+@async_api_view(['POST'], authenticated=False)
+async def ycloud_webhook(request):
+    """Async version of webhooks.views.ycloud_webhook for ASGI mode.
+    Database work runs in a worker thread; replies go out concurrently
+    without holding it."""
+    body, outbox = await sync_to_async(process_ycloud_event)(request.data)
+    await asend_outbox(outbox)
+    return render(body)
@@ -0,0 +1,202 @@
+import hashlib
+import hmac
+import re
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from webhooks.models import WebhookLog
+
+ENDPOINTS = {
+    'RIVO_CRM': '/api/v1/webhook/crm-status/',
+    'YCLOUD': '/api/v1/webhook/ycloud/',
+}
+PHONE_KEYS = {'from', 'to', 'phone', 'client_phone', 'wa_id'}
+NAME_KEYS = {'name', 'client_name', 'agent_name'}
+EMAIL_KEYS = {'email'}
+PHONE_RE = re.compile(r'(?<![\w.-])\+?\d{9,15}(?![\w.-])')
+
+
+class Anonymizer:
+    """Replaces phones, names and emails with stable pseudonyms: the same
+    input always maps to the same output within and across runs (keyed on
+    SECRET_KEY), so per-lead and per-agent sequences survive anonymization."""
+
+    def __init__(self, key):
+        self.key = key.encode()
+
+    def _digest(self, value):
+        return hmac.new(self.key, value.encode(), hashlib.sha256).hexdigest()
+
+    def phone(self, value):
+        digits = str(int(self._digest(value.lstrip('+'))[:15], 16))[-8:].rjust(8, '0')
+        mapped = f'97199{digits}'
+        return f'+{mapped}' if value.startswith('+') else mapped
+
+    def name(self, value):
+        return f'Replay {self._digest(value)[:8]}' if value else value
+
+    def email(self, value):
+        return f'{self._digest(value)[:12]}@replay.invalid' if value else value
+
+    def __call__(self, data, key=None):
+        if isinstance(data, dict):
+            return {k: self(v, k) for k, v in data.items()}
+        if isinstance(data, list):
+            return [self(v, key) for v in data]
+        if not isinstance(data, str):
+            return data
+        if key in PHONE_KEYS:
+            return self.phone(data)
+        if key in NAME_KEYS:
+            return self.name(data)
+        if key in EMAIL_KEYS:
+            return self.email(data)
+        return PHONE_RE.sub(lambda m: self.phone(m.group()), data)
+
+
+def lead_key(source, payload):
+    """What must stay in order: a CRM lead, or a WhatsApp sender."""
+    if source == 'RIVO_CRM':
+        return payload.get('lead_id')
+    message = payload.get('whatsappInboundMessage')
+    return message.get('from') if isinstance(message, dict) else None
+
+
+class Command(BaseCommand):
+    help = ('Replay logged CRM and YCloud webhooks (anonymized) against a target instance '
+            'at a multiple of their original timing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', required=True, help='Base URL of the instance to replay against')
+        parser.add_argument('--since', required=True, help='Start of the window (ISO datetime)')
+        parser.add_argument('--until', help='End of the window (ISO datetime, default now)')
+        parser.add_argument('--source', choices=list(ENDPOINTS), action='append',
+                            help='Only replay this source (repeatable; default all)')
+        parser.add_argument('--speed', type=float, default=1.0, help='Time compression, e.g. 1, 10, 100')
+        parser.add_argument('--concurrency', type=int, default=50, help='Max requests in flight')
+        parser.add_argument('--limit', type=int, help='Stop after this many webhooks')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be replayed')
+
+    def _window(self, options):
+        since = parse_datetime(options['since'])
+        until = parse_datetime(options['until']) if options['until'] else timezone.now()
+        if since is None or until is None:
+            raise CommandError('--since/--until must be ISO datetimes, e.g. 2025-03-01T09:00')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        if timezone.is_naive(until):
+            until = timezone.make_aware(until)
+        if options['speed'] <= 0:
+            raise CommandError('--speed must be positive')
+        return since, until
+
+    def handle(self, *args, **options):
+        since, until = self._window(options)
+        logs = WebhookLog.objects.filter(
+            created_at__gte=since, created_at__lt=until,
+            source__in=options['source'] or list(ENDPOINTS),
+        ).order_by('created_at')
+        if options['limit']:
+            logs = logs[:options['limit']]
+
+        if options['dry_run']:
+            counts, first_at, last_at = Counter(), None, None
+            for source, created_at in logs.values_list('source', 'created_at').iterator(chunk_size=2000):
+                counts[source] += 1
+                first_at, last_at = first_at or created_at, created_at
+            for source, n in sorted(counts.items()):
+                self.stdout.write(f'  {source}: {n}')
+            span = (last_at - first_at).total_seconds() / options['speed'] if first_at else 0
+            self.stdout.write(f'Would replay {sum(counts.values())} webhooks over ~{span:.0f}s.')
+            return
+
+        target = options['target'].rstrip('/')
+        speed = options['speed']
+        anonymize = Anonymizer(settings.SECRET_KEY)
+        sessions = threading.local()
+
+        results = []            # (source, status or exception name, latency)
+        lag = []                # seconds behind schedule at send time
+        sequence = defaultdict(list)  # lead -> [(original position, sent_at, done_at)]
+        lock = threading.Lock()
+
+        def send(position, source, payload, lead):
+            session = getattr(sessions, 'session', None) or requests.Session()
+            sessions.session = session
+            sent_at = time.perf_counter()
+            try:
+                response = session.post(f'{target}{ENDPOINTS[source]}', json=payload, timeout=30)
+                outcome = response.status_code
+            except requests.RequestException as e:
+                outcome = type(e).__name__
+            done_at = time.perf_counter()
+            with lock:
+                results.append((source, outcome, done_at - sent_at))
+                if lead:
+                    sequence[lead].append((position, sent_at, done_at))
+
+        self.stdout.write(f'Replaying {since:%Y-%m-%d %H:%M} → {until:%Y-%m-%d %H:%M} at {speed:g}x to {target}')
+        started = time.perf_counter()
+        first_at = None
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for position, (source, payload, created_at) in enumerate(
+                    logs.values_list('source', 'payload', 'created_at').iterator(chunk_size=2000)):
+                if first_at is None:
+                    first_at = created_at
+                due = started + (created_at - first_at).total_seconds() / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                lag.append(max(-delay, 0))
+                payload = anonymize(payload)
+                pool.submit(send, position, source, payload, lead_key(source, payload))
+                if position and position % 1000 == 0:
+                    self.stdout.write(f'  {position} sent, {len(results)} done')
+        wall = time.perf_counter() - started
+
+        if not results:
+            self.stdout.write('No webhooks in the window.')
+            return
+        self._report(results, lag, sequence, wall)
+
+    def _report(self, results, lag, sequence, wall):
+        self.stdout.write(f'\n{len(results)} webhooks in {wall:.1f}s ({len(results) / wall:.1f}/s), '
+                          f'max schedule lag {max(lag):.2f}s')
+
+        by_source = defaultdict(list)
+        for source, _, latency in results:
+            by_source[source].append(latency)
+        by_source['all'] = [latency for _, _, latency in results]
+        self.stdout.write(f'{"source":<10}{"count":>8}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+        for source, latencies in sorted(by_source.items()):
+            q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            self.stdout.write(f'{source:<10}{len(latencies):>8}{q[49] * 1000:>10.1f}{q[89] * 1000:>10.1f}'
+                              f'{q[98] * 1000:>10.1f}{max(latencies) * 1000:>10.1f}')
+
+        outcomes = Counter((source, outcome) for source, outcome, _ in results)
+        self.stdout.write('Responses:')
+        for (source, outcome), n in sorted(outcomes.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f'  {source} {outcome}: {n}')
+
+        # A lead is out of order when one of its webhooks finished before an
+        # earlier one, or started while the previous one was still in flight
+        # (the target may then have applied them in either order).
+        reordered = overlapped = 0
+        for events in sequence.values():
+            events.sort()
+            if any(b[2] < a[2] for a, b in zip(events, events[1:])):
+                reordered += 1
+            elif any(b[1] < a[2] for a, b in zip(events, events[1:])):
+                overlapped += 1
+        style = self.style.SUCCESS if not (reordered or overlapped) else self.style.WARNING
+        self.stdout.write(style(f'Ordering: {len(sequence)} leads, {reordered} completed out of order, '
+                                f'{overlapped} more with overlapping deliveries.'))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['created_at'], name='webhook_log_created_33987a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['source', '-created_at'], name='webhook_log_source_19b7ea_idx'),
+        ),
+    ]
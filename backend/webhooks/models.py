@@ -5,7 +5,7 @@ from django.db import models
 class WebhookLog(models.Model):
     """Logs incoming webhooks from Rivo OS and YCloud."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    source = models.CharField(max_length=50)  # RIVO_OS, YCLOUD
+    source = models.CharField(max_length=50)  # RIVO_CRM, YCLOUD
     event_type = models.CharField(max_length=100)
     payload = models.JSONField()
     processed = models.BooleanField(default=False)
@@ -15,6 +15,10 @@ class WebhookLog(models.Model):
     class Meta:
         db_table = 'webhook_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['source', '-created_at']),
+        ]
 
     def __str__(self):
         return f'{self.source} - {self.event_type} - {self.created_at}'
@@ -0,0 +1,185 @@
+import logging
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.db import transaction
+
+from agents.deletion import kick_job, retry_job, unfinished_deletion
+from agents.models import Agent, WhatsAppSession
+from agents.services import generate_device_token, invalidate_network_snapshot, referral_signup_template, verification_reply_message
+from events.fanout import publish
+from webhooks.models import WebhookLog
+
+logger = logging.getLogger(__name__)
+
+
+def process_ycloud_event(data):
+    """Handle a YCloud webhook payload: log it, verify WhatsApp sign-in codes
+    and create/find agents. Returns (response body, outbox) — WhatsApp
+    messages are queued in the outbox instead of sent, so the sync and async
+    views can deliver them after the database work is done."""
+
+    outbox = []
+    log = WebhookLog.objects.create(
+        source='YCLOUD',
+        event_type=data.get('type', 'UNKNOWN'),
+        payload=data,
+    )
+
+    event_type = data.get('type', '')
+    logger.info('YCloud webhook received: type=%s', event_type)
+
+    # Handle incoming WhatsApp message
+    if event_type == 'whatsapp.inbound_message.received':
+        wa_message = data.get('whatsappInboundMessage', {})
+        from_phone = wa_message.get('from', '')
+        text = wa_message.get('text', {}).get('body', '') if isinstance(wa_message.get('text'), dict) else ''
+
+        # Also handle plain text body
+        if not text:
+            text = wa_message.get('text', '') if isinstance(wa_message.get('text'), str) else ''
+
+        # Extract WhatsApp profile name
+        wa_profile_name = wa_message.get('customerProfile', {}).get('name', '') if isinstance(wa_message.get('customerProfile'), dict) else ''
+
+        logger.info('YCloud message from %s: %.50s', from_phone, text)
+
+        # Extract verification code from message: RIVO 123456
+        match = re.search(r'RIVO\s*(\d{6})(?!\d)', text.upper())
+        phone = from_phone if from_phone.startswith('+') else f'+{from_phone}' if from_phone else ''
+
+        def _queue_retry(phone):
+            """Queue a wa.me link with the correct pre-filled code so user can just tap and send."""
+            from django.utils import timezone
+            from datetime import timedelta
+            cutoff = timezone.now() - timedelta(minutes=15)
+            pending = WhatsAppSession.objects.filter(
+                is_verified=False,
+                created_at__gte=cutoff,
+            ).order_by('-created_at').first()
+            if pending:
+                from config.models import AppConfig
+                otp_template = AppConfig.get_value('otp_msg', 'Just hit SEND to complete your Rivo registration!\nMy activation code is: RIVO {code}')
+                prefilled = otp_template.replace('{code}', pending.code)
+                wa_number = settings.YCLOUD_WHATSAPP_NUMBER.lstrip('+')
+                wa_link = f'https://wa.me/{wa_number}?text={quote(prefilled)}'
+                msg = f"That code didn't work. Tap below to try again:\n{wa_link}"
+                outbox.append(('text', phone, msg))
+
+        if not match and from_phone:
+            logger.warning('No valid code found in message from %s: %.50s', from_phone, text)
+            _queue_retry(phone)
+            log.error_message = 'No valid RIVO code in message'
+            log.save(update_fields=['error_message'])
+            return {'message': 'No valid code found.'}, outbox
+
+        if match and from_phone:
+            code = match.group(1)
+
+            try:
+                session = WhatsAppSession.objects.get(
+                    code=code,
+                    is_verified=False,
+                )
+            except WhatsAppSession.DoesNotExist:
+                logger.warning('Verification code not found or already used: %s', code)
+                _queue_retry(phone)
+                log.error_message = f'Code not found or already verified: {code}'
+                log.save(update_fields=['error_message'])
+                return {'message': 'Session not found.'}, outbox
+
+            with transaction.atomic():
+                # Find or create agent by phone
+                agent, created = Agent.objects.get_or_create(
+                    phone=phone,
+                    defaults={
+                        'name': wa_profile_name,
+                        'is_whatsapp_business': session.is_whatsapp_business,
+                    },
+                )
+
+                if created:
+                    logger.info('New agent created: %s', phone)
+                else:
+                    logger.info('Existing agent verified: %s', phone)
+
+                # Check if this is a genuinely returning active user (before any reactivation)
+                is_returning_user = not created and agent.is_active
+
+                # Reactivate if previously deleted — reset profile data
+                if not created and not agent.is_active:
+                    job = unfinished_deletion(agent)
+                    if job is not None:
+                        # The code stays valid: sending it again once the job is DONE signs them in
+                        from config.models import AppConfig
+                        if job.status == 'FAILED':
+                            retry_job(job)
+                            logger.error('Reactivation refused for %s: account deletion %s FAILED (%s); queued again',
+                                         phone, job.pk, job.error_message[:200], extra={'audit': True})
+                            msg = AppConfig.get_value(
+                                'deletion_failed_msg',
+                                "We couldn't finish removing the data of your previous Rivo account. Our team has "
+                                'been notified. Please try again later, or reply here if you need help.',
+                            )
+                        else:
+                            kick_job(job)
+                            logger.warning('Reactivation refused for %s: account deletion %s is %s',
+                                           phone, job.pk, job.status)
+                            msg = AppConfig.get_value(
+                                'deletion_in_progress_msg',
+                                "We're still removing the data of your previous Rivo account. "
+                                'Please send the same message again in a few minutes.',
+                            )
+                        outbox.append(('text', phone, msg))
+                        log.error_message = f'Account deletion {job.status}: {job.pk}'
+                        log.save(update_fields=['error_message'])
+                        return {'message': 'Account deletion in progress.'}, outbox
+                    agent.is_active = True
+                    agent.name = wa_profile_name
+                    agent.email = ''
+                    agent.agent_type = ''
+                    agent.agent_type_other = ''
+                    agent.rera_number = ''
+                    agent.referred_by = None
+                    agent.is_profile_complete = False
+                    agent.has_completed_first_action = False
+                    agent.save()
+                    logger.info('Agent reactivated: %s', phone)
+
+                # Handle referral code for new or reactivated agents
+                if session.referral_code and not agent.referred_by:
+                    try:
+                        referrer = Agent.objects.get(agent_code=session.referral_code)
+                        agent.referred_by = referrer
+                        agent.save(update_fields=['referred_by'])
+                        invalidate_network_snapshot(referrer.pk)
+                        publish(referrer.pk, 'network_signup', {'agent_id': str(agent.pk), 'name': agent.name})
+                        logger.info('Agent %s referred by %s (code: %s)', phone, referrer.phone, session.referral_code)
+                        outbox.append(referral_signup_template(referrer, agent))
+                    except Agent.DoesNotExist:
+                        logger.warning('Referral code not found: %s', session.referral_code)
+
+                # Generate device token and mark session verified
+                device_token = generate_device_token()
+                agent.device_token = device_token
+                agent.save(update_fields=['device_token'])
+
+                session.phone = phone
+                session.agent = agent
+                session.device_token = device_token
+                session.is_verified = True
+                session.save()
+
+            # Send WhatsApp reply with link back to the app
+            reply = verification_reply_message(code, is_returning_user=is_returning_user)
+            if reply:
+                outbox.append(('text', phone, reply))
+
+            log.processed = True
+            log.save(update_fields=['processed'])
+
+            return {'message': 'Agent verified successfully.'}, outbox
+
+    log.processed = True
+    log.save(update_fields=['processed'])
+    return {'message': 'Webhook received.'}, outbox
@@ -1,7 +1,11 @@
 from django.urls import path
-from webhooks import views
+from django.conf import settings
+from webhooks import async_views, views
+
+# ASGI mode serves the I/O-bound endpoints from async views
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('crm-status/', views.crm_status_webhook, name='webhook-crm-status'),
-    path('ycloud/', views.ycloud_webhook, name='webhook-ycloud'),
+    path('ycloud/', io_views.ycloud_webhook, name='webhook-ycloud'),
 ]
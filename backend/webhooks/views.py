@@ -1,18 +1,17 @@
 import logging
-import re
 from decimal import Decimal
-from urllib.parse import quote
-from django.conf import settings
-from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from agents.models import Agent, WhatsAppSession
-from agents.services import generate_device_token, send_client_status_update_notification, send_referral_signup_notification, send_verification_reply, _send_whatsapp
+from analytics.services import record_status_change
+from agents.services import invalidate_network_snapshot, send_client_status_update_notification, send_outbox
+from clients.commission import commission_for
 from clients.models import Client
+from events.fanout import publish
 from webhooks.models import WebhookLog
+from webhooks.services import process_ycloud_event
 from referrals.services import process_disbursal_bonuses
 
 logger = logging.getLogger(__name__)
@@ -35,11 +34,11 @@ def crm_status_webhook(request):
     pipeline_status = request.data.get('pipeline_status', '').upper()
     mortgage_amount = request.data.get('mortgage_amount')
 
-    logger.info(f'CRM webhook received: lead_id={lead_id}, status={pipeline_status}')
+    logger.info('CRM webhook received: lead_id=%s, status=%s', lead_id, pipeline_status)
 
     valid_statuses = ['SUBMITTED', 'CONTACTED', 'QUALIFIED', 'SUBMITTED_TO_BANK', 'PREAPPROVED', 'FOL_RECEIVED', 'DISBURSED', 'DECLINED']
     if pipeline_status not in valid_statuses:
-        logger.warning(f'CRM webhook invalid status: {pipeline_status}')
+        logger.warning('CRM webhook invalid status: %s', pipeline_status)
         log.error_message = f'Invalid status: {pipeline_status}'
         log.save(update_fields=['error_message'])
         return Response(
@@ -50,7 +49,7 @@ def crm_status_webhook(request):
     try:
         client = Client.objects.get(crm_lead_id=lead_id)
     except Client.DoesNotExist:
-        logger.warning(f'CRM webhook lead not found: {lead_id}')
+        logger.warning('CRM webhook lead not found: %s', lead_id)
         log.error_message = f'No client with crm_lead_id: {lead_id}'
         log.save(update_fields=['error_message'])
         return Response({'error': 'Lead not found.'}, status=status.HTTP_404_NOT_FOUND)
@@ -63,23 +62,35 @@ def crm_status_webhook(request):
         client.estimated_commission = None  # recalculate on save
 
     if pipeline_status == 'DISBURSED' and client.expected_mortgage_amount:
-        from config.models import AppConfig
-        rate = AppConfig.get_value('commission_min_percent', 0.45)
-        client.commission_amount = client.expected_mortgage_amount * Decimal(str(rate)) / 100
+        agent_type = client.source_agent.agent_type if client.source_agent else ''
+        client.commission_amount = commission_for(client.expected_mortgage_amount, agent_type)
 
     client.save()
 
-    logger.info(f'Client {client.client_name} status updated: {old_status} → {pipeline_status}')
+    if old_status != pipeline_status:
+        record_status_change(client, old_status, pipeline_status)
+        publish(client.source_agent_id, 'client_status', {
+            'client_id': str(client.pk),
+            'client_name': client.client_name,
+            'from_status': old_status,
+            'to_status': pipeline_status,
+        })
+
+    # Disbursed deal counts show up in the referrer's network
+    if 'DISBURSED' in (old_status, pipeline_status) and old_status != pipeline_status and client.source_agent:
+        invalidate_network_snapshot(client.source_agent.referred_by_id)
+
+    logger.info('Client %s status updated: %s → %s', client.pk, old_status, pipeline_status)
 
     # Notify the source agent about the status change
     if old_status != pipeline_status and client.source_agent:
         try:
             send_client_status_update_notification(client.source_agent, client.client_name, pipeline_status)
         except Exception as e:
-            logger.warning(f'Failed to send status update notification to {client.source_agent.phone}: {e}')
+            logger.warning('Failed to send status update notification to %s: %s', client.source_agent.phone, e)
 
     if pipeline_status == 'DISBURSED' and old_status != 'DISBURSED':
-        logger.info(f'Processing disbursal bonuses for client {client.client_name}')
+        logger.info('Processing disbursal bonuses for client %s', client.pk)
         process_disbursal_bonuses(client)
 
     log.processed = True
@@ -92,142 +103,8 @@ def crm_status_webhook(request):
 @permission_classes([AllowAny])
 def ycloud_webhook(request):
     """Receive incoming WhatsApp messages from YCloud.
-    When a user sends 'RIVO-VERIFY-XXXXXXXX', match to a pending session,
+    When a user sends 'RIVO 123456', match to a pending session,
     auto-create/find agent by phone, and mark session as verified."""
-
-    log = WebhookLog.objects.create(
-        source='YCLOUD',
-        event_type=request.data.get('type', 'UNKNOWN'),
-        payload=request.data,
-    )
-
-    event_type = request.data.get('type', '')
-    logger.info(f'YCloud webhook received: type={event_type}')
-
-    # Handle incoming WhatsApp message
-    if event_type == 'whatsapp.inbound_message.received':
-        wa_message = request.data.get('whatsappInboundMessage', {})
-        from_phone = wa_message.get('from', '')
-        text = wa_message.get('text', {}).get('body', '') if isinstance(wa_message.get('text'), dict) else ''
-
-        # Also handle plain text body
-        if not text:
-            text = wa_message.get('text', '') if isinstance(wa_message.get('text'), str) else ''
-
-        # Extract WhatsApp profile name
-        wa_profile_name = wa_message.get('customerProfile', {}).get('name', '') if isinstance(wa_message.get('customerProfile'), dict) else ''
-
-        logger.info(f'YCloud message from {from_phone} (name: {wa_profile_name}): {text[:50]}')
-
-        # Extract verification code from message: RIVO 123456
-        match = re.search(r'RIVO\s*(\d{6})(?!\d)', text.upper())
-        phone = from_phone if from_phone.startswith('+') else f'+{from_phone}' if from_phone else ''
-
-        def _send_retry(phone):
-            """Send a wa.me link with the correct pre-filled code so user can just tap and send."""
-            from django.utils import timezone
-            from datetime import timedelta
-            cutoff = timezone.now() - timedelta(minutes=15)
-            pending = WhatsAppSession.objects.filter(
-                is_verified=False,
-                created_at__gte=cutoff,
-            ).order_by('-created_at').first()
-            if pending:
-                from config.models import AppConfig
-                otp_template = AppConfig.get_value('otp_msg', 'Just hit SEND to complete your Rivo registration!\nMy activation code is: RIVO {code}')
-                prefilled = otp_template.replace('{code}', pending.code)
-                wa_number = settings.YCLOUD_WHATSAPP_NUMBER.lstrip('+')
-                wa_link = f'https://wa.me/{wa_number}?text={quote(prefilled)}'
-                msg = f"That code didn't work. Tap below to try again:\n{wa_link}"
-                _send_whatsapp(phone, msg)
-
-        if not match and from_phone:
-            logger.warning(f'No valid code found in message from {from_phone}: {text[:50]}')
-            _send_retry(phone)
-            log.error_message = 'No valid RIVO code in message'
-            log.save(update_fields=['error_message'])
-            return Response({'message': 'No valid code found.'})
-
-        if match and from_phone:
-            code = match.group(1)
-
-            try:
-                session = WhatsAppSession.objects.get(
-                    code=code,
-                    is_verified=False,
-                )
-            except WhatsAppSession.DoesNotExist:
-                logger.warning(f'Verification code not found or already used: {code}')
-                _send_retry(phone)
-                log.error_message = f'Code not found or already verified: {code}'
-                log.save(update_fields=['error_message'])
-                return Response({'message': 'Session not found.'})
-
-            with transaction.atomic():
-                # Find or create agent by phone
-                agent, created = Agent.objects.get_or_create(
-                    phone=phone,
-                    defaults={
-                        'name': wa_profile_name,
-                        'is_whatsapp_business': session.is_whatsapp_business,
-                    },
-                )
-
-                if created:
-                    logger.info(f'New agent created: {phone}')
-                else:
-                    logger.info(f'Existing agent verified: {phone}')
-
-                # Check if this is a genuinely returning active user (before any reactivation)
-                is_returning_user = not created and agent.is_active
-
-                # Reactivate if previously deleted — reset profile data
-                if not created and not agent.is_active:
-                    agent.is_active = True
-                    agent.name = wa_profile_name
-                    agent.email = ''
-                    agent.agent_type = ''
-                    agent.agent_type_other = ''
-                    agent.rera_number = ''
-                    agent.referred_by = None
-                    agent.is_profile_complete = False
-                    agent.has_completed_first_action = False
-                    agent.save()
-                    logger.info(f'Agent reactivated: {phone}')
-
-                # Handle referral code for new or reactivated agents
-                if session.referral_code and not agent.referred_by:
-                    try:
-                        referrer = Agent.objects.get(agent_code=session.referral_code)
-                        agent.referred_by = referrer
-                        agent.save(update_fields=['referred_by'])
-                        logger.info(f'Agent {phone} referred by {referrer.phone} (code: {session.referral_code})')
-                        send_referral_signup_notification(referrer, agent)
-                    except Agent.DoesNotExist:
-                        logger.warning(f'Referral code not found: {session.referral_code}')
-
-                # Generate device token and mark session verified
-                device_token = generate_device_token()
-                agent.device_token = device_token
-                agent.save(update_fields=['device_token'])
-
-                session.phone = phone
-                session.agent = agent
-                session.device_token = device_token
-                session.is_verified = True
-                session.save()
-
-            # Send WhatsApp reply with link back to the app
-            try:
-                send_verification_reply(phone, code, is_returning_user=is_returning_user)
-            except Exception as e:
-                logger.warning(f'Failed to send verification reply to {phone}: {e}')
-
-            log.processed = True
-            log.save(update_fields=['processed'])
-
-            return Response({'message': 'Agent verified successfully.'})
-
-    log.processed = True
-    log.save(update_fields=['processed'])
-    return Response({'message': 'Webhook received.'})
+    body, outbox = process_ycloud_event(request.data)
+    send_outbox(outbox)
+    return Response(body)